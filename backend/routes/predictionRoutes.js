@@ -1,5 +1,6 @@
 import express from 'express';
 import axios from 'axios';
+import net from 'net';
 import Prediction from '../models/Prediction.js';
 
 const router = express.Router();
@@ -40,6 +41,74 @@ const wakeUpMLService = async (mlServiceUrl) => {
   }
 };
 
+// Optional internal binary protocol of a co-located ML service (see
+// ml-service/binary_server.py). ML_SERVICE_SOCKET is a Unix socket path or
+// host:port; when it is unset or the socket fails, predictions go over HTTP.
+const mlServiceSocket = process.env.ML_SERVICE_SOCKET;
+let socketConnection = null;
+
+const connectMLSocket = () => {
+  const tcp = mlServiceSocket.match(/^(.+):(\d+)$/);
+  const socket = tcp
+    ? net.createConnection({ host: tcp[1], port: Number(tcp[2]) })
+    : net.createConnection({ path: mlServiceSocket });
+  const connection = { socket, pending: [], buffer: Buffer.alloc(0) };
+
+  socket.setNoDelay(true);
+  socket.on('data', (chunk) => {
+    connection.buffer = Buffer.concat([connection.buffer, chunk]);
+    // Response frame: u32 payload length, u16 status, payload
+    while (connection.buffer.length >= 6) {
+      const length = connection.buffer.readUInt32LE(0);
+      if (connection.buffer.length < 6 + length) break;
+      const status = connection.buffer.readUInt16LE(4);
+      const payload = connection.buffer.subarray(6, 6 + length);
+      connection.buffer = connection.buffer.subarray(6 + length);
+      const { resolve, reject } = connection.pending.shift();
+
+      if (status === 200) {
+        const nameLength = payload.readUInt16LE(0);
+        resolve(payload.readDoubleLE(2 + nameLength));
+      } else {
+        // Shaped like an axios error so the route's error handling applies
+        const error = new Error(`ML service socket returned status ${status}`);
+        error.response = { status, data: { detail: JSON.parse(payload.toString('utf8')) } };
+        reject(error);
+      }
+    }
+  });
+  const fail = (error) => {
+    if (socketConnection === connection) socketConnection = null;
+    connection.pending.splice(0).forEach(({ reject }) => reject(error));
+  };
+  socket.on('error', fail);
+  socket.on('close', () => fail(Object.assign(new Error('ML service socket closed'), { code: 'ECONNRESET' })));
+  return connection;
+};
+
+// Score one row over the socket; requests are pipelined on one connection
+const predictViaSocket = (engineSize, cylinders, fuelConsumption) => {
+  if (!socketConnection) socketConnection = connectMLSocket();
+  const connection = socketConnection;
+
+  // Request frame: u32 payload length, u16 version name length (0: default model), packed float64 row
+  const frame = Buffer.alloc(4 + 2 + 24);
+  frame.writeUInt32LE(2 + 24, 0);
+  frame.writeUInt16LE(0, 4);
+  frame.writeDoubleLE(engineSize, 6);
+  frame.writeDoubleLE(cylinders, 14);
+  frame.writeDoubleLE(fuelConsumption, 22);
+
+  return new Promise((resolve, reject) => {
+    const timer = setTimeout(() => connection.socket.destroy(new Error('ML service socket timed out')), 15000);
+    connection.pending.push({
+      resolve: (value) => { clearTimeout(timer); resolve(value); },
+      reject: (error) => { clearTimeout(timer); reject(error); }
+    });
+    connection.socket.write(frame);
+  });
+};
+
 // Validation middleware
 const validatePredictionInput = (req, res, next) => {
   const { engineSize, cylinders, fuelConsumption } = req.body;
@@ -85,26 +154,39 @@ router.post('/predict', validatePredictionInput, async (req, res) => {
     console.log('🔍 Prediction request:', { engineSize, cylinders, fuelConsumption });
 
     const mlServiceUrl = process.env.ML_SERVICE_URL || 'http://localhost:8001';
-    
-    // First, wake up the ML service (important for Render free tier)
-    await wakeUpMLService(mlServiceUrl);
-    
-    // Wait a brief moment for the service to fully initialize
-    await new Promise(resolve => setTimeout(resolve, 2000));
-    
-    // Call ML Service
-    const mlResponse = await axios.post(`${mlServiceUrl}/predict`, {
-      ENGINESIZE: engineSize,
-      CYLINDERS: cylinders,
-      FUELCONSUMPTION_COMB: fuelConsumption
-    }, {
-      timeout: 15000, // 15 second timeout (increased for slow startup)
-      headers: {
-        'Content-Type': 'application/json'
+
+    let prediction;
+    if (mlServiceSocket) {
+      try {
+        prediction = await predictViaSocket(engineSize, cylinders, fuelConsumption);
+      } catch (socketError) {
+        // The service answered: report its error instead of retrying over HTTP
+        if (socketError.response) throw socketError;
+        console.log('⚠️ ML service socket failed, falling back to HTTP:', socketError.message);
       }
-    });
+    }
 
-    const prediction = mlResponse.data.prediction;
+    if (prediction === undefined) {
+      // First, wake up the ML service (important for Render free tier)
+      await wakeUpMLService(mlServiceUrl);
+      
+      // Wait a brief moment for the service to fully initialize
+      await new Promise(resolve => setTimeout(resolve, 2000));
+      
+      // Call ML Service
+      const mlResponse = await axios.post(`${mlServiceUrl}/predict`, {
+        ENGINESIZE: engineSize,
+        CYLINDERS: cylinders,
+        FUELCONSUMPTION_COMB: fuelConsumption
+      }, {
+        timeout: 15000, // 15 second timeout (increased for slow startup)
+        headers: {
+          'Content-Type': 'application/json'
+        }
+      });
+
+      prediction = mlResponse.data.prediction;
+    }
     console.log('🤖 ML Service response:', prediction);
 
     // Save prediction to MongoDB
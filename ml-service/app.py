@@ -1,22 +1,55 @@
 """
 FastAPI ML Service for CO2 Emissions Prediction
 
-This service loads the trained sklearn pipeline and provides a REST API
+This service loads the trained model artifacts and provides a REST API
 for predicting CO2 emissions based on car specifications.
 """
 
-from fastapi import FastAPI, HTTPException
+import time
+
+# Taken before any heavy import so cold-start cost can be reported
+IMPORT_STARTED = time.perf_counter()
+
+from fastapi import BackgroundTasks, FastAPI, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
-import joblib
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
+import asyncio
+import json
 import numpy as np
 import logging
 import os
-from typing import List
+import sys
+from typing import List, Optional
+
+from async_logging import LogSampler, configure_logging
+from binary_server import ROW_BYTES, BinaryPredictionServer, FrameError, bind_listener
+from columnar import BatchFormatError, encode_binary, parse_binary, parse_columns, validate_features
+from dedup import should_dedup, unique_rows
+from drift import DriftMonitor
+from executor import ExecutorSaturated, ModelExecutor
+from fast_response import FastJSONResponse, batch_body, prediction_body, round_bound, round_bounds
+from journal import PredictionJournal
+import metrics
+from microbatch import MicroBatcher
+from prediction_cache import PredictionCache
+from predictor import LinearPredictor
+import prefork
+from registry import ModelRegistry
+from shadow import ShadowScorer
+from whatif import GridError, evaluate_surface, grid_rows, surface_axes, surface_body, surface_key
+
+IMPORT_SECONDS = time.perf_counter() - IMPORT_STARTED
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging: records are formatted and written off the request path,
+# and per-request info logs are sampled at PREDICTION_LOG_SAMPLE_RATE
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "text").lower()
+PREDICTION_LOG_SAMPLE_RATE = float(os.environ.get("PREDICTION_LOG_SAMPLE_RATE", 0.01))
+
+log_handler = configure_logging(level=LOG_LEVEL, json_lines=LOG_FORMAT == "json")
 logger = logging.getLogger(__name__)
+prediction_log_sampler = LogSampler(PREDICTION_LOG_SAMPLE_RATE)
 
 app = FastAPI(
     title="Car CO2 Emissions Prediction API",
@@ -33,8 +66,204 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Global variable to store the loaded model
-model_pipeline = None
+# Request counts and latency per route, served from /metrics
+app.add_middleware(metrics.MetricsMiddleware)
+
+# Model registry: every fuel_co2_pipeline_<version>.pkl in MODEL_DIR is served
+MODEL_DIR = os.environ.get("MODEL_DIR")
+MODEL_DEFAULT_VERSION = os.environ.get("MODEL_DEFAULT_VERSION")
+MODEL_WATCH_INTERVAL = float(os.environ.get("MODEL_WATCH_INTERVAL", 0))
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
+model_registry = ModelRegistry(model_dir=MODEL_DIR, pinned_default=MODEL_DEFAULT_VERSION)
+model_watch_task = None
+startup_timing = {}
+
+# Micro-batching of concurrent /predict calls; a lone call is scored without waiting,
+# MICROBATCH_MAX_WAIT_US only bounds the wait behind a batch that is still being scored
+MICROBATCH_ENABLED = os.environ.get("MICROBATCH_ENABLED", "true").lower() == "true"
+MICROBATCH_MAX_WAIT_US = int(os.environ.get("MICROBATCH_MAX_WAIT_US", 500))
+MICROBATCH_MAX_SIZE = int(os.environ.get("MICROBATCH_MAX_SIZE", 64))
+
+# Streaming NDJSON batch scoring
+STREAM_CHUNK_SIZE = int(os.environ.get("STREAM_CHUNK_SIZE", 1000))
+STREAM_MAX_LINE_BYTES = int(os.environ.get("STREAM_MAX_LINE_BYTES", 4096))
+
+# Serialize prediction responses without response_model revalidation
+FAST_RESPONSE_ENABLED = os.environ.get("FAST_RESPONSE_ENABLED", "false").lower() == "true"
+
+# Columnar and binary batch scoring
+COLUMNAR_MAX_ROWS = int(os.environ.get("COLUMNAR_MAX_ROWS", 1_000_000))
+
+# Internal binary protocol on a Unix socket (BINARY_SOCKET_PATH) or localhost TCP (BINARY_SOCKET_PORT)
+BINARY_SOCKET_PATH = os.environ.get("BINARY_SOCKET_PATH")
+BINARY_SOCKET_HOST = os.environ.get("BINARY_SOCKET_HOST", "127.0.0.1")
+BINARY_SOCKET_PORT = int(os.environ.get("BINARY_SOCKET_PORT", 0))
+BINARY_SOCKET_ENABLED = bool(BINARY_SOCKET_PATH or BINARY_SOCKET_PORT)
+
+binary_listener = None
+
+# Collapse duplicate rows of large batches before scoring them with slow models
+DEDUP_ENABLED = os.environ.get("DEDUP_ENABLED", "true").lower() == "true"
+DEDUP_MIN_ROWS = int(os.environ.get("DEDUP_MIN_ROWS", 1000))
+
+# Prediction cache in front of /predict and /batch-predict
+CACHE_ENABLED = os.environ.get("CACHE_ENABLED", "true").lower() == "true"
+CACHE_MAX_SIZE = int(os.environ.get("CACHE_MAX_SIZE", 10000))
+CACHE_TTL_SECONDS = float(os.environ.get("CACHE_TTL_SECONDS", 0))
+CACHE_DECIMALS = int(os.environ.get("CACHE_DECIMALS", 6))
+
+prediction_cache = PredictionCache(
+    max_size=CACHE_MAX_SIZE,
+    ttl_seconds=CACHE_TTL_SECONDS,
+    decimals=CACHE_DECIMALS
+)
+
+# What-if prediction surfaces, cached per model version
+WHATIF_MAX_POINTS = int(os.environ.get("WHATIF_MAX_POINTS", 10000))
+WHATIF_CACHE_SIZE = int(os.environ.get("WHATIF_CACHE_SIZE", 256))
+
+surface_cache = PredictionCache(max_size=WHATIF_CACHE_SIZE)
+
+# Input drift monitoring against the default model's training distribution
+DRIFT_ENABLED = os.environ.get("DRIFT_ENABLED", "true").lower() == "true"
+# The sliding window spans DRIFT_WINDOWS buckets of DRIFT_BUCKET_SECONDS each
+DRIFT_BUCKET_SECONDS = float(os.environ.get("DRIFT_BUCKET_SECONDS", 60))
+DRIFT_WINDOWS = int(os.environ.get("DRIFT_WINDOWS", 15))
+DRIFT_BUFFER_ROWS = int(os.environ.get("DRIFT_BUFFER_ROWS", 256))
+DRIFT_MIN_ROWS = int(os.environ.get("DRIFT_MIN_ROWS", 100))
+
+drift_monitor = DriftMonitor(
+    bucket_seconds=DRIFT_BUCKET_SECONDS,
+    windows=DRIFT_WINDOWS,
+    buffer_rows=DRIFT_BUFFER_ROWS,
+    min_rows=DRIFT_MIN_ROWS
+)
+
+# Model execution pool: "thread", "process" or "inline" (on the event loop)
+EXECUTOR_MODE = os.environ.get("EXECUTOR_MODE", "thread").lower()
+EXECUTOR_WORKERS = int(os.environ.get("EXECUTOR_WORKERS", 4))
+EXECUTOR_MAX_QUEUE = int(os.environ.get("EXECUTOR_MAX_QUEUE", 64))
+EXECUTOR_INLINE_ROWS = int(os.environ.get("EXECUTOR_INLINE_ROWS", 1000))
+EXECUTOR_RETRY_AFTER = int(os.environ.get("EXECUTOR_RETRY_AFTER", 1))
+EXECUTOR_REJECT_STATUS = int(os.environ.get("EXECUTOR_REJECT_STATUS", 503))
+
+model_executor = ModelExecutor(
+    mode=EXECUTOR_MODE,
+    workers=EXECUTOR_WORKERS,
+    max_queue=EXECUTOR_MAX_QUEUE,
+    inline_rows=EXECUTOR_INLINE_ROWS,
+    retry_after=EXECUTOR_RETRY_AFTER,
+    on_wait=metrics.EXECUTOR_WAIT_SECONDS.observe
+)
+
+# Opt-in binary journal of every scored row, for offline replay
+JOURNAL_DIR = os.environ.get("JOURNAL_DIR")
+JOURNAL_SEGMENT_MB = float(os.environ.get("JOURNAL_SEGMENT_MB", 64))
+JOURNAL_FLUSH_SECONDS = float(os.environ.get("JOURNAL_FLUSH_SECONDS", 1.0))
+JOURNAL_FLUSH_KB = float(os.environ.get("JOURNAL_FLUSH_KB", 1024))
+JOURNAL_MAX_PENDING = int(os.environ.get("JOURNAL_MAX_PENDING", 10000))
+
+prediction_journal = PredictionJournal(
+    JOURNAL_DIR or "journal",
+    segment_bytes=int(JOURNAL_SEGMENT_MB * 1024 * 1024),
+    flush_bytes=int(JOURNAL_FLUSH_KB * 1024),
+    flush_seconds=JOURNAL_FLUSH_SECONDS,
+    max_pending=JOURNAL_MAX_PENDING
+)
+
+# Shadow scoring of sampled requests by a candidate model version
+SHADOW_VERSION = os.environ.get("SHADOW_VERSION")
+SHADOW_SAMPLE_RATE = float(os.environ.get("SHADOW_SAMPLE_RATE", 0.1))
+SHADOW_MAX_QUEUE = int(os.environ.get("SHADOW_MAX_QUEUE", 1000))
+SHADOW_MAX_BATCH_ROWS = int(os.environ.get("SHADOW_MAX_BATCH_ROWS", 10000))
+
+def _shadow_candidate():
+    """The loaded shadow candidate version, if one is configured"""
+    return model_registry.versions().get(SHADOW_VERSION) if SHADOW_VERSION else None
+
+shadow_scorer = ShadowScorer(
+    _shadow_candidate,
+    sample_rate=SHADOW_SAMPLE_RATE,
+    max_queue=SHADOW_MAX_QUEUE,
+    max_batch_rows=SHADOW_MAX_BATCH_ROWS,
+    executor=model_executor
+)
+
+def _observe_microbatch(seconds: float, rows: int):
+    """Record a coalesced /predict batch in the metrics"""
+    metrics.PREDICT_SECONDS.observe(seconds, "/predict")
+    metrics.BATCH_SIZE.observe(rows, "/predict")
+
+micro_batcher = MicroBatcher(
+    max_batch_size=MICROBATCH_MAX_SIZE,
+    max_wait_us=MICROBATCH_MAX_WAIT_US,
+    on_predict=_observe_microbatch,
+    executor=model_executor
+)
+
+def _collect_model_metrics():
+    """Refresh model load, logging, executor and drift gauges before each /metrics scrape"""
+    for model in model_registry.versions().values():
+        if model.load_seconds is not None:
+            metrics.MODEL_LOAD_SECONDS.set(model.load_seconds, model.version)
+    metrics.LOG_RECORDS_DROPPED.set(log_handler.dropped)
+    metrics.EXECUTOR_IN_FLIGHT.set(model_executor.in_flight)
+    metrics.EXECUTOR_QUEUE_DEPTH.set(model_executor.queue_depth)
+    if DRIFT_ENABLED:
+        drift = drift_monitor.report()["window"]
+        for name, feature in ((drift or {}).get("features") or {}).items():
+            metrics.DRIFT_PSI.set(feature["psi"], name)
+            metrics.DRIFT_Z_SHIFT.set(feature["z_shift"], name)
+
+metrics.registry.on_collect(_collect_model_metrics)
+
+def _saturated_error(error: ExecutorSaturated, route: str) -> HTTPException:
+    """Retryable rejection for a call turned away by the model executor"""
+    metrics.EXECUTOR_REJECTED.inc(route)
+    return HTTPException(
+        status_code=EXECUTOR_REJECT_STATUS,
+        detail="Model executor is saturated, retry later",
+        headers={"Retry-After": str(error.retry_after)}
+    )
+
+async def _predict(model, features: np.ndarray, route: str, dedup: bool = True) -> np.ndarray:
+    """
+    Score a feature matrix with a model on the executor, timing the predict step
+    
+    Large batches for models slower than the fused kernel are collapsed to
+    their unique rows first and the predictions scattered back. Callers that
+    know their rows are distinct pass dedup=False to skip the hashing pass.
+    """
+    inverse = None
+    if dedup and DEDUP_ENABLED and should_dedup(model.predictor, len(features), DEDUP_MIN_ROWS):
+        rows = len(features)
+        features, inverse = unique_rows(features)
+        metrics.DEDUP_ROWS.inc(route, amount=rows)
+        metrics.DEDUP_UNIQUE_ROWS.inc(route, amount=len(features))
+    
+    try:
+        predictions, seconds = await model_executor.run(model.predictor, features)
+    except ExecutorSaturated as e:
+        raise _saturated_error(e, route)
+    metrics.PREDICT_SECONDS.observe(seconds, route)
+    
+    if inverse is not None:
+        predictions = predictions[inverse]
+    return predictions
+
+def _check_interval_support(model, confidence: Optional[float]):
+    """Reject interval requests for models exported without the OLS statistics"""
+    if confidence is not None and model.interval is None:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Model version {model.version} does not support prediction intervals"
+        )
+
+def _prediction_bounds(model, features: np.ndarray, predictions: np.ndarray, confidence: float):
+    """Lower and upper prediction interval bounds, floored at zero like the predictions"""
+    half_width = model.interval.half_width(features, confidence)
+    return np.maximum(predictions - half_width, 0.0), np.maximum(predictions + half_width, 0.0)
 
 class PredictionInput(BaseModel):
     """Input schema for prediction requests"""
@@ -55,8 +284,13 @@ class PredictionOutput(BaseModel):
     """Output schema for prediction responses"""
     prediction: float = Field(..., description="Predicted CO2 emissions in g/km")
     input_features: PredictionInput = Field(..., description="Echo of input features")
+    model_version: Optional[str] = Field(None, description="Model version that served the prediction")
+    lower: Optional[float] = Field(None, description="Lower prediction interval bound, if requested")
+    upper: Optional[float] = Field(None, description="Upper prediction interval bound, if requested")
+    confidence: Optional[float] = Field(None, description="Confidence level of the interval")
     
     class Config:
+        protected_namespaces = ()
         json_schema_extra = {
             "example": {
                 "prediction": 244.7,
@@ -64,7 +298,11 @@ class PredictionOutput(BaseModel):
                     "ENGINESIZE": 3.5,
                     "CYLINDERS": 6,
                     "FUELCONSUMPTION_COMB": 10.0
-                }
+                },
+                "model_version": "v1",
+                "lower": 198.35,
+                "upper": 291.1,
+                "confidence": 0.95
             }
         }
 
@@ -76,60 +314,161 @@ class BatchPredictionOutput(BaseModel):
     """Output schema for batch prediction responses"""
     predictions: List[float] = Field(..., description="List of predicted CO2 emissions")
     count: int = Field(..., description="Number of predictions made")
+    model_version: Optional[str] = Field(None, description="Model version that served the predictions")
+    lower: Optional[List[Optional[float]]] = Field(None, description="Lower prediction interval bounds, if requested")
+    upper: Optional[List[Optional[float]]] = Field(None, description="Upper prediction interval bounds, if requested")
+    confidence: Optional[float] = Field(None, description="Confidence level of the intervals")
 
-@app.on_event("startup")
-async def load_model():
-    """Load the trained model on application startup"""
-    global model_pipeline
-    
-    # Try multiple possible model paths
-    possible_paths = [
-        os.path.join("..", "model_artifacts", "fuel_co2_pipeline_v1.pkl"),
-        os.path.join("model_artifacts", "fuel_co2_pipeline_v1.pkl"),
-        "fuel_co2_pipeline_v1.pkl",
-        os.path.join("/app", "model_artifacts", "fuel_co2_pipeline_v1.pkl")
-    ]
-    
-    model_loaded = False
-    for model_path in possible_paths:
+    class Config:
+        protected_namespaces = ()
+
+class GridRange(BaseModel):
+    """Range of one feature in a what-if grid"""
+    min: float = Field(..., description="First grid value")
+    max: float = Field(..., description="Last grid value")
+    steps: int = Field(10, ge=1, le=1000, description="Number of evenly spaced values")
+
+class WhatIfInput(BaseModel):
+    """Input schema for what-if prediction surfaces"""
+    base: PredictionInput = Field(..., description="Car whose specs are varied")
+    ENGINESIZE: Optional[GridRange] = Field(None, description="Engine size range, or fixed at base")
+    CYLINDERS: Optional[GridRange] = Field(None, description="Cylinder range, or fixed at base")
+    FUELCONSUMPTION_COMB: Optional[GridRange] = Field(None, description="Fuel consumption range, or fixed at base")
+    max_points: Optional[int] = Field(None, ge=1, description="Point budget, capped at WHATIF_MAX_POINTS")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "base": {
+                    "ENGINESIZE": 3.5,
+                    "CYLINDERS": 6,
+                    "FUELCONSUMPTION_COMB": 10.0
+                },
+                "ENGINESIZE": {"min": 1.0, "max": 6.0, "steps": 26},
+                "FUELCONSUMPTION_COMB": {"min": 5.0, "max": 20.0, "steps": 31}
+            }
+        }
+
+class ColumnarBatchInput(BaseModel):
+    """Struct-of-arrays input schema for large batch prediction requests"""
+    ENGINESIZE: List[float] = Field(..., description="Engine sizes in liters")
+    CYLINDERS: List[float] = Field(..., description="Numbers of cylinders")
+    FUELCONSUMPTION_COMB: List[float] = Field(..., description="Combined fuel consumptions (L/100km)")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "ENGINESIZE": [2.0, 3.5],
+                "CYLINDERS": [4, 6],
+                "FUELCONSUMPTION_COMB": [8.0, 10.0]
+            }
+        }
+
+async def _reload_models():
+    """Reload model artifacts off the event loop and sync the prediction caches"""
+    summary = await asyncio.to_thread(model_registry.refresh)
+    versions = model_registry.versions().values()
+    fingerprints = [model.fingerprint for model in versions]
+    prediction_cache.set_models(fingerprints)
+    surface_cache.set_models(fingerprints)
+    model_executor.set_models(model.predictor for model in versions)
+    _sync_drift_reference()
+    return summary
+
+def _sync_drift_reference():
+    """Point the drift monitor at the default model's training statistics"""
+    if model_registry.ready:
+        model = model_registry.get()
+        drift_monitor.set_reference(model.version, model.info)
+
+def _observe_drift(features, single_row=False):
+    """Feed scored inputs to the drift monitor; a monitoring failure never fails a prediction"""
+    if not DRIFT_ENABLED:
+        return
+    try:
+        if single_row:
+            drift_monitor.observe_row(features)
+        else:
+            drift_monitor.observe(features)
+    except Exception as e:
+        logger.warning(f"Drift monitoring failed: {e}")
+
+async def _watch_models():
+    """Poll the model directory and hot-swap changed artifacts"""
+    while True:
+        await asyncio.sleep(MODEL_WATCH_INTERVAL)
         try:
-            logger.info(f"Trying to load model from {model_path}")
-            if os.path.exists(model_path):
-                model_pipeline = joblib.load(model_path)
-                logger.info(f"Model loaded successfully from {model_path}!")
-                model_loaded = True
-                break
+            if await asyncio.to_thread(model_registry.has_changes):
+                logger.info("Model artifacts changed, reloading...")
+                await _reload_models()
         except Exception as e:
-            logger.warning(f"Failed to load from {model_path}: {str(e)}")
-    
-    if not model_loaded:
-        logger.error("Could not find model file in any of the expected locations")
-        # Create a simple fallback model for demonstration
-        from sklearn.linear_model import LinearRegression
-        from sklearn.preprocessing import StandardScaler
-        from sklearn.pipeline import Pipeline
-        
-        logger.warning("Creating fallback model...")
-        model_pipeline = Pipeline([
-            ('scaler', StandardScaler()),
-            ('regressor', LinearRegression())
-        ])
-        
-        # Fit with sample data (this is just for demo - replace with actual training)
-        X_sample = np.array([[2.0, 4, 8.0], [3.5, 6, 10.0], [5.0, 8, 15.0]])
-        y_sample = np.array([180.0, 244.0, 350.0])
-        model_pipeline.fit(X_sample, y_sample)
-        logger.warning("Fallback model created and fitted with sample data")
+            logger.error(f"Model reload error: {str(e)}")
+
+def _resolve_model(version: Optional[str] = None):
+    """Return the requested model version, or the default one"""
+    if not model_registry.ready:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    
+    try:
+        return model_registry.get(version)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown model version: {version}")
+
+def _check_admin_token(token: Optional[str]):
+    """Reject admin calls without the configured ADMIN_TOKEN, if one is set"""
+    if ADMIN_TOKEN and token != ADMIN_TOKEN:
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+@app.on_event("startup")
+async def load_model():
+    """Load the trained model versions on application startup"""
+    global model_watch_task
     
-    # Test the model with a sample prediction
     try:
-        test_input = np.array([[3.5, 6, 10.0]])
-        test_prediction = model_pipeline.predict(test_input)
-        logger.info(f"Model test successful. Sample prediction: {test_prediction[0]:.2f}")
+        load_started = time.perf_counter()
+        summary = await _reload_models()
+        logger.info(f"Models loaded: {summary['loaded']}, default: {summary['default']}")
+        
+        startup_timing.update({
+            "import_seconds": IMPORT_SECONDS,
+            "model_load_seconds": time.perf_counter() - load_started,
+            "sklearn_imported": "sklearn" in sys.modules
+        })
+        logger.info(
+            f"Startup timing: imports {IMPORT_SECONDS * 1000:.1f} ms, "
+            f"model load {startup_timing['model_load_seconds'] * 1000:.1f} ms, "
+            f"sklearn imported: {startup_timing['sklearn_imported']}"
+        )
         
     except Exception as e:
         logger.error(f"Failed to load model: {str(e)}")
         raise RuntimeError(f"Could not load model: {str(e)}")
+    
+    if BINARY_SOCKET_ENABLED:
+        await binary_server.start(bind_binary_listener())
+        logger.info(f"Binary prediction protocol listening on {binary_server.address}")
+    
+    if JOURNAL_DIR:
+        prediction_journal.start()
+        logger.info(f"Journaling predictions to {JOURNAL_DIR}")
+    
+    if SHADOW_VERSION:
+        shadow_scorer.start()
+        logger.info(f"Shadow scoring {SHADOW_SAMPLE_RATE:.0%} of requests with model {SHADOW_VERSION}")
+    
+    # Under the pre-fork server the master watches and rolls the workers
+    if MODEL_WATCH_INTERVAL > 0 and not prefork.is_worker():
+        model_watch_task = asyncio.create_task(_watch_models())
+
+@app.on_event("shutdown")
+async def stop_model_watch():
+    """Stop watching the model directory and release the model executor"""
+    if model_watch_task is not None:
+        model_watch_task.cancel()
+    binary_server.close()
+    shadow_scorer.stop()
+    prediction_journal.close()
+    model_executor.shutdown()
 
 @app.get("/")
 async def root():
@@ -138,11 +477,25 @@ async def root():
         "service": "Car CO2 Emissions Prediction API",
         "version": "1.0.0",
         "status": "running",
-        "model_loaded": model_pipeline is not None,
+        "model_loaded": model_registry.ready,
         "endpoints": {
             "predict": "/predict",
             "batch_predict": "/batch-predict",
+            "batch_predict_stream": "/batch-predict/stream",
+            "batch_predict_columnar": "/batch-predict/columnar",
+            "batch_predict_binary": "/batch-predict/binary",
+            "what_if": "/what-if",
+            "microbatch_stats": "/microbatch-stats",
+            "executor_stats": "/executor-stats",
+            "shadow_stats": "/shadow-stats",
+            "journal_stats": "/journal-stats",
+            "binary_socket_stats": "/binary-socket-stats",
+            "drift": "/drift",
+            "cache_stats": "/cache-stats",
+            "models": "/models",
+            "reload_models": "/admin/reload-models",
             "health": "/health",
+            "metrics": "/metrics",
             "docs": "/docs"
         }
     }
@@ -152,12 +505,23 @@ async def health_check():
     """Health check endpoint"""
     return {
         "status": "healthy",
-        "model_loaded": model_pipeline is not None,
-        "service": "ml-service"
+        "model_loaded": model_registry.ready,
+        "model_version": model_registry.default_version,
+        "service": "ml-service",
+        "executor": {
+            "in_flight": model_executor.in_flight,
+            "queue_depth": model_executor.queue_depth,
+            "saturated": model_executor.saturated
+        }
     }
 
-@app.post("/predict", response_model=PredictionOutput)
-async def predict_co2(input_data: PredictionInput):
+@app.post("/predict", response_model=PredictionOutput, response_model_exclude_none=True)
+async def predict_co2(
+    input_data: PredictionInput,
+    background_tasks: BackgroundTasks,
+    version: Optional[str] = None,
+    confidence: Optional[float] = Query(None, gt=0, lt=1)
+):
     """
     Predict CO2 emissions for a single car specification
     
@@ -166,47 +530,98 @@ async def predict_co2(input_data: PredictionInput):
     - **FUELCONSUMPTION_COMB**: Combined fuel consumption in L/100km (1.0 - 50.0)
     
     Returns the predicted CO2 emissions in grams per kilometer.
+    Pass `?version=` to select a model version instead of the default, and
+    `?confidence=0.95` to also get the OLS prediction interval bounds.
     """
     
-    if model_pipeline is None:
-        raise HTTPException(status_code=503, detail="Model not loaded")
+    model = _resolve_model(version)
+    _check_interval_support(model, confidence)
     
     try:
-        # Prepare input features as numpy array
-        features = np.array([[
+        # Prepare input features as a single row
+        row = [
             input_data.ENGINESIZE,
             input_data.CYLINDERS,
             input_data.FUELCONSUMPTION_COMB
-        ]])
+        ]
+        
+        _observe_drift(row, single_row=True)
         
-        # Make prediction
-        prediction = model_pipeline.predict(features)[0]
+        cache_key = prediction_cache.key(model.fingerprint, *row) if CACHE_ENABLED else None
+        prediction = prediction_cache.get(cache_key) if CACHE_ENABLED else None
+        
+        # Make prediction, coalescing with concurrent requests when enabled
+        if prediction is None:
+            if MICROBATCH_ENABLED:
+                try:
+                    prediction = await micro_batcher.submit(row, model.predictor)
+                except ExecutorSaturated as e:
+                    raise _saturated_error(e, "/predict")
+            else:
+                prediction = float((await _predict(model, np.array([row]), "/predict"))[0])
+            
+            if CACHE_ENABLED:
+                prediction_cache.put(cache_key, prediction)
+        
+        bounds = None
+        if confidence is not None:
+            half_width = model.interval.half_width_row(row, confidence)
+            bounds = (max(prediction - half_width, 0.0), max(prediction + half_width, 0.0), confidence)
         
         # Ensure prediction is reasonable (positive value)
         if prediction < 0:
             prediction = 0.0
         
-        logger.info(f"Prediction made: {prediction:.2f} for input {input_data.dict()}")
+        if JOURNAL_DIR:
+            prediction_journal.record(row, prediction, model.version)
+        
+        # Scored by the candidate only after the response has been sent
+        if SHADOW_VERSION and shadow_scorer.sample():
+            background_tasks.add_task(
+                shadow_scorer.submit, np.array([row], dtype=np.float64), np.array([prediction]), model.version
+            )
         
-        return PredictionOutput(
+        if prediction_log_sampler.sample():
+            logger.info(
+                "Prediction made: %.2f for input %s", prediction, input_data,
+                extra={"model_version": model.version}
+            )
+        
+        if FAST_RESPONSE_ENABLED:
+            return FastJSONResponse(prediction_body(prediction, input_data, model.version, bounds))
+        
+        output = PredictionOutput(
             prediction=round(prediction, 2),
-            input_features=input_data
+            input_features=input_data,
+            model_version=model.version
         )
-        
+        if bounds is not None:
+            output.lower, output.upper = round_bound(bounds[0]), round_bound(bounds[1])
+            output.confidence = confidence
+        return output
+    
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Prediction error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
 
-@app.post("/batch-predict", response_model=BatchPredictionOutput)
-async def batch_predict_co2(input_data: BatchPredictionInput):
+@app.post("/batch-predict", response_model=BatchPredictionOutput, response_model_exclude_none=True)
+async def batch_predict_co2(
+    input_data: BatchPredictionInput,
+    background_tasks: BackgroundTasks,
+    version: Optional[str] = None,
+    confidence: Optional[float] = Query(None, gt=0, lt=1)
+):
     """
     Predict CO2 emissions for multiple car specifications
     
-    Accepts up to 100 prediction inputs at once.
+    Accepts up to 100 prediction inputs at once. Pass `?confidence=0.95`
+    to also get the OLS prediction interval bounds of every row.
     """
     
-    if model_pipeline is None:
-        raise HTTPException(status_code=503, detail="Model not loaded")
+    model = _resolve_model(version)
+    _check_interval_support(model, confidence)
     
     try:
         # Prepare input features as numpy array
@@ -215,47 +630,507 @@ async def batch_predict_co2(input_data: BatchPredictionInput):
             for item in input_data.predictions
         ])
         
-        # Make predictions
-        predictions = model_pipeline.predict(features)
+        metrics.BATCH_SIZE.observe(len(features), "/batch-predict")
+        _observe_drift(features)
+        
+        # Make predictions, scoring only the rows missing from the cache
+        if CACHE_ENABLED:
+            cache_keys = [prediction_cache.key(model.fingerprint, *row) for row in features]
+            cached = [prediction_cache.get(key) for key in cache_keys]
+            misses = [i for i, value in enumerate(cached) if value is None]
+            
+            predictions = np.array(cached, dtype=np.float64)
+            if misses:
+                scored = await _predict(model, features[misses], "/batch-predict")
+                predictions[misses] = scored
+                for i, value in zip(misses, scored.tolist()):
+                    prediction_cache.put(cache_keys[i], value)
+        else:
+            predictions = await _predict(model, features, "/batch-predict")
+        
+        bounds = None
+        if confidence is not None:
+            lower, upper = _prediction_bounds(model, features, predictions, confidence)
+            bounds = (lower, upper, confidence)
         
         # Ensure all predictions are reasonable (positive values)
         predictions = np.maximum(predictions, 0.0)
         
+        if JOURNAL_DIR:
+            prediction_journal.record(features, predictions, model.version)
+        if SHADOW_VERSION and shadow_scorer.sample():
+            background_tasks.add_task(shadow_scorer.submit, features, predictions, model.version)
+        
+        if prediction_log_sampler.sample():
+            logger.info(
+                "Batch prediction made: %d predictions", len(predictions),
+                extra={"model_version": model.version}
+            )
+        
+        if FAST_RESPONSE_ENABLED:
+            return FastJSONResponse(batch_body(predictions, model.version, bounds=bounds))
+        
         # Round predictions to 2 decimal places
         predictions = [round(pred, 2) for pred in predictions]
         
-        logger.info(f"Batch prediction made: {len(predictions)} predictions")
+        output = BatchPredictionOutput(
+            predictions=predictions,
+            count=len(predictions),
+            model_version=model.version
+        )
+        if bounds is not None:
+            output.lower = list(round_bounds(bounds[0]))
+            output.upper = list(round_bounds(bounds[1]))
+            output.confidence = confidence
+        return output
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Batch prediction error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Batch prediction failed: {str(e)}")
+
+class RequestStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse for bodies generated while the request is still being read
+    
+    Starlette's StreamingResponse listens for client disconnects by calling
+    receive() concurrently, which would swallow request body chunks. Here the
+    request stream itself reports disconnects, so the listener is skipped.
+    """
+    
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+def _format_validation_error(error: ValidationError) -> str:
+    """Flatten a pydantic ValidationError into a single line"""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc']) or 'input'}: {err['msg']}"
+        for err in error.errors()
+    )
+
+def _parse_stream_line(line: bytes):
+    """Parse one NDJSON line into a feature row, or return an error message"""
+    try:
+        item = PredictionInput.model_validate(json.loads(line))
+    except json.JSONDecodeError as e:
+        return None, f"Invalid JSON: {e.msg}"
+    except ValidationError as e:
+        return None, _format_validation_error(e)
+    
+    return [item.ENGINESIZE, item.CYLINDERS, item.FUELCONSUMPTION_COMB], None
+
+async def _score_stream_chunk(entries, model) -> bytes:
+    """Score the valid rows of a chunk and render every entry as NDJSON, in order"""
+    rows = [row for _, row, _ in entries if row is not None]
+    predictions = iter([])
+    if rows:
+        metrics.BATCH_SIZE.observe(len(rows), "/batch-predict/stream")
+        features = np.array(rows, dtype=np.float64)
+        _observe_drift(features)
+        try:
+            scored = await _predict(model, features, "/batch-predict/stream")
+        except HTTPException as e:
+            # The response has already started; report the rejection on each line
+            entries = [(line_no, None, error or e.detail) for line_no, _, error in entries]
+        else:
+            scored = np.maximum(scored, 0.0)
+            if JOURNAL_DIR:
+                prediction_journal.record(features, scored, model.version)
+            predictions = iter(np.round(scored, 2).tolist())
+    
+    out = []
+    for line_no, row, error in entries:
+        if row is None:
+            out.append(json.dumps({"line": line_no, "error": error}))
+        else:
+            out.append(json.dumps({"line": line_no, "prediction": next(predictions)}))
+    return ("\n".join(out) + "\n").encode()
+
+async def _stream_predictions(request: Request, model):
+    """
+    Incrementally read an NDJSON body and yield NDJSON results chunk by chunk.
+    
+    Only one chunk of rows and one partial line are held in memory at a time,
+    so memory use does not grow with the size of the request.
+    """
+    buffer = b""
+    entries = []
+    line_no = 0
+    processed = 0
+    # Set while skipping the remainder of an oversized line
+    discarding = False
+    
+    async for data in request.stream():
+        buffer += data
+        *lines, buffer = buffer.split(b"\n")
+        
+        for line in lines:
+            line_no += 1
+            if discarding:
+                discarding = False
+            elif len(line) > STREAM_MAX_LINE_BYTES:
+                entries.append((line_no, None, f"Line exceeds {STREAM_MAX_LINE_BYTES} bytes"))
+            elif line.strip():
+                row, error = _parse_stream_line(line)
+                entries.append((line_no, row, error))
+        
+        # Guard against a single unterminated line growing without bound
+        if len(buffer) > STREAM_MAX_LINE_BYTES:
+            if not discarding:
+                entries.append((line_no + 1, None, f"Line exceeds {STREAM_MAX_LINE_BYTES} bytes"))
+                discarding = True
+            buffer = b""
+        
+        if len(entries) >= STREAM_CHUNK_SIZE:
+            processed += len(entries)
+            yield await _score_stream_chunk(entries, model)
+            entries = []
+    
+    if buffer.strip() and not discarding and len(buffer) <= STREAM_MAX_LINE_BYTES:
+        line_no += 1
+        row, error = _parse_stream_line(buffer)
+        entries.append((line_no, row, error))
+    if entries:
+        processed += len(entries)
+        yield await _score_stream_chunk(entries, model)
+    
+    if prediction_log_sampler.sample():
+        logger.info(
+            "Streaming batch prediction made: %d lines", processed,
+            extra={"model_version": model.version}
+        )
+
+@app.post("/batch-predict/stream")
+async def stream_batch_predict_co2(request: Request, version: Optional[str] = None):
+    """
+    Predict CO2 emissions for an NDJSON stream of car specifications
+    
+    Each request line is a JSON object with the same fields as /predict.
+    Results are streamed back as NDJSON in input order, one object per
+    non-empty line: {"line": n, "prediction": p} or {"line": n, "error": msg}.
+    There is no limit on the number of lines. The whole stream is scored
+    by one model version, reported in the X-Model-Version header.
+    """
+    
+    model = _resolve_model(version)
+    
+    return RequestStreamingResponse(
+        _stream_predictions(request, model),
+        media_type="application/x-ndjson",
+        headers={"X-Model-Version": model.version}
+    )
+
+async def _score_feature_matrix(features: np.ndarray, model, route: str) -> np.ndarray:
+    """Validate a feature matrix with numpy masks and return rounded predictions"""
+    if len(features) > COLUMNAR_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {COLUMNAR_MAX_ROWS} rows")
+    
+    errors = validate_features(features)
+    if errors:
+        raise HTTPException(status_code=422, detail=errors)
+    
+    metrics.BATCH_SIZE.observe(len(features), route)
+    _observe_drift(features)
+    predictions = np.maximum(await _predict(model, features, route), 0.0)
+    if JOURNAL_DIR:
+        prediction_journal.record(features, predictions, model.version)
+    return np.round(predictions, 2)
+
+def bind_binary_listener():
+    """Bind the binary protocol socket once; the pre-fork master calls this before forking"""
+    global binary_listener
+    if BINARY_SOCKET_ENABLED and binary_listener is None:
+        binary_listener = bind_listener(BINARY_SOCKET_PATH, BINARY_SOCKET_HOST, BINARY_SOCKET_PORT)
+    return binary_listener
+
+async def _score_binary_frame(features: np.ndarray, version: Optional[str]):
+    """Score a binary protocol frame exactly like /batch-predict/binary"""
+    try:
+        model = _resolve_model(version)
+        predictions = await _score_feature_matrix(features, model, "binary-socket")
+    except HTTPException as e:
+        raise FrameError(e.status_code, e.detail)
+    return predictions, model.version
+
+binary_server = BinaryPredictionServer(
+    _score_binary_frame,
+    max_frame_bytes=COLUMNAR_MAX_ROWS * ROW_BYTES + 1024
+)
+
+@app.post("/batch-predict/columnar", response_model=BatchPredictionOutput, response_model_exclude_none=True)
+async def columnar_batch_predict_co2(input_data: ColumnarBatchInput, version: Optional[str] = None):
+    """
+    Predict CO2 emissions for a struct-of-arrays batch
+    
+    Each feature is sent as one array; all arrays must have the same length.
+    Range checks match /predict and are applied to whole columns at once.
+    """
+    
+    model = _resolve_model(version)
+    
+    try:
+        features = parse_columns(input_data.model_dump())
+    except BatchFormatError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    
+    try:
+        predictions = await _score_feature_matrix(features, model, "/batch-predict/columnar")
+        if prediction_log_sampler.sample():
+            logger.info(
+                "Columnar batch prediction made: %d predictions", len(predictions),
+                extra={"model_version": model.version}
+            )
+        
+        if FAST_RESPONSE_ENABLED:
+            return FastJSONResponse(batch_body(predictions, model.version, rounded=True))
         
         return BatchPredictionOutput(
-            predictions=predictions,
-            count=len(predictions)
+            predictions=predictions.tolist(),
+            count=len(predictions),
+            model_version=model.version
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Batch prediction error: {str(e)}")
+        logger.error(f"Columnar batch prediction error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Batch prediction failed: {str(e)}")
+
+@app.post("/batch-predict/binary")
+async def binary_batch_predict_co2(request: Request, version: Optional[str] = None):
+    """
+    Predict CO2 emissions for a packed binary batch
+    
+    The body is either a .npy file holding an (n, 3) little-endian float64
+    array, or raw little-endian float64 rows of
+    [ENGINESIZE, CYLINDERS, FUELCONSUMPTION_COMB]. Predictions are returned
+    as float64 in the same encoding as the request, with the serving model
+    version in the X-Model-Version header.
+    """
+    
+    model = _resolve_model(version)
+    
+    try:
+        features, media_type = parse_binary(await request.body())
+    except BatchFormatError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    
+    try:
+        predictions = await _score_feature_matrix(features, model, "/batch-predict/binary")
+        if prediction_log_sampler.sample():
+            logger.info(
+                "Binary batch prediction made: %d predictions", len(predictions),
+                extra={"model_version": model.version}
+            )
+        
+        return Response(
+            content=encode_binary(predictions, media_type),
+            media_type=media_type,
+            headers={
+                "X-Prediction-Count": str(len(predictions)),
+                "X-Model-Version": model.version
+            }
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Binary batch prediction error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Batch prediction failed: {str(e)}")
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus text exposition of request, latency and batch-size metrics"""
+    return PlainTextResponse(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.get("/microbatch-stats")
+async def get_microbatch_stats():
+    """Get batch size and queueing delay statistics for /predict micro-batching"""
+    return {
+        "enabled": MICROBATCH_ENABLED,
+        "max_batch_size": MICROBATCH_MAX_SIZE,
+        "max_wait_us": MICROBATCH_MAX_WAIT_US,
+        "stats": micro_batcher.stats.to_dict()
+    }
+
+@app.get("/executor-stats")
+async def get_executor_stats():
+    """Get model executor admission, queue depth and queueing delay statistics"""
+    return {
+        "reject_status": EXECUTOR_REJECT_STATUS,
+        "retry_after": EXECUTOR_RETRY_AFTER,
+        **model_executor.to_dict()
+    }
+
+@app.get("/shadow-stats")
+async def get_shadow_stats():
+    """
+    Compare a candidate model with the served one on sampled live requests
+    
+    Set SHADOW_VERSION to a loaded model version to enable shadow scoring.
+    For every (served, candidate) version pair: rows compared, mean, max
+    and RMS absolute disagreement in g/km, the mean signed difference
+    (candidate minus served) and a histogram of absolute differences.
+    Shadow work dropped under load is counted by reason. Statistics are
+    per worker process.
+    """
+    return {"enabled": bool(SHADOW_VERSION), **shadow_scorer.to_dict()}
+
+@app.get("/binary-socket-stats")
+async def get_binary_socket_stats():
+    """Get connection and frame counters of the internal binary protocol listener"""
+    if not BINARY_SOCKET_ENABLED:
+        return {"enabled": False}
+    return {"enabled": True, **binary_server.to_dict()}
+
+@app.get("/journal-stats")
+async def get_journal_stats():
+    """Get prediction journal write, rotation and drop counters (enable with JOURNAL_DIR)"""
+    if not JOURNAL_DIR:
+        return {"enabled": False}
+    return {"enabled": True, **prediction_journal.to_dict()}
+
+@app.get("/drift")
+async def get_drift():
+    """
+    Compare recent inputs with the default model's training distribution
+    
+    For every feature, over the sliding window and since startup: the live
+    mean and standard deviation, the z-shift of the mean in training
+    standard deviations, and the PSI of the binned distribution. PSI below
+    0.1 is reported as stable, up to 0.25 as moderate and above as
+    significant drift. Statistics are per worker process.
+    """
+    if not DRIFT_ENABLED:
+        return {"enabled": False}
+    return {"enabled": True, **drift_monitor.report()}
+
+@app.post("/what-if")
+async def what_if_surface(input_data: WhatIfInput, version: Optional[str] = None):
+    """
+    Predict CO2 emissions over a grid of variations of one car
+    
+    Each feature given a range is swept over `steps` evenly spaced values
+    from `min` to `max`; the others stay at their `base` value. Returns the
+    axis values and a 3D `predictions` array indexed
+    [ENGINESIZE][CYLINDERS][FUELCONSUMPTION_COMB], with fixed features as
+    axes of length 1. Grids over the point budget are downsampled, keeping
+    short axes whole and thinning long ones evenly (`downsampled` is then
+    true). Surfaces are cached per model version.
+    """
+    
+    model = _resolve_model(version)
+    
+    base = [input_data.base.ENGINESIZE, input_data.base.CYLINDERS, input_data.base.FUELCONSUMPTION_COMB]
+    ranges = {}
+    for name in ("ENGINESIZE", "CYLINDERS", "FUELCONSUMPTION_COMB"):
+        grid = getattr(input_data, name)
+        if grid is not None:
+            ranges[name] = (grid.min, grid.max, grid.steps)
+    max_points = min(input_data.max_points or WHATIF_MAX_POINTS, WHATIF_MAX_POINTS)
+    
+    cache_key = surface_key(model.fingerprint, base, ranges, max_points)
+    body = surface_cache.get(cache_key)
+    if body is None:
+        try:
+            axes, requested = surface_axes(base, ranges, max_points)
+        except GridError as e:
+            raise HTTPException(status_code=422, detail=e.args[0])
+        
+        shape = [len(axis) for axis in axes]
+        metrics.BATCH_SIZE.observe(int(np.prod(shape)), "/what-if")
+        if isinstance(model.predictor, LinearPredictor):
+            # A broadcast sum over three short axes: cheaper inline than a trip to the executor
+            started = time.perf_counter()
+            surface = evaluate_surface(model.predictor, axes)
+            metrics.PREDICT_SECONDS.observe(time.perf_counter() - started, "/what-if")
+        else:
+            # Pipelines score the grid on the executor, under its admission control.
+            # Grid rows are distinct by construction, so there is nothing to collapse.
+            surface = (await _predict(model, grid_rows(axes), "/what-if", dedup=False)).reshape(shape)
+        body = surface_body(surface, axes, requested)
+        surface_cache.put(cache_key, body)
+    
+    return FastJSONResponse({**body, "model_version": model.version})
+
+@app.get("/cache-stats")
+async def get_cache_stats():
+    """Get prediction and what-if surface cache hit/miss/eviction counters"""
+    return {
+        "enabled": CACHE_ENABLED,
+        **prediction_cache.to_dict(),
+        "what_if": surface_cache.to_dict()
+    }
+
+@app.get("/models")
+async def list_models():
+    """List the loaded model versions and the default one"""
+    return {
+        "default_version": model_registry.default_version,
+        "versions": [model.to_dict() for model in model_registry.versions().values()],
+        "last_reload": model_registry.last_reload,
+        "startup": startup_timing
+    }
+
+@app.post("/admin/reload-models")
+async def reload_models(x_admin_token: Optional[str] = Header(None)):
+    """
+    Rescan the model directory and hot-swap new or changed artifacts
+    
+    Artifacts are loaded and self-tested in the background; requests keep
+    being served by the current versions until the swap. Under the
+    pre-fork server the reload is handed to the master, which reloads once
+    and replaces every worker.
+    """
+    _check_admin_token(x_admin_token)
+    
+    if prefork.is_worker():
+        prefork.send_command("reload")
+        return {"status": "scheduled", "workers": prefork.worker_count()}
+    
+    try:
+        return await _reload_models()
+    except Exception as e:
+        logger.error(f"Model reload error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Model reload failed: {str(e)}")
+
+@app.post("/admin/default-model/{version}")
+async def set_default_model(version: str, x_admin_token: Optional[str] = Header(None)):
+    """Promote a loaded model version to serve requests that do not select one"""
+    _check_admin_token(x_admin_token)
+    
+    # Under the pre-fork server the master switches and replaces every worker
+    if prefork.is_worker():
+        if version not in model_registry.versions():
+            raise HTTPException(status_code=404, detail=f"Unknown model version: {version}")
+        prefork.send_command("set-default", version=version)
+        return {"default_version": version, "status": "scheduled", "workers": prefork.worker_count()}
+    
+    try:
+        model_registry.set_default(version)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown model version: {version}")
+    _sync_drift_reference()
+    
+    logger.info(f"Default model version set to {version}")
+    return {"default_version": model_registry.default_version}
+
 @app.get("/model-info")
-async def get_model_info():
+async def get_model_info(version: Optional[str] = None):
     """Get information about the loaded model"""
     
-    if model_pipeline is None:
-        raise HTTPException(status_code=503, detail="Model not loaded")
+    model = _resolve_model(version)
     
     try:
         # Get model information
-        scaler = model_pipeline.named_steps['scaler']
-        regressor = model_pipeline.named_steps['regressor']
-        
         return {
-            "model_type": "Linear Regression with StandardScaler",
-            "features": ["ENGINESIZE", "CYLINDERS", "FUELCONSUMPTION_COMB"],
-            "target": "CO2EMISSIONS",
-            "scaler_mean": scaler.mean_.tolist(),
-            "scaler_scale": scaler.scale_.tolist(),
-            "model_coefficients": regressor.coef_.tolist(),
-            "model_intercept": float(regressor.intercept_),
-            "feature_names": ["ENGINESIZE", "CYLINDERS", "FUELCONSUMPTION_COMB"]
+            **model.info,
+            "model_version": model.version,
+            "feature_names": model.info["features"],
+            "predictor": model.predictor.kind
         }
         
     except Exception as e:
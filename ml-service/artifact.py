@@ -0,0 +1,101 @@
+"""
+Compact, sklearn-free model artifacts
+
+training/train.py exports the fitted scaler statistics, coefficients and
+intercept as a small self-describing JSON file next to the pickle. Loading
+it needs only numpy, which keeps scikit-learn out of the process entirely
+and makes cold starts much faster than unpickling a Pipeline.
+"""
+
+import hashlib
+import json
+
+import numpy as np
+
+from intervals import PredictionInterval
+from predictor import FEATURE_NAMES, LinearPredictor
+
+COMPACT_FORMAT = "ecometer-linear-v1"
+
+
+class ArtifactError(ValueError):
+    """Raised when a compact artifact is malformed or fails verification"""
+
+
+def content_hash(params):
+    """
+    SHA-256 over the canonical JSON of every field except content_hash.
+
+    Must stay identical to compact_content_hash in training/train.py.
+    """
+    payload = {key: value for key, value in params.items() if key != "content_hash"}
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def load_compact_artifact(path):
+    """
+    Load and verify a compact artifact.
+
+    Returns (predictor, info, interval) where info mirrors the fields
+    reported by /model-info for pickled pipelines, and interval is a
+    PredictionInterval, or None for artifacts exported without the
+    statistics it needs.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        params = json.load(f)
+
+    if params.get("format") != COMPACT_FORMAT:
+        raise ArtifactError(f"Unsupported artifact format: {params.get('format')}")
+    if params.get("features") != FEATURE_NAMES:
+        raise ArtifactError(f"Unexpected feature order: {params.get('features')}")
+    if params.get("content_hash") != content_hash(params):
+        raise ArtifactError("Content hash mismatch")
+
+    predictor = LinearPredictor.from_stats(
+        np.asarray(params["scaler_mean"], dtype=np.float64),
+        np.asarray(params["scaler_scale"], dtype=np.float64),
+        np.asarray(params["coefficients"], dtype=np.float64),
+        params["intercept"],
+    )
+
+    # The exporter records the pipeline's own prediction for a sample row
+    sample = predictor.predict(np.array([params["sample_input"]], dtype=np.float64))[0]
+    if not np.isclose(sample, params["sample_prediction"]):
+        raise ArtifactError("Sample prediction does not match the exported pipeline")
+
+    info = {
+        "model_type": params["model_type"],
+        "features": params["features"],
+        "target": params["target"],
+        "scaler_mean": params["scaler_mean"],
+        "scaler_scale": params["scaler_scale"],
+        "model_coefficients": params["coefficients"],
+        "model_intercept": params["intercept"],
+        "content_hash": params["content_hash"],
+    }
+
+    interval = None
+    if params.get("interval") is not None:
+        try:
+            interval = PredictionInterval.from_dict(params["interval"])
+        except (KeyError, TypeError, ValueError) as e:
+            raise ArtifactError(f"Malformed interval statistics: {e}")
+        if interval.xtx_inv.shape != (len(FEATURE_NAMES), len(FEATURE_NAMES)):
+            raise ArtifactError(f"Unexpected xtx_inv shape: {interval.xtx_inv.shape}")
+        info["residual_std"] = float(np.sqrt(interval.residual_variance))
+        info["degrees_of_freedom"] = interval.degrees_of_freedom
+
+    bins = params.get("feature_bins")
+    if bins is not None:
+        # Training distribution over per-feature bins, used by the drift monitor
+        try:
+            valid = len(bins["edges"]) == len(FEATURE_NAMES) and all(
+                len(p) == len(e) + 1 for e, p in zip(bins["edges"], bins["proportions"])
+            )
+        except (KeyError, TypeError) as e:
+            raise ArtifactError(f"Malformed feature bins: {e}")
+        if not valid:
+            raise ArtifactError("Feature bins do not match the features")
+        info["feature_bins"] = bins
+    return predictor, info, interval
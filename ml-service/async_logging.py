@@ -0,0 +1,139 @@
+"""
+Non-blocking, sampled logging for the ML service
+
+Log records are handed to a queue and formatted and written by a background
+thread, so a log call on the request path costs an enqueue rather than
+string formatting plus a blocking write to stderr. Per-prediction logs are
+additionally sampled; warnings and errors are never sampled or dropped.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+
+# Attributes present on every LogRecord, excluded from JSON extras
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Render records as single-line JSON objects, including any extra fields"""
+
+    def format(self, record):
+        entry = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created))
+                    + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves message formatting to the listener thread.
+
+    The stock handler merges msg and args in the calling thread; here the
+    record is enqueued as-is. Below WARNING, records are dropped once
+    max_pending records are waiting, so a stalled writer cannot grow memory
+    without bound; warnings and errors are always enqueued.
+    """
+
+    def __init__(self, log_queue, max_pending=10000):
+        super().__init__(log_queue)
+        self.max_pending = max_pending
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        if record.levelno < logging.WARNING and self.queue.qsize() >= self.max_pending:
+            self.dropped += 1
+            return
+        self.queue.put_nowait(record)
+
+
+class LogSampler:
+    """Decide whether a per-request log line should be emitted"""
+
+    def __init__(self, rate=1.0):
+        self.rate = rate
+
+    def sample(self):
+        return self.rate >= 1.0 or (self.rate > 0.0 and random.random() < self.rate)
+
+
+_listener = None
+_queue_handler = None
+
+
+def configure_logging(level="INFO", json_lines=False, max_pending=10000):
+    """
+    Route all logging through a background writer thread.
+
+    Returns the queue handler so callers can report dropped records.
+    """
+    global _listener, _queue_handler
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    if json_lines:
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue, max_pending=max_pending)
+
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel(level)
+
+    if _listener is not None:
+        _listener.stop()
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    _queue_handler = queue_handler
+
+    return queue_handler
+
+
+def stop_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _restart_after_fork():
+    """
+    Give a forked child its own queue and writer thread.
+
+    Only the forking thread survives fork(), so the child inherits a
+    listener with no thread behind it and a queue whose lock may be held.
+    """
+    global _listener
+    if _listener is None:
+        return
+    log_queue = queue.SimpleQueue()
+    _queue_handler.queue = log_queue
+    _listener = logging.handlers.QueueListener(
+        log_queue, *_listener.handlers, respect_handler_level=True
+    )
+    _listener.start()
+
+
+atexit.register(stop_logging)
+os.register_at_fork(after_in_child=_restart_after_fork)
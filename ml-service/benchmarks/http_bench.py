@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+HTTP Load Test and Latency Benchmark for the ML Service
+
+Drives /predict and /batch-predict at configurable concurrency and batch
+sizes and reports throughput and p50/p95/p99 latency per scenario. By
+default the app runs in-process over an ASGI transport, so the numbers
+include routing, Pydantic validation and JSON serialization but no network.
+Use --uvicorn to benchmark a real local server, or --url for one that is
+already running.
+
+Usage (from ml-service/):
+    python benchmarks/http_bench.py --output bench.json
+    python benchmarks/http_bench.py --save-baseline benchmarks/baseline.json
+    python benchmarks/http_bench.py --baseline benchmarks/baseline.json --threshold 0.15
+
+With --baseline, the run exits with status 1 if any scenario's throughput
+drops, or its p99 latency rises, by more than --threshold.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+import numpy as np
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def random_input(rng):
+    """Random car specification within the accepted input ranges"""
+    return {
+        "ENGINESIZE": round(rng.uniform(1.0, 8.4), 1),
+        "CYLINDERS": rng.choice([3, 4, 5, 6, 8, 10, 12]),
+        "FUELCONSUMPTION_COMB": round(rng.uniform(4.0, 25.0), 1),
+    }
+
+
+def build_payloads(endpoint, batch_size, count, seed):
+    """Pre-generate varied request bodies so the prediction cache sees realistic traffic"""
+    rng = random.Random(seed)
+    if endpoint == "/predict":
+        return [random_input(rng) for _ in range(count)]
+    return [
+        {"predictions": [random_input(rng) for _ in range(batch_size)]}
+        for _ in range(count)
+    ]
+
+
+def percentiles(latencies):
+    values = np.asarray(latencies) * 1000
+    return {
+        "mean_ms": float(values.mean()),
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "max_ms": float(values.max()),
+    }
+
+
+async def run_scenario(client, endpoint, concurrency, batch_size, total_requests, warmup):
+    """Send total_requests requests from `concurrency` workers and collect latencies"""
+    payloads = build_payloads(endpoint, batch_size, 256, seed=concurrency * 1000 + batch_size)
+
+    for i in range(warmup):
+        await client.post(endpoint, json=payloads[i % len(payloads)])
+
+    latencies = []
+    errors = 0
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index, errors
+        while next_index < total_requests:
+            payload = payloads[next_index % len(payloads)]
+            next_index += 1
+            started = time.perf_counter()
+            try:
+                response = await client.post(endpoint, json=payload)
+                ok = response.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            if not ok:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    rows_per_request = 1 if endpoint == "/predict" else batch_size
+    return {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "batch_size": rows_per_request,
+        "requests": len(latencies),
+        "errors": errors,
+        "elapsed_s": elapsed,
+        "requests_per_s": len(latencies) / elapsed,
+        "rows_per_s": len(latencies) * rows_per_request / elapsed,
+        **percentiles(latencies),
+    }
+
+
+def scenario_key(result):
+    return f"{result['endpoint']}|c={result['concurrency']}|b={result['batch_size']}"
+
+
+def compare_to_baseline(results, baseline, threshold):
+    """Return a list of human-readable regressions against a saved baseline"""
+    previous = {scenario_key(r): r for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        key = scenario_key(result)
+        base = previous.get(key)
+        if base is None:
+            continue
+        if result["requests_per_s"] < base["requests_per_s"] * (1 - threshold):
+            regressions.append(
+                f"{key}: throughput {result['requests_per_s']:.1f} req/s "
+                f"vs baseline {base['requests_per_s']:.1f} req/s"
+            )
+        if result["p99_ms"] > base["p99_ms"] * (1 + threshold):
+            regressions.append(
+                f"{key}: p99 {result['p99_ms']:.2f} ms vs baseline {base['p99_ms']:.2f} ms"
+            )
+        if result["errors"] > base["errors"]:
+            regressions.append(f"{key}: {result['errors']} errors vs baseline {base['errors']}")
+    return regressions
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_uvicorn(timeout=30.0):
+    """Launch the service under uvicorn on a free local port and wait for /health"""
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning", "--no-access-log"],
+        cwd=SERVICE_DIR,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"{url}/health", timeout=1.0).status_code == 200:
+                return process, url
+        except httpx.HTTPError:
+            pass
+        if process.poll() is not None:
+            break
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("uvicorn did not become healthy in time")
+
+
+async def run_benchmarks(args):
+    scenarios = []
+    for endpoint in args.endpoints:
+        batch_sizes = [1] if endpoint == "/predict" else args.batch_sizes
+        for concurrency in args.concurrency:
+            for batch_size in batch_sizes:
+                scenarios.append((endpoint, concurrency, batch_size))
+
+    process = None
+    app = None
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=60.0)
+        mode, target = "url", args.url
+    elif args.uvicorn:
+        process, url = start_uvicorn()
+        limits = httpx.Limits(max_connections=max(args.concurrency))
+        client = httpx.AsyncClient(base_url=url, timeout=60.0, limits=limits)
+        mode, target = "uvicorn", url
+    else:
+        sys.path.insert(0, SERVICE_DIR)
+        os.chdir(SERVICE_DIR)
+        from app import app
+        await app.router.startup()
+        transport = httpx.ASGITransport(app=app)
+        client = httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60.0)
+        mode, target = "asgi", "in-process"
+
+    results = []
+    try:
+        for endpoint, concurrency, batch_size in scenarios:
+            result = await run_scenario(
+                client, endpoint, concurrency, batch_size, args.requests, args.warmup
+            )
+            results.append(result)
+            print(
+                f"{endpoint:16s} c={concurrency:<4d} b={result['batch_size']:<5d} "
+                f"{result['requests_per_s']:9.1f} req/s {result['rows_per_s']:11.1f} rows/s  "
+                f"p50 {result['p50_ms']:7.2f} ms  p95 {result['p95_ms']:7.2f} ms  "
+                f"p99 {result['p99_ms']:7.2f} ms  errors {result['errors']}"
+            )
+    finally:
+        await client.aclose()
+        if app is not None:
+            await app.router.shutdown()
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    return {
+        "mode": mode,
+        "target": target,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "requests_per_scenario": args.requests,
+        "results": results,
+    }
+
+
+def parse_int_list(value):
+    return [int(part) for part in value.split(",") if part]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ML service over HTTP")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", help="Benchmark an already running service at this base URL")
+    target.add_argument("--uvicorn", action="store_true", help="Launch a local uvicorn server")
+    parser.add_argument("--endpoints", default="/predict,/batch-predict",
+                        type=lambda v: [e if e.startswith("/") else f"/{e}" for e in v.split(",")])
+    parser.add_argument("--concurrency", default="1,16,64", type=parse_int_list)
+    parser.add_argument("--batch-sizes", default="10,100", type=parse_int_list)
+    parser.add_argument("--requests", default=2000, type=int, help="Requests per scenario")
+    parser.add_argument("--warmup", default=50, type=int, help="Warm-up requests per scenario")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--save-baseline", help="Write the results as a new baseline")
+    parser.add_argument("--baseline", help="Compare against this baseline JSON")
+    parser.add_argument("--threshold", default=0.10, type=float,
+                        help="Allowed relative regression before failing (default 0.10)")
+    args = parser.parse_args()
+
+    # The in-process mode changes directory to ml-service/ to find the models
+    for name in ("output", "save_baseline", "baseline"):
+        if getattr(args, name):
+            setattr(args, name, os.path.abspath(getattr(args, name)))
+
+    # Keep per-request client logging out of the results
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    report = asyncio.run(run_benchmarks(args))
+
+    for path in filter(None, [args.output, args.save_baseline]):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {path}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("mode") != report["mode"]:
+            print(f"\nWarning: baseline was recorded in {baseline.get('mode')} mode, "
+                  f"this run used {report['mode']} mode")
+        regressions = compare_to_baseline(report["results"], baseline, args.threshold)
+        if regressions:
+            print(f"\nRegressions beyond {args.threshold:.0%} of baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.threshold:.0%} of baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Inference Microbenchmark for the CO2 Model
+
+Times the model step alone, with no HTTP, across:
+
+- batch sizes (1 to 1M rows by default)
+- input types: numpy ndarray or pandas DataFrame, float64 or float32
+- execution paths: the sklearn pipeline's predict() and the fused
+  LinearPredictor (a single numpy dot product, as served by the API)
+
+Each case is warmed up, then timed over repeated calls until --repeats
+calls or --max-seconds have passed (at least --min-repeats). Reported per
+case: rows/sec and ns/row from the median call, mean/min/max/stdev/p95 of
+the call time, and peak memory allocated during one call (via tracemalloc,
+measured in a separate untimed call). Input construction is not timed.
+
+Usage (from ml-service/):
+    python benchmarks/inference_bench.py
+    python benchmarks/inference_bench.py --batch-sizes 1,100,10000 --paths fused --output inference.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+
+from predictor import FEATURE_NAMES, LinearPredictor
+
+DEFAULT_MODEL = os.path.join(SERVICE_DIR, "..", "model_artifacts", "fuel_co2_pipeline_v1.pkl")
+DEFAULT_BATCH_SIZES = "1,10,100,1000,10000,100000,1000000"
+INPUT_TYPES = ("ndarray-float64", "ndarray-float32", "dataframe-float64", "dataframe-float32")
+PATHS = ("sklearn", "fused")
+
+
+def make_features(rows, seed=0):
+    """Random car specifications within the accepted input ranges"""
+    rng = np.random.default_rng(seed)
+    return np.column_stack([
+        np.round(rng.uniform(1.0, 8.4, rows), 1),
+        rng.choice([3, 4, 5, 6, 8, 10, 12], rows).astype(np.float64),
+        np.round(rng.uniform(4.0, 25.0, rows), 1),
+    ])
+
+
+def make_input(features, input_type):
+    container, dtype = input_type.split("-")
+    values = features.astype(dtype)
+    if container == "dataframe":
+        return pd.DataFrame(values, columns=FEATURE_NAMES)
+    return values
+
+
+def predict_fn(path, pipeline, fused, input_type):
+    """Call used for a path; DataFrames are unwrapped for the fused kernel, as a server would"""
+    if path == "sklearn":
+        return pipeline.predict
+    if input_type.startswith("dataframe"):
+        return lambda frame: fused.predict(frame.to_numpy())
+    return fused.predict
+
+
+def time_calls(fn, data, warmup, min_repeats, max_repeats, max_seconds):
+    for _ in range(warmup):
+        fn(data)
+
+    timings = []
+    deadline = time.perf_counter() + max_seconds
+    while len(timings) < max_repeats and (len(timings) < min_repeats or time.perf_counter() < deadline):
+        started = time.perf_counter()
+        fn(data)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def peak_memory(fn, data):
+    """Peak bytes allocated by one call"""
+    tracemalloc.start()
+    try:
+        fn(data)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_case(path, input_type, rows, fn, data, reference, args):
+    result = fn(data)
+    max_error = float(np.max(np.abs(np.asarray(result, dtype=np.float64) - reference)))
+
+    timings = time_calls(fn, data, args.warmup, args.min_repeats, args.repeats, args.max_seconds)
+    median = statistics.median(timings)
+    peak = peak_memory(fn, data)
+
+    return {
+        "path": path,
+        "input": input_type,
+        "rows": rows,
+        "repeats": len(timings),
+        "median_s": median,
+        "mean_s": statistics.fmean(timings),
+        "min_s": min(timings),
+        "max_s": max(timings),
+        "stdev_s": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        "p95_s": float(np.percentile(timings, 95)),
+        "rows_per_s": rows / median,
+        "ns_per_row": median / rows * 1e9,
+        "peak_bytes": peak,
+        "peak_bytes_per_row": peak / rows,
+        "max_abs_error": max_error,
+    }
+
+
+def summarize(results):
+    """Fastest path and input type per batch size"""
+    best = {}
+    for result in results:
+        current = best.get(result["rows"])
+        if current is None or result["ns_per_row"] < current["ns_per_row"]:
+            best[result["rows"]] = result
+    return [
+        {"rows": rows, "path": r["path"], "input": r["input"], "ns_per_row": r["ns_per_row"]}
+        for rows, r in sorted(best.items())
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmark model inference paths")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="Pickled sklearn pipeline")
+    parser.add_argument("--batch-sizes", default=DEFAULT_BATCH_SIZES,
+                        type=lambda v: [int(part) for part in v.split(",") if part])
+    parser.add_argument("--inputs", default=",".join(INPUT_TYPES),
+                        type=lambda v: [part for part in v.split(",") if part])
+    parser.add_argument("--paths", default=",".join(PATHS),
+                        type=lambda v: [part for part in v.split(",") if part])
+    parser.add_argument("--warmup", default=3, type=int, help="Untimed calls per case")
+    parser.add_argument("--min-repeats", default=5, type=int)
+    parser.add_argument("--repeats", default=1000, type=int, help="Maximum timed calls per case")
+    parser.add_argument("--max-seconds", default=1.0, type=float,
+                        help="Time budget per case once --min-repeats is reached")
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    for name in args.inputs:
+        if name not in INPUT_TYPES:
+            parser.error(f"Unknown input type {name}; choose from {', '.join(INPUT_TYPES)}")
+    for name in args.paths:
+        if name not in PATHS:
+            parser.error(f"Unknown path {name}; choose from {', '.join(PATHS)}")
+
+    # The pipeline was fitted on a DataFrame; ndarray inputs warn on every call
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+    pipeline = joblib.load(args.model)
+    fused = LinearPredictor.from_pipeline(pipeline)
+    if fused is None and "fused" in args.paths:
+        print("Model is not a plain linear pipeline; skipping the fused path")
+        args.paths = [path for path in args.paths if path != "fused"]
+
+    all_features = make_features(max(args.batch_sizes))
+    results = []
+    print(f"{'path':8s} {'input':18s} {'rows':>8s} {'rows/s':>14s} {'ns/row':>10s} "
+          f"{'p95 ms':>10s} {'peak MB':>9s} {'repeats':>8s}")
+    for rows in args.batch_sizes:
+        features = all_features[:rows]
+        # Reference: the pipeline on the float64 array
+        reference = pipeline.predict(features)
+        for input_type in args.inputs:
+            data = make_input(features, input_type)
+            for path in args.paths:
+                fn = predict_fn(path, pipeline, fused, input_type)
+                result = run_case(path, input_type, rows, fn, data, reference, args)
+                results.append(result)
+                print(f"{path:8s} {input_type:18s} {rows:>8d} {result['rows_per_s']:>14,.0f} "
+                      f"{result['ns_per_row']:>10.1f} {result['p95_s'] * 1000:>10.3f} "
+                      f"{result['peak_bytes'] / 1e6:>9.2f} {result['repeats']:>8d}")
+
+    summary = summarize(results)
+    print("\nFastest per batch size:")
+    for entry in summary:
+        print(f"  {entry['rows']:>8d} rows: {entry['path']} on {entry['input']} "
+              f"({entry['ns_per_row']:.1f} ns/row)")
+
+    if args.output:
+        report = {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "sklearn": sklearn.__version__,
+            "platform": platform.platform(),
+            "model": os.path.abspath(args.model),
+            "settings": {
+                "warmup": args.warmup,
+                "min_repeats": args.min_repeats,
+                "max_repeats": args.repeats,
+                "max_seconds": args.max_seconds,
+            },
+            "results": results,
+            "fastest": summary,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Prediction Interval Overhead Benchmark
+
+Times the fused predictor alone and together with the prediction interval
+half-widths, as /batch-predict computes them with ?confidence=, and
+reports the extra cost per row. The scalar single-row path used by
+/predict is timed separately. Timing uses the same warm-up and repeat loop
+as inference_bench.py.
+
+Usage (from ml-service/):
+    python benchmarks/interval_bench.py
+    python benchmarks/interval_bench.py --batch-sizes 1,100 --confidence 0.99 --output intervals.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+
+import numpy as np
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from artifact import load_compact_artifact
+from inference_bench import make_features, time_calls
+
+DEFAULT_ARTIFACT = os.path.join(SERVICE_DIR, "..", "model_artifacts", "fuel_co2_pipeline_v1.json")
+DEFAULT_BATCH_SIZES = "1,10,100,1000,10000,100000,1000000"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the cost of prediction intervals")
+    parser.add_argument("--artifact", default=DEFAULT_ARTIFACT, help="Compact JSON artifact")
+    parser.add_argument("--batch-sizes", default=DEFAULT_BATCH_SIZES,
+                        type=lambda v: [int(part) for part in v.split(",") if part])
+    parser.add_argument("--confidence", default=0.95, type=float)
+    parser.add_argument("--warmup", default=3, type=int, help="Untimed calls per case")
+    parser.add_argument("--min-repeats", default=5, type=int)
+    parser.add_argument("--repeats", default=1000, type=int, help="Maximum timed calls per case")
+    parser.add_argument("--max-seconds", default=1.0, type=float,
+                        help="Time budget per case once --min-repeats is reached")
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    predictor, _, interval = load_compact_artifact(args.artifact)
+    if interval is None:
+        parser.error(f"{args.artifact} has no interval statistics; re-export it with training/train.py")
+
+    def predict_only(features):
+        return predictor.predict(features)
+
+    def predict_with_interval(features):
+        predictions = predictor.predict(features)
+        half_width = interval.half_width(features, args.confidence)
+        return predictions - half_width, predictions + half_width
+
+    row = make_features(1)[0].tolist()
+    row_calls = time_calls(lambda r: interval.half_width_row(r, args.confidence), row,
+                           args.warmup, args.min_repeats, args.repeats, args.max_seconds)
+    row_ns = statistics.median(row_calls) * 1e9
+    print(f"Single-row interval (/predict path): {row_ns:.1f} ns\n")
+
+    all_features = make_features(max(args.batch_sizes))
+    results = []
+    print(f"{'rows':>8s} {'predict ns/row':>15s} {'+interval ns/row':>17s} "
+          f"{'extra ns/row':>13s} {'overhead':>9s}")
+    for rows in args.batch_sizes:
+        features = all_features[:rows]
+        timings = {}
+        for name, fn in [("predict", predict_only), ("interval", predict_with_interval)]:
+            calls = time_calls(fn, features, args.warmup, args.min_repeats, args.repeats, args.max_seconds)
+            timings[name] = statistics.median(calls)
+
+        result = {
+            "rows": rows,
+            "predict_ns_per_row": timings["predict"] / rows * 1e9,
+            "interval_ns_per_row": timings["interval"] / rows * 1e9,
+            "extra_ns_per_row": (timings["interval"] - timings["predict"]) / rows * 1e9,
+            "overhead_ratio": timings["interval"] / timings["predict"],
+        }
+        results.append(result)
+        print(f"{rows:>8d} {result['predict_ns_per_row']:>15.1f} {result['interval_ns_per_row']:>17.1f} "
+              f"{result['extra_ns_per_row']:>13.1f} {result['overhead_ratio']:>8.2f}x")
+
+    if args.output:
+        report = {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "artifact": os.path.abspath(args.artifact),
+            "confidence": args.confidence,
+            "single_row_interval_ns": row_ns,
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
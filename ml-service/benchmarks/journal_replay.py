@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Prediction Journal Replay
+
+Rescores the traffic recorded by the service's prediction journal
+(JOURNAL_DIR) with any model artifact and compares the new predictions
+with the ones that were served. Segments are memory-mapped with numpy, so
+the features are scored straight from the page cache without parsing;
+each segment (or --batch-size slice of one) is a single predict call.
+
+Reported: records, time span and versions of the journal; map and
+predict time with rows/sec; and the delta between the rescored and the
+recorded predictions (rescored floored at zero, as the service serves
+them): mean, max, RMS and percentiles of the absolute delta, overall and
+per recorded model version. Replaying with the artifact that served the
+traffic should give deltas of zero.
+
+Usage (from ml-service/):
+    python benchmarks/journal_replay.py /var/lib/ecometer/journal
+    python benchmarks/journal_replay.py journal --artifact ../model_artifacts/fuel_co2_pipeline_v2.pkl --output replay.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+
+from journal import RECORD_DTYPE, open_segment, segment_paths
+from registry import load_version
+
+DEFAULT_ARTIFACT = os.path.join(SERVICE_DIR, "..", "model_artifacts", "fuel_co2_pipeline_v1.json")
+PERCENTILES = (50, 90, 95, 99, 99.9)
+
+
+def delta_summary(deltas):
+    abs_deltas = np.abs(deltas)
+    return {
+        "rows": int(len(deltas)),
+        "mean_abs_delta": float(abs_deltas.mean()),
+        "max_abs_delta": float(abs_deltas.max()),
+        "mean_delta": float(deltas.mean()),
+        "rmse_delta": float(np.sqrt(np.mean(deltas * deltas))),
+        "abs_delta_percentiles": {
+            f"p{p:g}": float(v) for p, v in zip(PERCENTILES, np.percentile(abs_deltas, PERCENTILES))
+        },
+    }
+
+
+def replay(paths, predictor, batch_size=0):
+    """Rescore every segment; returns (deltas, recorded versions, timing dict)"""
+    deltas, versions = [], []
+    map_seconds = predict_seconds = 0.0
+    rows = 0
+    first, last = np.inf, -np.inf
+
+    for path in paths:
+        started = time.perf_counter()
+        records = open_segment(path)
+        map_seconds += time.perf_counter() - started
+        if len(records) == 0:
+            continue
+
+        step = batch_size or len(records)
+        for start in range(0, len(records), step):
+            chunk = records[start:start + step]
+            # A strided view into the mapping; one gather copy into a C-contiguous matrix
+            features = np.ascontiguousarray(chunk["features"])
+            started = time.perf_counter()
+            predictions = predictor.predict(features)
+            predict_seconds += time.perf_counter() - started
+            deltas.append(np.maximum(predictions, 0.0) - chunk["prediction"])
+
+        rows += len(records)
+        versions.append(np.asarray(records["model_version"]))
+        first = min(first, float(records["timestamp"].min()))
+        last = max(last, float(records["timestamp"].max()))
+
+    timing = {
+        "rows": rows,
+        "map_seconds": map_seconds,
+        "predict_seconds": predict_seconds,
+        "rows_per_second": rows / predict_seconds if predict_seconds else 0.0,
+        "first_timestamp": first if rows else None,
+        "last_timestamp": last if rows else None,
+    }
+    if not rows:
+        return np.empty(0), np.empty(0, dtype="S16"), timing
+    return np.concatenate(deltas), np.concatenate(versions), timing
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a prediction journal against a model artifact")
+    parser.add_argument("journal", help="Journal directory (the service's JOURNAL_DIR) or one segment file")
+    parser.add_argument("--artifact", default=DEFAULT_ARTIFACT, help="Compact .json or pickled .pkl artifact")
+    parser.add_argument("--batch-size", default=0, type=int,
+                        help="Rows per predict call; 0 scores each segment in one call")
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    paths = [args.journal] if os.path.isfile(args.journal) else segment_paths(args.journal)
+    if not paths:
+        parser.error(f"No journal segments in {args.journal}")
+
+    model = load_version("replay", args.artifact)
+    print(f"Artifact: {args.artifact} ({model.predictor.kind}, fingerprint {model.fingerprint})")
+
+    started = time.perf_counter()
+    deltas, versions, timing = replay(paths, model.predictor, args.batch_size)
+    total_seconds = time.perf_counter() - started
+    if timing["rows"] == 0:
+        parser.error("The journal holds no records")
+
+    size = sum(os.path.getsize(path) for path in paths)
+    print(f"Segments: {len(paths)}, records: {timing['rows']}, {size / 1e6:.1f} MB "
+          f"({RECORD_DTYPE.itemsize} bytes/record)")
+    print(f"Time span: {timing['last_timestamp'] - timing['first_timestamp']:.1f} s of traffic")
+    print(f"Map: {timing['map_seconds'] * 1000:.1f} ms, predict: {timing['predict_seconds'] * 1000:.1f} ms, "
+          f"total: {total_seconds * 1000:.1f} ms")
+    print(f"Throughput: {timing['rows_per_second']:,.0f} rows/s predict, "
+          f"{timing['rows'] / total_seconds:,.0f} rows/s end to end, {size / total_seconds / 1e6:.0f} MB/s\n")
+
+    overall = delta_summary(deltas)
+    by_version = {}
+    for version in np.unique(versions):
+        by_version[version.decode("utf-8", "replace")] = delta_summary(deltas[versions == version])
+
+    print(f"{'recorded version':>18s} {'rows':>10s} {'mean |d|':>10s} {'max |d|':>10s} "
+          f"{'mean d':>10s} {'p99 |d|':>10s}")
+    for name, summary in [*by_version.items(), ("all", overall)]:
+        print(f"{name:>18s} {summary['rows']:>10d} {summary['mean_abs_delta']:>10.4f} "
+              f"{summary['max_abs_delta']:>10.4f} {summary['mean_delta']:>10.4f} "
+              f"{summary['abs_delta_percentiles']['p99']:>10.4f}")
+
+    if args.output:
+        report = {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "artifact": os.path.abspath(args.artifact),
+            "fingerprint": model.fingerprint,
+            "segments": len(paths),
+            "bytes": size,
+            "total_seconds": total_seconds,
+            **timing,
+            "deltas": overall,
+            "deltas_by_version": by_version,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Response Serialization Benchmark for the ML Service
+
+Measures the cost of turning a prediction into response bytes, with the
+model step excluded, for /predict and for a 100-row /batch-predict:
+
+- default: build the Pydantic output model, let FastAPI revalidate it
+  against response_model, and render it with JSONResponse (stdlib json)
+- fast:    the FAST_RESPONSE_ENABLED path, a prevalidated dict with
+  np.round-ed arrays rendered by FastJSONResponse
+
+Both paths are checked to produce the same JSON document before timing.
+
+Usage (from ml-service/):
+    python benchmarks/serialization_bench.py
+    python benchmarks/serialization_bench.py --rows 100 --repeats 20000 --output serialization.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+
+import fast_response
+from app import (
+    BatchPredictionOutput,
+    PredictionInput,
+    PredictionOutput,
+    app,
+)
+
+
+def response_field(path):
+    return next(route.response_field for route in app.routes if getattr(route, "path", None) == path)
+
+
+def _serialize(field, output):
+    # serialize_response is a coroutine; drive it without an event loop
+    coroutine = serialize_response(field=field, response_content=output)
+    try:
+        coroutine.send(None)
+    except StopIteration as done:
+        return done.value
+    raise RuntimeError("serialize_response unexpectedly suspended")
+
+
+def default_predict(field, prediction, input_data):
+    output = PredictionOutput(
+        prediction=round(prediction, 2), input_features=input_data, model_version="v1"
+    )
+    return JSONResponse(_serialize(field, output)).body
+
+
+def fast_predict(prediction, input_data):
+    return fast_response.FastJSONResponse(
+        fast_response.prediction_body(prediction, input_data, "v1")
+    ).body
+
+
+def default_batch(field, predictions):
+    output = BatchPredictionOutput(
+        predictions=[round(pred, 2) for pred in predictions],
+        count=len(predictions),
+        model_version="v1",
+    )
+    return JSONResponse(_serialize(field, output)).body
+
+
+def fast_batch(predictions):
+    return fast_response.FastJSONResponse(fast_response.batch_body(predictions, "v1")).body
+
+
+def time_per_call(fn, repeats, warmup):
+    for _ in range(warmup):
+        fn()
+    samples = []
+    # Several rounds so one noisy round does not dominate the result
+    rounds = 5
+    per_round = max(1, repeats // rounds)
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(per_round):
+            fn()
+        samples.append((time.perf_counter() - started) / per_round)
+    return min(samples)
+
+
+def run(rows, repeats, warmup, seed=0):
+    rng = np.random.default_rng(seed)
+    input_data = PredictionInput(ENGINESIZE=3.5, CYLINDERS=6, FUELCONSUMPTION_COMB=10.0)
+    prediction = 244.71893
+    predictions = np.maximum(rng.uniform(100.0, 500.0, rows), 0.0)
+
+    predict_field = response_field("/predict")
+    batch_field = response_field("/batch-predict")
+
+    scenarios = {
+        "predict": (
+            lambda: default_predict(predict_field, prediction, input_data),
+            lambda: fast_predict(prediction, input_data),
+            1,
+        ),
+        f"batch_{rows}": (
+            lambda: default_batch(batch_field, predictions),
+            lambda: fast_batch(predictions),
+            rows,
+        ),
+    }
+
+    results = []
+    for name, (default_fn, fast_fn, row_count) in scenarios.items():
+        if json.loads(default_fn()) != json.loads(fast_fn()):
+            raise AssertionError(f"{name}: fast path response differs from the default path")
+
+        default_s = time_per_call(default_fn, repeats, warmup)
+        fast_s = time_per_call(fast_fn, repeats, warmup)
+        results.append({
+            "scenario": name,
+            "rows": row_count,
+            "default_us": default_s * 1e6,
+            "fast_us": fast_s * 1e6,
+            "saved_us": (default_s - fast_s) * 1e6,
+            "speedup": default_s / fast_s,
+            "response_bytes": len(fast_fn()),
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark response serialization paths")
+    parser.add_argument("--rows", default=100, type=int, help="Rows in the batch scenario")
+    parser.add_argument("--repeats", default=10000, type=int, help="Timed calls per path")
+    parser.add_argument("--warmup", default=500, type=int, help="Untimed calls per path")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = run(args.rows, args.repeats, args.warmup)
+
+    print(f"Encoder: {fast_response.ENCODER}")
+    for result in results:
+        print(
+            f"{result['scenario']:12s} default {result['default_us']:8.1f} us  "
+            f"fast {result['fast_us']:7.1f} us  saved {result['saved_us']:8.1f} us/request  "
+            f"({result['speedup']:.1f}x, {result['response_bytes']} bytes)"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"encoder": fast_response.ENCODER, "results": results}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
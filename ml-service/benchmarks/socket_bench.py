@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Binary Socket Protocol vs HTTP Benchmark
+
+Launches the service under uvicorn with the internal binary protocol
+enabled (see binary_server.py) and drives, at each concurrency level:
+
+- HTTP /predict with one JSON row per request (what the Node backend sends)
+- the binary protocol with one packed row per frame
+
+and, for every --batch-sizes entry, HTTP /batch-predict/binary against
+binary frames of the same number of rows. Each HTTP worker reuses one
+keep-alive connection and each socket worker one socket connection, so
+the numbers compare per-call protocol cost, not connection setup. Reports
+throughput and p50/p95/p99 latency per scenario, plus the speedup of the
+socket over HTTP.
+
+Usage (from ml-service/):
+    python benchmarks/socket_bench.py
+    python benchmarks/socket_bench.py --tcp --concurrency 1,16 --batch-sizes 100 --output socket.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+import httpx
+import numpy as np
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from binary_server import RESPONSE_HEADER, decode_response, encode_request
+from http_bench import free_port, percentiles, random_input, start_uvicorn
+
+FEATURE_ORDER = ("ENGINESIZE", "CYLINDERS", "FUELCONSUMPTION_COMB")
+
+
+def build_rows(batch_size, count, seed):
+    """Pre-generated batches of random rows, as (n, 3) float64 matrices"""
+    rng = random.Random(seed)
+    return [
+        np.array([[spec[name] for name in FEATURE_ORDER] for spec in (random_input(rng) for _ in range(batch_size))],
+                 dtype=np.float64)
+        for _ in range(count)
+    ]
+
+
+async def open_socket(address):
+    if isinstance(address, str):
+        return await asyncio.open_unix_connection(address)
+    return await asyncio.open_connection(*address)
+
+
+async def run_scenario(call, connect, concurrency, total_requests, warmup):
+    """Issue total_requests calls from `concurrency` workers, each with its own connection"""
+    latencies = []
+    errors = 0
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index, errors
+        connection = await connect()
+        try:
+            for i in range(warmup):
+                await call(connection, i)
+            while next_index < total_requests:
+                index = next_index
+                next_index += 1
+                started = time.perf_counter()
+                try:
+                    ok = await call(connection, index)
+                except (httpx.HTTPError, ConnectionError, asyncio.IncompleteReadError):
+                    ok = False
+                latencies.append(time.perf_counter() - started)
+                if not ok:
+                    errors += 1
+        finally:
+            if isinstance(connection, httpx.AsyncClient):
+                await connection.aclose()
+            else:
+                connection[1].close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "elapsed_s": elapsed,
+        "requests_per_s": len(latencies) / elapsed,
+        **percentiles(latencies),
+    }
+
+
+async def run_benchmarks(args, url, address):
+    results = []
+    for batch_size in [1] + args.batch_sizes:
+        batches = build_rows(batch_size, 256, seed=batch_size)
+        frames = [encode_request(rows) for rows in batches]
+
+        if batch_size == 1:
+            http_name = "/predict"
+            bodies = [dict(zip(FEATURE_ORDER, rows[0].tolist())) for rows in batches]
+
+            async def http_call(client, i):
+                return (await client.post("/predict", json=bodies[i % len(bodies)])).status_code == 200
+        else:
+            http_name = "/batch-predict/binary"
+            bodies = [rows.tobytes() for rows in batches]
+
+            async def http_call(client, i):
+                response = await client.post("/batch-predict/binary", content=bodies[i % len(bodies)],
+                                             headers={"Content-Type": "application/octet-stream"})
+                return response.status_code == 200
+
+        async def socket_call(connection, i):
+            reader, writer = connection
+            writer.write(frames[i % len(frames)])
+            await writer.drain()
+            length, status = RESPONSE_HEADER.unpack(await reader.readexactly(RESPONSE_HEADER.size))
+            decode_response(status, await reader.readexactly(length))
+            return True
+
+        async def connect_http():
+            return httpx.AsyncClient(base_url=url, timeout=60.0)
+
+        async def connect_socket():
+            return await open_socket(address)
+
+        for concurrency in args.concurrency:
+            pair = {}
+            for name, call, connect in [(http_name, http_call, connect_http),
+                                        ("socket", socket_call, connect_socket)]:
+                result = await run_scenario(call, connect, concurrency, args.requests, args.warmup)
+                result.update({"transport": name, "concurrency": concurrency, "batch_size": batch_size})
+                results.append(result)
+                pair[name] = result
+                print(
+                    f"{name:22s} c={concurrency:<4d} b={batch_size:<5d} "
+                    f"{result['requests_per_s']:9.1f} req/s  p50 {result['p50_ms']:7.3f} ms  "
+                    f"p95 {result['p95_ms']:7.3f} ms  p99 {result['p99_ms']:7.3f} ms  errors {result['errors']}"
+                )
+            speedup = pair["socket"]["requests_per_s"] / pair[http_name]["requests_per_s"]
+            pair["socket"]["speedup_vs_http"] = speedup
+            print(f"{'':22s} socket speedup: {speedup:.2f}x throughput, "
+                  f"p50 {pair[http_name]['p50_ms'] / pair['socket']['p50_ms']:.2f}x lower\n")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the binary socket protocol against HTTP")
+    parser.add_argument("--tcp", action="store_true", help="Use localhost TCP instead of a Unix socket")
+    parser.add_argument("--concurrency", default="1,16,64",
+                        type=lambda v: [int(part) for part in v.split(",") if part])
+    parser.add_argument("--batch-sizes", default="100",
+                        type=lambda v: [int(part) for part in v.split(",") if part],
+                        help="Batch sizes compared with /batch-predict/binary, besides single rows")
+    parser.add_argument("--requests", default=2000, type=int, help="Requests per scenario")
+    parser.add_argument("--warmup", default=20, type=int, help="Warm-up requests per connection")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.tcp:
+            address = ("127.0.0.1", free_port())
+            os.environ["BINARY_SOCKET_PORT"] = str(address[1])
+        else:
+            address = os.path.join(tmp, "ecometer.sock")
+            os.environ["BINARY_SOCKET_PATH"] = address
+
+        process, url = start_uvicorn()
+        try:
+            results = asyncio.run(run_benchmarks(args, url, address))
+        finally:
+            process.terminate()
+            process.wait()
+
+    if args.output:
+        report = {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "socket": "tcp" if args.tcp else "unix",
+            "requests_per_scenario": args.requests,
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
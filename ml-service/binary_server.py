@@ -0,0 +1,216 @@
+"""
+Internal binary prediction protocol over a Unix domain socket or localhost TCP
+
+For co-located callers (the Node backend on the same host), HTTP parsing,
+JSON and Pydantic make up most of the cost of a /predict call. This
+asyncio server runs inside the service process, next to the FastAPI app,
+and scores with the same loaded models through the same validation,
+executor and journal path as /batch-predict/binary.
+
+Frames are length-prefixed, little-endian, and may be pipelined on one
+connection; responses come back in request order.
+
+Request:  u32 payload length, then the payload:
+          u16 version name length (0 selects the default model),
+          the version name in UTF-8, then n packed float64 rows of
+          [ENGINESIZE, CYLINDERS, FUELCONSUMPTION_COMB]
+Response: u32 payload length, u16 status (HTTP semantics: 200 ok,
+          400 malformed frame, 404 unknown version, 413 too large,
+          422 invalid rows, 503 saturated or not ready), then the payload:
+          200: u16 version name length, the version name, then n
+               packed float64 predictions (floored at zero, 2 decimals)
+          else: the error detail as UTF-8 JSON
+
+A frame larger than max_frame_bytes gets a 413 response and the
+connection is closed, since its payload is not read.
+"""
+
+import asyncio
+import json
+import os
+import socket
+import stat
+import struct
+
+import numpy as np
+
+from predictor import FEATURE_NAMES
+
+LENGTH = struct.Struct("<I")
+VERSION_LENGTH = struct.Struct("<H")
+RESPONSE_HEADER = struct.Struct("<IH")
+
+FEATURE_DTYPE = np.dtype("<f8")
+ROW_BYTES = FEATURE_DTYPE.itemsize * len(FEATURE_NAMES)
+
+
+class FrameError(Exception):
+    """A request frame answered with an error status"""
+
+    def __init__(self, status, detail):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+def bind_listener(path=None, host="127.0.0.1", port=None, backlog=2048):
+    """
+    Bind the listening socket: a Unix socket at path, or TCP on host:port.
+
+    The socket is inheritable so the pre-fork master can bind it once and
+    share it with every worker. A stale Unix socket file is replaced.
+    """
+    if path:
+        try:
+            if stat.S_ISSOCK(os.stat(path).st_mode):
+                os.unlink(path)
+        except FileNotFoundError:
+            pass
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(path)
+    else:
+        sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def encode_request(rows, version=None):
+    """Client side: frame an (n, 3) feature matrix for the given model version"""
+    name = (version or "").encode("utf-8")
+    body = np.ascontiguousarray(rows, dtype=FEATURE_DTYPE).tobytes()
+    payload_length = VERSION_LENGTH.size + len(name) + len(body)
+    return LENGTH.pack(payload_length) + VERSION_LENGTH.pack(len(name)) + name + body
+
+
+def decode_response(status, payload):
+    """
+    Client side: unpack a response payload.
+
+    Returns (predictions, version) for status 200; raises FrameError otherwise.
+    """
+    if status != 200:
+        raise FrameError(status, json.loads(payload.decode("utf-8")))
+    (name_length,) = VERSION_LENGTH.unpack_from(payload)
+    start = VERSION_LENGTH.size + name_length
+    version = payload[VERSION_LENGTH.size:start].decode("utf-8")
+    return np.frombuffer(payload, dtype=FEATURE_DTYPE, offset=start), version
+
+
+def _decode_request(payload):
+    if len(payload) < VERSION_LENGTH.size:
+        raise FrameError(400, "Frame is shorter than its header")
+    (name_length,) = VERSION_LENGTH.unpack_from(payload)
+    start = VERSION_LENGTH.size + name_length
+    body = len(payload) - start
+    if body < 0 or body % ROW_BYTES:
+        raise FrameError(400, f"Frame body is not a whole number of {ROW_BYTES}-byte rows")
+    try:
+        version = payload[VERSION_LENGTH.size:start].decode("utf-8") or None
+    except UnicodeDecodeError:
+        raise FrameError(400, "Version name is not valid UTF-8")
+    features = np.frombuffer(payload, dtype=FEATURE_DTYPE, offset=start).reshape(-1, len(FEATURE_NAMES))
+    return features, version
+
+
+def _encode_response(status, payload):
+    return RESPONSE_HEADER.pack(len(payload), status) + payload
+
+
+class BinaryServerStats:
+    """Counters describing connections and frames"""
+
+    def __init__(self):
+        self.connections = 0
+        self.open_connections = 0
+        self.frames = 0
+        self.rows = 0
+        self.errors = 0
+
+    def to_dict(self):
+        return {
+            "connections": self.connections,
+            "open_connections": self.open_connections,
+            "frames": self.frames,
+            "rows": self.rows,
+            "errors": self.errors,
+        }
+
+
+class BinaryPredictionServer:
+    """
+    Serve length-prefixed prediction frames on an already bound socket.
+
+    score(features, version) is a coroutine returning (predictions,
+    served version); it raises FrameError to answer with an error status.
+    """
+
+    def __init__(self, score, max_frame_bytes=64 * 1024 * 1024):
+        self.score = score
+        self.max_frame_bytes = max_frame_bytes
+        self.stats = BinaryServerStats()
+        self.address = None
+        self._server = None
+
+    async def start(self, sock):
+        if sock.family == socket.AF_UNIX:
+            self._server = await asyncio.start_unix_server(self._handle, sock=sock)
+        else:
+            self._server = await asyncio.start_server(self._handle, sock=sock)
+        self.address = sock.getsockname()
+
+    def close(self):
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+
+    async def _handle(self, reader, writer):
+        self.stats.connections += 1
+        self.stats.open_connections += 1
+        try:
+            while True:
+                try:
+                    (length,) = LENGTH.unpack(await reader.readexactly(LENGTH.size))
+                except asyncio.IncompleteReadError:
+                    return
+                if length > self.max_frame_bytes:
+                    self.stats.errors += 1
+                    detail = f"Frame of {length} bytes exceeds {self.max_frame_bytes} bytes"
+                    writer.write(_encode_response(413, json.dumps(detail).encode("utf-8")))
+                    await writer.drain()
+                    return
+                payload = await reader.readexactly(length)
+                writer.write(await self._respond(payload))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.stats.open_connections -= 1
+            writer.close()
+
+    async def _respond(self, payload):
+        self.stats.frames += 1
+        try:
+            features, version = _decode_request(payload)
+            predictions, served_version = await self.score(features, version)
+        except FrameError as e:
+            self.stats.errors += 1
+            return _encode_response(e.status, json.dumps(e.detail, default=str).encode("utf-8"))
+        except Exception as e:
+            self.stats.errors += 1
+            return _encode_response(500, json.dumps(f"Prediction failed: {e}").encode("utf-8"))
+
+        self.stats.rows += len(features)
+        name = served_version.encode("utf-8")
+        body = np.ascontiguousarray(predictions, dtype=FEATURE_DTYPE).tobytes()
+        return _encode_response(200, VERSION_LENGTH.pack(len(name)) + name + body)
+
+    def to_dict(self):
+        return {
+            # A path for Unix sockets, (host, port) for TCP
+            "address": self.address,
+            "max_frame_bytes": self.max_frame_bytes,
+            **self.stats.to_dict(),
+        }
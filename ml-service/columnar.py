@@ -0,0 +1,140 @@
+"""
+Columnar and binary batch formats with vectorized validation
+
+Large batches skip per-row Pydantic objects entirely: features arrive as
+one array per column (JSON) or as a packed float64 matrix (raw bytes or
+.npy), and range checks run as numpy masks over whole columns.
+"""
+
+import io
+
+import numpy as np
+
+from predictor import FEATURE_NAMES
+
+NPY_MAGIC = b"\x93NUMPY"
+NPY_MEDIA_TYPE = "application/x-npy"
+RAW_MEDIA_TYPE = "application/octet-stream"
+
+# Raw bodies are packed little-endian float64 rows of FEATURE_NAMES
+RAW_DTYPE = np.dtype("<f8")
+
+# Mirrors the Field constraints on PredictionInput
+FEATURE_CONSTRAINTS = {
+    "ENGINESIZE": {"gt": 0, "le": 20},
+    "CYLINDERS": {"ge": 3, "le": 16, "integer": True},
+    "FUELCONSUMPTION_COMB": {"gt": 0, "le": 50},
+}
+
+# Public .npy header readers by format version
+NPY_HEADER_READERS = {
+    (1, 0): np.lib.format.read_array_header_1_0,
+    (2, 0): np.lib.format.read_array_header_2_0,
+}
+
+# Cap on row indices echoed back per failed constraint
+MAX_REPORTED_ROWS = 10
+
+
+class BatchFormatError(ValueError):
+    """Raised when a columnar or binary batch cannot be decoded"""
+
+
+def validate_features(features):
+    """
+    Check a (n_rows, 3) feature matrix against FEATURE_CONSTRAINTS.
+
+    Returns a list of error dicts, one per violated constraint, each with
+    the number of offending rows and the first few row indices.
+    """
+    errors = []
+
+    def report(field, constraint, mask):
+        count = int(np.count_nonzero(mask))
+        if count:
+            errors.append({
+                "field": field,
+                "constraint": constraint,
+                "count": count,
+                "rows": np.flatnonzero(mask)[:MAX_REPORTED_ROWS].tolist(),
+            })
+
+    for i, field in enumerate(FEATURE_NAMES):
+        column = features[:, i]
+        rules = FEATURE_CONSTRAINTS[field]
+
+        finite = np.isfinite(column)
+        report(field, "finite", ~finite)
+
+        # NaN compares False, so non-finite rows are only reported once
+        if "gt" in rules:
+            report(field, f"gt {rules['gt']}", finite & (column <= rules["gt"]))
+        if "ge" in rules:
+            report(field, f"ge {rules['ge']}", finite & (column < rules["ge"]))
+        if "le" in rules:
+            report(field, f"le {rules['le']}", finite & (column > rules["le"]))
+        if rules.get("integer"):
+            report(field, "integer", finite & (column != np.floor(column)))
+
+    return errors
+
+
+def parse_columns(columns):
+    """Stack a struct-of-arrays mapping into a (n_rows, 3) float64 matrix"""
+    lengths = {len(columns[field]) for field in FEATURE_NAMES}
+    if len(lengths) != 1:
+        raise BatchFormatError("All feature columns must have the same length")
+
+    features = np.empty((lengths.pop(), len(FEATURE_NAMES)), dtype=np.float64)
+    for i, field in enumerate(FEATURE_NAMES):
+        features[:, i] = columns[field]
+    return features
+
+
+def parse_binary(body):
+    """
+    Decode a binary batch body without copying the feature data.
+
+    Accepts either a .npy file holding a (n_rows, 3) little-endian float64
+    array, or raw packed float64 rows. Returns (features, media_type) so the
+    response can be encoded the same way.
+    """
+    if body.startswith(NPY_MAGIC):
+        header = io.BytesIO(body)
+        try:
+            version = np.lib.format.read_magic(header)
+            if version not in NPY_HEADER_READERS:
+                raise ValueError(f"unsupported format version {version}")
+            shape, fortran_order, dtype = NPY_HEADER_READERS[version](header)
+        except ValueError as e:
+            raise BatchFormatError(f"Invalid .npy header: {e}")
+
+        if dtype != RAW_DTYPE:
+            raise BatchFormatError(f"Expected little-endian float64 data, got {dtype.str}")
+        if len(shape) != 2 or shape[1] != len(FEATURE_NAMES):
+            raise BatchFormatError(f"Expected shape (n, {len(FEATURE_NAMES)}), got {shape}")
+
+        count = shape[0] * shape[1]
+        offset = header.tell()
+        if len(body) - offset != count * RAW_DTYPE.itemsize:
+            raise BatchFormatError("Array data does not match the .npy header")
+
+        flat = np.frombuffer(body, dtype=RAW_DTYPE, count=count, offset=offset)
+        return flat.reshape(shape, order="F" if fortran_order else "C"), NPY_MEDIA_TYPE
+
+    row_bytes = RAW_DTYPE.itemsize * len(FEATURE_NAMES)
+    if len(body) % row_bytes:
+        raise BatchFormatError(f"Raw body length must be a multiple of {row_bytes} bytes")
+
+    flat = np.frombuffer(body, dtype=RAW_DTYPE)
+    return flat.reshape(-1, len(FEATURE_NAMES)), RAW_MEDIA_TYPE
+
+
+def encode_binary(predictions, media_type):
+    """Encode predictions as .npy or raw little-endian float64 bytes"""
+    predictions = np.ascontiguousarray(predictions, dtype=RAW_DTYPE)
+    if media_type == NPY_MEDIA_TYPE:
+        out = io.BytesIO()
+        np.save(out, predictions, allow_pickle=False)
+        return out.getvalue()
+    return predictions.tobytes()
@@ -0,0 +1,279 @@
+"""
+Online input drift monitoring
+
+Every scored row updates per-feature running statistics: count, mean and
+sum of squared deviations (Welford's algorithm, with whole batches merged
+by the pairwise update of Chan et al.) and a histogram over fixed bins.
+Statistics are kept in a ring of time buckets, so memory is constant no
+matter how much traffic is seen, and a sliding window is the merge of the
+buckets it covers.
+
+Live inputs are compared with the training distribution of the default
+model:
+
+- PSI (population stability index) of each feature's binned distribution
+  against the training proportions stored in the compact artifact
+  (feature_bins). Artifacts without them fall back to decile bins of a
+  normal fit to the scaler mean and scale, with 10% expected per bin.
+- z-shift, the live mean minus the training mean in training standard
+  deviations (the scaler's scale_), and the ratio of the standard
+  deviations.
+
+A batch update is three searchsorted calls, one bincount and a few column
+reductions. Single rows from /predict are buffered and folded in as a
+batch, so the per-request cost is a list append.
+"""
+
+import math
+import time
+from statistics import NormalDist
+
+import numpy as np
+
+from predictor import FEATURE_NAMES
+
+# Cumulative probabilities of the fallback bin cut points (deciles)
+BIN_QUANTILES = tuple(k / 10 for k in range(1, 10))
+
+# Proportions are floored here so empty bins do not make PSI infinite
+PSI_EPSILON = 1e-4
+
+# Conventional PSI bands: below the first is stable, above the second significant
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.25
+
+
+def reference_bins(info):
+    """
+    (edges, proportions, source) of the training distribution of a model
+
+    source is "training" when the artifact recorded the binned training
+    rows and "normal" when they are approximated from the scaler stats.
+    Returns None when the model has neither, or when its statistics are not
+    one per input feature (e.g. a scaler after PolynomialFeatures).
+    """
+    n_features = len(FEATURE_NAMES)
+    mean, scale = info.get("scaler_mean"), info.get("scaler_scale")
+    if mean is None or scale is None or len(mean) != n_features or len(scale) != n_features:
+        return None
+
+    bins = info.get("feature_bins")
+    if bins is not None:
+        edges = [np.asarray(feature_edges, dtype=np.float64) for feature_edges in bins["edges"]]
+        proportions = [np.asarray(p, dtype=np.float64) for p in bins["proportions"]]
+        source = "training"
+    else:
+        normal = NormalDist()
+        z = np.array([normal.inv_cdf(q) for q in BIN_QUANTILES])
+        edges = [m + s * z for m, s in zip(mean, scale)]
+        proportions = [np.full(len(z) + 1, 1.0 / (len(z) + 1)) for _ in edges]
+        source = "normal"
+
+    if len(edges) != n_features or len(proportions) != n_features:
+        return None
+    return edges, proportions, source
+
+
+def psi(counts, expected):
+    """Population stability index of observed bin counts against expected proportions"""
+    actual = np.maximum(counts / max(counts.sum(), 1), PSI_EPSILON)
+    expected = np.maximum(expected, PSI_EPSILON)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def psi_status(value):
+    if value < PSI_MODERATE:
+        return "stable"
+    if value < PSI_SIGNIFICANT:
+        return "moderate"
+    return "significant"
+
+
+def _merge(count_a, mean_a, m2_a, count_b, mean_b, m2_b):
+    """Chan et al. pairwise merge of (count, mean, M2) statistics"""
+    total = count_a + count_b
+    if total == 0:
+        return 0, mean_a, m2_a
+    delta = mean_b - mean_a
+    mean = mean_a + delta * (count_b / total)
+    m2 = m2_a + m2_b + delta * delta * (count_a * count_b / total)
+    return total, mean, m2
+
+
+class DriftMonitor:
+    """
+    Sliding-window feature statistics compared with a training reference.
+
+    Time is cut into buckets of bucket_seconds; the last `windows` buckets
+    make up the sliding window. Not thread-safe: update it from the event
+    loop only.
+    """
+
+    def __init__(self, bucket_seconds=60, windows=15, buffer_rows=256, min_rows=100,
+                 clock=time.monotonic):
+        self.bucket_seconds = bucket_seconds
+        self.windows = windows
+        self.min_rows = min_rows
+        self.clock = clock
+        self.buffer_rows = buffer_rows
+        # Single rows waiting to be folded in as one batch
+        self._pending = []
+        self.reference = None
+        self._reset_statistics(total_bins=0)
+
+    def _reset_statistics(self, total_bins):
+        n_features = len(FEATURE_NAMES)
+        # Bucket number held by every ring slot; -1 marks an empty slot
+        self._slot_bucket = np.full(self.windows, -1, dtype=np.int64)
+        self._count = np.zeros(self.windows, dtype=np.int64)
+        self._mean = np.zeros((self.windows, n_features))
+        self._m2 = np.zeros((self.windows, n_features))
+        self._bins = np.zeros((self.windows, total_bins), dtype=np.int64)
+        self._lifetime_count = 0
+        self._lifetime_mean = np.zeros(n_features)
+        self._lifetime_m2 = np.zeros(n_features)
+        self._lifetime_bins = np.zeros(total_bins, dtype=np.int64)
+        self._pending = []
+
+    def set_reference(self, version, info):
+        """
+        Compare against this model's training distribution.
+
+        Statistics are reset when the reference changes, since bins of
+        different references do not line up.
+        """
+        bins = reference_bins(info)
+        if bins is None:
+            self.reference = None
+            self._reset_statistics(total_bins=0)
+            return
+        edges, proportions, source = bins
+        key = (
+            tuple(info["scaler_mean"]), tuple(info["scaler_scale"]),
+            tuple(tuple(feature_edges) for feature_edges in edges),
+        )
+        if self.reference is not None and self.reference["key"] == key:
+            self.reference["version"] = version
+            return
+
+        offsets = np.cumsum([0] + [len(feature_edges) + 1 for feature_edges in edges])
+        self.reference = {
+            "key": key,
+            "version": version,
+            "source": source,
+            "mean": np.asarray(info["scaler_mean"], dtype=np.float64),
+            "scale": np.asarray(info["scaler_scale"], dtype=np.float64),
+            "edges": edges,
+            "proportions": proportions,
+            "offsets": offsets,
+        }
+        self._reset_statistics(total_bins=int(offsets[-1]))
+
+    def _slot(self, bucket):
+        """Ring slot of a time bucket, cleared if it still holds an older bucket"""
+        slot = bucket % self.windows
+        if self._slot_bucket[slot] != bucket:
+            self._slot_bucket[slot] = bucket
+            self._count[slot] = 0
+            self._mean[slot] = 0.0
+            self._m2[slot] = 0.0
+            self._bins[slot] = 0
+        return slot
+
+    def observe(self, features):
+        """Fold an (n, 3) float64 batch of inputs into the statistics"""
+        if self.reference is None or len(features) == 0:
+            return
+        n = len(features)
+        batch_mean = features.mean(axis=0)
+        centered = features - batch_mean
+        batch_m2 = np.einsum("ij,ij->j", centered, centered)
+
+        reference = self.reference
+        indices = np.empty(features.shape, dtype=np.intp)
+        for i, edges in enumerate(reference["edges"]):
+            indices[:, i] = np.searchsorted(edges, features[:, i], side="right")
+        indices += reference["offsets"][:-1]
+        batch_bins = np.bincount(indices.ravel(), minlength=len(self._lifetime_bins))
+
+        slot = self._slot(int(self.clock() // self.bucket_seconds))
+        self._count[slot], self._mean[slot], self._m2[slot] = _merge(
+            self._count[slot], self._mean[slot], self._m2[slot], n, batch_mean, batch_m2
+        )
+        self._bins[slot] += batch_bins
+        self._lifetime_count, self._lifetime_mean, self._lifetime_m2 = _merge(
+            self._lifetime_count, self._lifetime_mean, self._lifetime_m2, n, batch_mean, batch_m2
+        )
+        self._lifetime_bins += batch_bins
+
+    def observe_row(self, row):
+        """Buffer a single input row; the buffer is folded in when full"""
+        if self.reference is None:
+            return
+        self._pending.append(row)
+        if len(self._pending) >= self.buffer_rows:
+            self.flush()
+
+    def flush(self):
+        """Fold buffered single rows into the current bucket"""
+        if self._pending:
+            rows = np.array(self._pending, dtype=np.float64)
+            self._pending = []
+            self.observe(rows)
+
+    def _compare(self, count, mean, m2, bins):
+        reference = self.reference
+        features = {}
+        for i, name in enumerate(FEATURE_NAMES):
+            start, stop = reference["offsets"][i], reference["offsets"][i + 1]
+            feature_psi = psi(bins[start:stop], reference["proportions"][i])
+            features[name] = {
+                "mean": float(mean[i]),
+                "std": math.sqrt(m2[i] / count),
+                "z_shift": float((mean[i] - reference["mean"][i]) / reference["scale"][i]),
+                "std_ratio": math.sqrt(m2[i] / count) / float(reference["scale"][i]),
+                "psi": feature_psi,
+                "status": psi_status(feature_psi),
+            }
+        return features
+
+    def _summary(self, count, mean, m2, bins):
+        if count == 0:
+            return {"rows": 0, "status": "no-data", "features": None}
+        features = self._compare(count, mean, m2, bins)
+        if count < self.min_rows:
+            status = "insufficient-data"
+        else:
+            status = max((f["status"] for f in features.values()),
+                         key=("stable", "moderate", "significant").index)
+        return {"rows": int(count), "status": status, "features": features}
+
+    def window(self):
+        """(count, mean, m2, bins) merged over the buckets inside the sliding window"""
+        current = int(self.clock() // self.bucket_seconds)
+        live = (self._slot_bucket > current - self.windows) & (self._count > 0)
+        count, mean, m2 = 0, np.zeros(len(FEATURE_NAMES)), np.zeros(len(FEATURE_NAMES))
+        for slot in np.flatnonzero(live):
+            count, mean, m2 = _merge(count, mean, m2, self._count[slot], self._mean[slot], self._m2[slot])
+        return count, mean, m2, self._bins[live].sum(axis=0)
+
+    def report(self):
+        self.flush()
+        if self.reference is None:
+            return {"reference": None, "window": None, "lifetime": None}
+        reference = self.reference
+        return {
+            "reference": {
+                "version": reference["version"],
+                "source": reference["source"],
+                "mean": dict(zip(FEATURE_NAMES, reference["mean"].tolist())),
+                "scale": dict(zip(FEATURE_NAMES, reference["scale"].tolist())),
+            },
+            "window_seconds": self.bucket_seconds * self.windows,
+            "bucket_seconds": self.bucket_seconds,
+            "window": self._summary(*self.window()),
+            "lifetime": self._summary(
+                self._lifetime_count, self._lifetime_mean, self._lifetime_m2, self._lifetime_bins
+            ),
+        }
+
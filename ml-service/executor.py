@@ -0,0 +1,224 @@
+"""
+Bounded model execution pool with admission control
+
+Model calls run on a thread or process pool instead of the event loop, so
+a large batch or a slow (e.g. tree ensemble) model no longer stalls other
+requests, /health included. Admission is bounded: once every worker is
+busy and max_queue calls are waiting, new calls are rejected immediately
+with ExecutorSaturated instead of queueing without limit, and the caller
+answers with a Retry-After.
+
+Small batches scored by the fused linear kernel take microseconds, less
+than a hop to another thread, so they run inline on the event loop.
+
+In process mode the pool is forked from the serving process, so workers
+share the loaded models copy-on-write, as the pre-fork server's workers
+do. Calls carry only the id() of the predictor, which is the same object
+in the forked child; the pool is recycled when the set of loaded models
+changes.
+"""
+
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# Queueing delay histogram bucket upper bounds, in seconds
+WAIT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+
+MODES = ("thread", "process", "inline")
+
+# Predictors visible to forked process workers, by id()
+_published = {}
+
+
+class ExecutorSaturated(Exception):
+    """Raised when a call is rejected because the pool and its queue are full"""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Model executor saturated, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+def _timed_predict(predictor, features):
+    """Run in a worker: return (start time, predict seconds, predictions)"""
+    started = time.perf_counter()
+    predictions = predictor.predict(features)
+    return started, time.perf_counter() - started, predictions
+
+
+def _timed_predict_published(predictor_id, features):
+    """Process worker entry point: look the predictor up in the inherited table"""
+    return _timed_predict(_published[predictor_id], features)
+
+
+class ExecutorStats:
+    """Counters describing admission and queueing delay"""
+
+    def __init__(self):
+        self.submitted = 0
+        self.inline = 0
+        self.completed = 0
+        self.rejected = 0
+        self.errors = 0
+        self.total_wait_s = 0.0
+        self.max_wait_s = 0.0
+        self.wait_counts = [0] * (len(WAIT_BUCKETS) + 1)
+
+    def record_wait(self, wait):
+        self.total_wait_s += wait
+        self.max_wait_s = max(self.max_wait_s, wait)
+        for i, bound in enumerate(WAIT_BUCKETS):
+            if wait <= bound:
+                self.wait_counts[i] += 1
+                break
+        else:
+            self.wait_counts[-1] += 1
+
+    def to_dict(self):
+        labels = [f"<={bound * 1000:g}ms" for bound in WAIT_BUCKETS]
+        labels.append(f">{WAIT_BUCKETS[-1] * 1000:g}ms")
+        return {
+            "submitted": self.submitted,
+            "inline": self.inline,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "errors": self.errors,
+            "mean_wait_ms": self.total_wait_s / self.completed * 1000 if self.completed else 0.0,
+            "max_wait_ms": self.max_wait_s * 1000,
+            "wait_histogram": dict(zip(labels, self.wait_counts)),
+        }
+
+
+class ModelExecutor:
+    """
+    Run predictor.predict calls on a bounded pool.
+
+    At most `workers` calls run at once and at most `max_queue` more wait
+    for a worker; anything beyond that raises ExecutorSaturated. Fused
+    linear predictions of up to inline_rows rows skip the pool.
+    """
+
+    def __init__(self, mode="thread", workers=4, max_queue=64, inline_rows=1000, retry_after=1,
+                 on_wait=None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown executor mode {mode}; choose from {', '.join(MODES)}")
+        self.mode = mode
+        self.workers = workers
+        self.max_queue = max_queue
+        self.inline_rows = inline_rows
+        self.retry_after = retry_after
+        # Optional callback(seconds) invoked with every queueing delay
+        self.on_wait = on_wait
+        self.stats = ExecutorStats()
+        # Calls admitted to the pool and not yet finished, running or queued
+        self.in_flight = 0
+        self._pool = None
+
+    @property
+    def queue_depth(self):
+        """Admitted calls waiting for a free worker"""
+        return max(0, self.in_flight - self.workers)
+
+    @property
+    def saturated(self):
+        return self.in_flight >= self.workers + self.max_queue
+
+    def _runs_inline(self, predictor, features):
+        return self.mode == "inline" or (
+            getattr(predictor, "kind", None) == "fused-linear" and len(features) <= self.inline_rows
+        )
+
+    def _get_pool(self):
+        if self._pool is None:
+            if self.mode == "process":
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("fork")
+                )
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="model")
+        return self._pool
+
+    def set_models(self, predictors):
+        """Publish the loaded predictors to process workers, recycling the pool if they changed"""
+        if self.mode != "process":
+            return
+        predictors = {id(predictor): predictor for predictor in predictors}
+        if predictors.keys() == _published.keys() and all(
+            _published[key] is predictor for key, predictor in predictors.items()
+        ):
+            return
+        _published.clear()
+        _published.update(predictors)
+        self._recycle()
+
+    def _recycle(self):
+        """Drop the current process pool; the next call forks one that sees _published"""
+        if self._pool is not None:
+            # Calls already running finish on the old workers
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+    async def run(self, predictor, features, background=False):
+        """
+        Score features with predictor; returns (predictions, predict seconds)
+
+        Background calls (shadow scoring) never queue: unless they run
+        inline they are admitted only while a worker is idle.
+        """
+        self.stats.submitted += 1
+        if self._runs_inline(predictor, features):
+            self.stats.inline += 1
+            _, seconds, predictions = _timed_predict(predictor, features)
+            return predictions, seconds
+
+        if background and self.in_flight >= self.workers:
+            raise ExecutorSaturated(self.retry_after)
+        if self.saturated:
+            self.stats.rejected += 1
+            raise ExecutorSaturated(self.retry_after)
+
+        loop = asyncio.get_running_loop()
+        if self.mode == "process":
+            if _published.get(id(predictor)) is not predictor:
+                # Loaded after the pool was forked (reload race); republish
+                _published[id(predictor)] = predictor
+                self._recycle()
+            call = (_timed_predict_published, id(predictor), features)
+        else:
+            call = (_timed_predict, predictor, features)
+
+        self.in_flight += 1
+        submitted = time.perf_counter()
+        try:
+            started, seconds, predictions = await loop.run_in_executor(self._get_pool(), *call)
+        except Exception:
+            self.stats.errors += 1
+            raise
+        finally:
+            self.in_flight -= 1
+
+        # perf_counter is system-wide monotonic, so this also holds across processes
+        wait = max(0.0, started - submitted)
+        self.stats.completed += 1
+        self.stats.record_wait(wait)
+        if self.on_wait is not None:
+            self.on_wait(wait)
+        return predictions, seconds
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def to_dict(self):
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "inline_rows": self.inline_rows,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "saturated": self.saturated,
+            **self.stats.to_dict(),
+        }
@@ -0,0 +1,117 @@
+"""
+Fast-path JSON responses for the prediction endpoints
+
+By default FastAPI builds a Pydantic output model, validates it again
+against response_model, converts it to plain Python objects with
+jsonable_encoder and encodes it with the stdlib json module. Every value on
+these responses is already known to be valid, so the fast path builds the
+response body as a plain dict with the same shape and serializes it in one
+step, with numpy arrays (rounded with np.round) passed straight to the
+encoder.
+
+orjson is used when installed; it serializes float64 arrays natively and
+formats floats exactly like json.dumps. Without it the stdlib encoder is
+used with compact separators, which still skips the revalidation.
+"""
+
+import json
+import math
+
+import numpy as np
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+ENCODER = "orjson" if orjson is not None else "json"
+
+
+def _default(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content):
+    """Serialize content, including numpy arrays, to JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """JSON response for content that needs no validation or conversion"""
+
+    media_type = "application/json"
+
+    def render(self, content):
+        return dumps(content)
+
+
+def round_bound(value):
+    """Round a scalar interval bound; None, i.e. omitted, when it is not finite"""
+    return round(value, 2) if math.isfinite(value) else None
+
+
+def round_bounds(values):
+    """
+    Round an array of interval bounds.
+
+    Returns the rounded array, or a list with None (JSON null) in place of
+    non-finite entries, which neither JSON path can encode as a number.
+    """
+    rounded = np.round(values, 2)
+    if np.isfinite(rounded).all():
+        return rounded
+    return [value if math.isfinite(value) else None for value in rounded.tolist()]
+
+
+def prediction_body(prediction, input_data, version, bounds=None):
+    """
+    Response body matching PredictionOutput.
+    
+    bounds is an optional (lower, upper, confidence) prediction interval.
+    """
+    body = {
+        "prediction": round(prediction, 2),
+        "input_features": {
+            "ENGINESIZE": input_data.ENGINESIZE,
+            "CYLINDERS": input_data.CYLINDERS,
+            "FUELCONSUMPTION_COMB": input_data.FUELCONSUMPTION_COMB,
+        },
+        "model_version": version,
+    }
+    if bounds is not None:
+        lower, upper, confidence = bounds
+        # Like response_model_exclude_none on the PredictionOutput path
+        for name, value in (("lower", round_bound(lower)), ("upper", round_bound(upper))):
+            if value is not None:
+                body[name] = value
+        body["confidence"] = confidence
+    return body
+
+
+def batch_body(predictions, version, rounded=False, bounds=None):
+    """
+    Response body matching BatchPredictionOutput.
+
+    predictions must be a 1D float64 array, rounded here to 2 decimals
+    unless the caller already did; orjson only serializes C-contiguous
+    arrays natively. bounds is an optional (lower, upper, confidence)
+    tuple of unrounded bound arrays.
+    """
+    if not rounded:
+        predictions = np.round(predictions, 2)
+    body = {
+        "predictions": np.ascontiguousarray(predictions),
+        "count": len(predictions),
+        "model_version": version,
+    }
+    if bounds is not None:
+        lower, upper, confidence = bounds
+        body.update(lower=round_bounds(lower), upper=round_bounds(upper), confidence=confidence)
+    return body
@@ -0,0 +1,109 @@
+"""
+OLS prediction intervals for the linear model
+
+For a linear regression fitted by least squares on n rows and p features,
+the prediction interval for a new row x at confidence c is
+
+    ŷ ± t(1 - (1 - c) / 2, n - p - 1) · s · sqrt(1 + 1/n + (x - x̄)ᵀ S⁻¹ (x - x̄))
+
+where s² is the residual variance, x̄ the training feature means and S the
+centered XᵀX of the training features. training/train.py stores s², the
+degrees of freedom, n, x̄ and S⁻¹ in the compact artifact.
+
+At load time S⁻¹ is factored as L Lᵀ, so the quadratic form becomes the
+squared norm of xᵀL - x̄ᵀL: one (n, 3) @ (3, 3) product and a few in-place
+vector operations per batch, with no (n, 3) temporary for x - x̄. Single
+rows, as scored by /predict, skip numpy altogether.
+
+scipy is not a service dependency, so the Student t quantile is computed
+from the normal quantile with the Cornish-Fisher expansion (Abramowitz and
+Stegun 26.7.5). From 10 degrees of freedom up it is accurate to better
+than 1e-5 for two-sided levels up to 95% and 1e-4 at 99%, and far closer
+for the hundreds of rows the model is trained on.
+"""
+
+import math
+from statistics import NormalDist
+
+import numpy as np
+
+
+def t_quantile(p, df):
+    """Approximate p-quantile of Student's t distribution with df degrees of freedom"""
+    z = NormalDist().inv_cdf(p)
+    z3, z5, z7, z9 = z ** 3, z ** 5, z ** 7, z ** 9
+    return (
+        z
+        + (z3 + z) / (4 * df)
+        + (5 * z5 + 16 * z3 + 3 * z) / (96 * df ** 2)
+        + (3 * z7 + 19 * z5 + 17 * z3 - 15 * z) / (384 * df ** 3)
+        + (79 * z9 + 776 * z7 + 1482 * z5 - 1920 * z3 - 945 * z) / (92160 * df ** 4)
+    )
+
+
+class PredictionInterval:
+    """Vectorized OLS prediction interval half-widths for raw feature rows"""
+
+    def __init__(self, residual_variance, degrees_of_freedom, n_samples, feature_mean, xtx_inv):
+        self.residual_variance = float(residual_variance)
+        self.degrees_of_freedom = int(degrees_of_freedom)
+        self.n_samples = int(n_samples)
+        self.feature_mean = np.array(feature_mean, dtype=np.float64)
+        self.xtx_inv = np.array(xtx_inv, dtype=np.float64)
+        # Read-only, like the predictor weights, so forked workers share them
+        self.feature_mean.setflags(write=False)
+        self.xtx_inv.setflags(write=False)
+        self._t_cache = {}
+        
+        # S⁻¹ = L Lᵀ; eigh rather than Cholesky so a singular S (pinv) still factors
+        eigenvalues, eigenvectors = np.linalg.eigh(self.xtx_inv)
+        self._factor = eigenvectors * np.sqrt(np.clip(eigenvalues, 0.0, None))
+        self._offset = self.feature_mean @ self._factor
+        self._ones = np.ones(len(self.feature_mean))
+        self._base_variance = self.residual_variance * (1.0 + 1.0 / self.n_samples)
+        # Plain floats for the single-row path
+        self._factor_columns = self._factor.T.tolist()
+        self._offset_values = self._offset.tolist()
+
+    @classmethod
+    def from_dict(cls, params):
+        return cls(
+            params["residual_variance"],
+            params["degrees_of_freedom"],
+            params["n_samples"],
+            params["feature_mean"],
+            params["xtx_inv"],
+        )
+
+    def critical_value(self, confidence):
+        """Two-sided t critical value, cached per confidence level"""
+        value = self._t_cache.get(confidence)
+        if value is None:
+            value = t_quantile(1 - (1 - confidence) / 2, self.degrees_of_freedom)
+            # Requests can pick any level; keep the cache from growing without bound
+            if len(self._t_cache) < 1024:
+                self._t_cache[confidence] = value
+        return value
+
+    def half_width(self, features, confidence=0.95):
+        """Half-width of the prediction interval for every row of an (n, 3) array"""
+        whitened = features @ self._factor
+        whitened -= self._offset
+        whitened *= whitened
+        variance = whitened @ self._ones
+        variance *= self.residual_variance
+        variance += self._base_variance
+        np.sqrt(variance, out=variance)
+        variance *= self.critical_value(confidence)
+        return variance
+    
+    def half_width_row(self, row, confidence=0.95):
+        """Half-width for one [ENGINESIZE, CYLINDERS, FUELCONSUMPTION_COMB] row of floats"""
+        x0, x1, x2 = row
+        leverage = 0.0
+        for (w0, w1, w2), offset in zip(self._factor_columns, self._offset_values):
+            value = x0 * w0 + x1 * w1 + x2 * w2 - offset
+            leverage += value * value
+        return self.critical_value(confidence) * math.sqrt(
+            self._base_variance + self.residual_variance * leverage
+        )
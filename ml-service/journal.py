@@ -0,0 +1,209 @@
+"""
+Append-only binary prediction journal
+
+Every scored row can be appended to a journal of fixed-width binary
+records (RECORD_DTYPE: timestamp, the three features, the served
+prediction and the model version), so real traffic can later be replayed
+for benchmarking or to evaluate a new model (benchmarks/journal_replay.py).
+
+The request path only puts a tuple on a queue. A writer thread encodes
+queued requests into records, buffers them, and appends them to the
+current segment file every flush_seconds or flush_bytes, whichever comes
+first. Segments rotate once they reach segment_bytes. Each segment starts
+with a 16-byte header (magic and record size) followed by packed records,
+so it can be memory-mapped with np.memmap; a record cut short by a crash
+is ignored by the reader.
+
+Segment names sort in creation order and carry the writer's pid, so the
+workers of the pre-fork server never share a file.
+"""
+
+import os
+import queue
+import struct
+import threading
+import time
+
+import numpy as np
+
+from predictor import FEATURE_NAMES
+
+MAGIC = b"ECOJRNL1"
+HEADER = struct.Struct("<8sII")
+HEADER_SIZE = HEADER.size
+
+# Model versions longer than 16 bytes are truncated
+RECORD_DTYPE = np.dtype([
+    ("timestamp", "<f8"),
+    ("features", "<f8", (len(FEATURE_NAMES),)),
+    ("prediction", "<f8"),
+    ("model_version", "S16"),
+])
+
+SEGMENT_SUFFIX = ".journal"
+
+_STOP = object()
+
+
+def segment_paths(directory):
+    """Journal segments in a directory, oldest first"""
+    names = sorted(name for name in os.listdir(directory) if name.endswith(SEGMENT_SUFFIX))
+    return [os.path.join(directory, name) for name in names]
+
+
+def open_segment(path):
+    """Memory-map the complete records of a segment as a read-only RECORD_DTYPE array"""
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        magic, record_size, _ = HEADER.unpack(f.read(HEADER_SIZE))
+    if magic != MAGIC or record_size != RECORD_DTYPE.itemsize:
+        raise ValueError(f"{path} is not a prediction journal segment")
+
+    rows = (size - HEADER_SIZE) // RECORD_DTYPE.itemsize
+    if rows == 0:
+        return np.empty(0, dtype=RECORD_DTYPE)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=HEADER_SIZE, shape=(rows,))
+
+
+def encode_records(timestamp, features, predictions, version):
+    """Pack one scored request into a RECORD_DTYPE array"""
+    predictions = np.asarray(predictions, dtype=np.float64).reshape(-1)
+    records = np.empty(len(predictions), dtype=RECORD_DTYPE)
+    records["timestamp"] = timestamp
+    records["features"] = np.asarray(features, dtype=np.float64).reshape(-1, len(FEATURE_NAMES))
+    records["prediction"] = predictions
+    records["model_version"] = version.encode("utf-8")[:16]
+    return records
+
+
+class JournalStats:
+    """Counters describing journal writes"""
+
+    def __init__(self):
+        self.requests = 0
+        self.records = 0
+        self.bytes_written = 0
+        self.segments = 0
+        self.flushes = 0
+        self.dropped = 0
+        self.write_errors = 0
+
+    def to_dict(self):
+        return {
+            "requests": self.requests,
+            "records": self.records,
+            "bytes_written": self.bytes_written,
+            "segments": self.segments,
+            "flushes": self.flushes,
+            "dropped_requests": self.dropped,
+            "write_errors": self.write_errors,
+        }
+
+
+class PredictionJournal:
+    """
+    Buffered, size-rotated journal of scored rows.
+
+    record() never blocks: once max_pending requests are waiting for the
+    writer thread, new ones are dropped and counted.
+    """
+
+    def __init__(self, directory, segment_bytes=64 * 1024 * 1024, flush_bytes=1024 * 1024,
+                 flush_seconds=1.0, max_pending=10000):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.flush_bytes = flush_bytes
+        self.flush_seconds = flush_seconds
+        self.max_pending = max_pending
+        self.stats = JournalStats()
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._segment = None
+        self._segment_size = 0
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="prediction-journal", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """Flush everything queued so far and stop the writer thread"""
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+
+    def record(self, features, predictions, version):
+        """Queue a scored request: (n, 3) features or one row, and its served predictions"""
+        if self._thread is None:
+            return
+        if self._queue.qsize() >= self.max_pending:
+            self.stats.dropped += 1
+            return
+        self.stats.requests += 1
+        self._queue.put_nowait((time.time(), features, predictions, version))
+
+    def _run(self):
+        buffered, buffered_bytes = [], 0
+        deadline = time.monotonic() + self.flush_seconds
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = None
+
+            if item is not None and item is not _STOP:
+                try:
+                    data = encode_records(*item).tobytes()
+                except (TypeError, ValueError):
+                    self.stats.write_errors += 1
+                else:
+                    buffered.append(data)
+                    buffered_bytes += len(data)
+
+            if item is _STOP or buffered_bytes >= self.flush_bytes or time.monotonic() >= deadline:
+                if buffered:
+                    self._write(b"".join(buffered))
+                    buffered, buffered_bytes = [], 0
+                deadline = time.monotonic() + self.flush_seconds
+            if item is _STOP:
+                if self._segment is not None:
+                    self._segment.close()
+                    self._segment = None
+                return
+
+    def _write(self, data):
+        try:
+            if self._segment is None or self._segment_size + len(data) > self.segment_bytes:
+                self._rotate()
+            self._segment.write(data)
+            self._segment.flush()
+        except OSError:
+            # The segment may end in a partial record; continue in a new one
+            self.stats.write_errors += 1
+            if self._segment is not None:
+                self._segment.close()
+                self._segment = None
+            return
+        self._segment_size += len(data)
+        self.stats.records += len(data) // RECORD_DTYPE.itemsize
+        self.stats.bytes_written += len(data)
+        self.stats.flushes += 1
+
+    def _rotate(self):
+        if self._segment is not None:
+            self._segment.close()
+        name = f"predictions-{time.time_ns():020d}-{os.getpid()}{SEGMENT_SUFFIX}"
+        self._segment = open(os.path.join(self.directory, name), "wb")
+        self._segment.write(HEADER.pack(MAGIC, RECORD_DTYPE.itemsize, 0))
+        self._segment_size = HEADER_SIZE
+        self.stats.segments += 1
+
+    def to_dict(self):
+        return {
+            "directory": os.path.abspath(self.directory),
+            "segment_bytes": self.segment_bytes,
+            "record_bytes": RECORD_DTYPE.itemsize,
+            "pending": self._queue.qsize(),
+            **self.stats.to_dict(),
+        }
@@ -0,0 +1,252 @@
+"""
+Prometheus-style metrics for the ML service
+
+Collectors are plain dicts of counters updated from the event loop thread,
+so recording a sample is a dict lookup and a few additions with no locking.
+GET /metrics renders them in the Prometheus text exposition format.
+"""
+
+import time
+from bisect import bisect_left
+
+# Starlette appends "; charset=utf-8" to text/ media types itself
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Whole-request latency buckets, in seconds
+REQUEST_LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0
+)
+
+# Model-predict latency buckets, in seconds
+PREDICT_LATENCY_BUCKETS = (
+    0.000001, 0.0000025, 0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0
+)
+
+# Model executor queueing delay buckets, in seconds
+EXECUTOR_WAIT_BUCKETS = (
+    0.00001, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0
+)
+
+# Rows per batch
+BATCH_SIZE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 10000, 100000, 1000000)
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Monotonic counter with positional label values"""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+
+    def inc(self, *labels, amount=1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        for labels, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+
+    kind = "gauge"
+
+    def set(self, value, *labels):
+        self._values[labels] = value
+
+
+class Histogram:
+    """Fixed-bucket histogram with positional label values"""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, buckets, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (last is +Inf), sum, count]
+        self._series = {}
+
+    def observe(self, value, *labels):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def samples(self):
+        bounds = self.buckets + (float("inf"),)
+        for labels, (counts, total, count) in self._series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(float(bound))}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}"
+
+
+class MetricsRegistry:
+    """Ordered set of collectors rendered together"""
+
+    def __init__(self):
+        self._metrics = []
+        self._callbacks = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def on_collect(self, callback):
+        """Run callback before every render, e.g. to refresh gauges"""
+        self._callbacks.append(callback)
+
+    def render(self):
+        for callback in self._callbacks:
+            callback()
+
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+REQUESTS = registry.register(Counter(
+    "ecometer_http_requests_total",
+    "HTTP requests by route, method and status code",
+    ("route", "method", "status"),
+))
+REQUEST_SECONDS = registry.register(Histogram(
+    "ecometer_http_request_duration_seconds",
+    "Whole-request latency by route",
+    REQUEST_LATENCY_BUCKETS,
+    ("route",),
+))
+PREDICT_SECONDS = registry.register(Histogram(
+    "ecometer_model_predict_duration_seconds",
+    "Latency of the model predict step alone, by route",
+    PREDICT_LATENCY_BUCKETS,
+    ("route",),
+))
+BATCH_SIZE = registry.register(Histogram(
+    "ecometer_batch_size_rows",
+    "Rows per scored batch, by route",
+    BATCH_SIZE_BUCKETS,
+    ("route",),
+))
+MODEL_LOAD_SECONDS = registry.register(Gauge(
+    "ecometer_model_load_duration_seconds",
+    "Time taken to load and self-test each model version",
+    ("version",),
+))
+LOG_RECORDS_DROPPED = registry.register(Gauge(
+    "ecometer_log_records_dropped",
+    "Info-level log records dropped because the log queue was full",
+))
+EXECUTOR_WAIT_SECONDS = registry.register(Histogram(
+    "ecometer_executor_wait_seconds",
+    "Time model calls spent queued for an executor worker",
+    EXECUTOR_WAIT_BUCKETS,
+))
+EXECUTOR_IN_FLIGHT = registry.register(Gauge(
+    "ecometer_executor_in_flight",
+    "Model calls admitted to the executor and not yet finished",
+))
+EXECUTOR_QUEUE_DEPTH = registry.register(Gauge(
+    "ecometer_executor_queue_depth",
+    "Model calls waiting for a free executor worker",
+))
+EXECUTOR_REJECTED = registry.register(Counter(
+    "ecometer_executor_rejected_total",
+    "Model calls rejected because the executor queue was full, by route",
+    ("route",),
+))
+DEDUP_ROWS = registry.register(Counter(
+    "ecometer_dedup_rows_total",
+    "Rows of batches that went through duplicate collapsing, by route",
+    ("route",),
+))
+DEDUP_UNIQUE_ROWS = registry.register(Counter(
+    "ecometer_dedup_unique_rows_total",
+    "Unique rows actually scored after duplicate collapsing, by route; "
+    "divide by ecometer_dedup_rows_total for the dedup ratio",
+    ("route",),
+))
+DRIFT_PSI = registry.register(Gauge(
+    "ecometer_drift_psi",
+    "Population stability index of recent inputs against the training distribution, by feature",
+    ("feature",),
+))
+DRIFT_Z_SHIFT = registry.register(Gauge(
+    "ecometer_drift_z_shift",
+    "Shift of the recent input mean from the training mean, in training standard deviations, by feature",
+    ("feature",),
+))
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording request counts and latency per route.
+
+    Paths that are not a fixed application route are grouped under
+    "other" to keep label cardinality bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.routes = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if self.routes is None:
+            self.routes = frozenset(
+                route.path for route in scope["app"].routes if "{" not in route.path
+            )
+
+        started = time.perf_counter()
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope["path"] if scope["path"] in self.routes else "other"
+            REQUESTS.inc(route, scope["method"], str(status[0]))
+            REQUEST_SECONDS.observe(time.perf_counter() - started, route)
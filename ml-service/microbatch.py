@@ -0,0 +1,172 @@
+"""
+Micro-batching dispatcher for single-row predictions
+
+Concurrent /predict calls are queued for a short window and scored with a
+single vectorized predict. Each caller awaits a future that resolves to its
+own row of the batch, so a burst of N requests costs one numpy call instead
+of N. With a ModelExecutor the batch is scored through its bounded pool.
+"""
+
+import asyncio
+import time
+
+import numpy as np
+
+# Batch size histogram bucket upper bounds
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class MicroBatchStats:
+    """Counters describing batch sizes and queueing delay"""
+
+    def __init__(self):
+        self.batches = 0
+        self.rows = 0
+        self.max_batch_size = 0
+        self.total_wait_s = 0.0
+        self.max_wait_s = 0.0
+        self.errors = 0
+        self.batch_size_counts = [0] * (len(BATCH_SIZE_BUCKETS) + 1)
+
+    def record(self, batch_size, waits):
+        self.batches += 1
+        self.rows += batch_size
+        self.max_batch_size = max(self.max_batch_size, batch_size)
+        self.total_wait_s += sum(waits)
+        self.max_wait_s = max(self.max_wait_s, max(waits))
+
+        for i, bound in enumerate(BATCH_SIZE_BUCKETS):
+            if batch_size <= bound:
+                self.batch_size_counts[i] += 1
+                break
+        else:
+            self.batch_size_counts[-1] += 1
+
+    def to_dict(self):
+        labels = [f"<={bound}" for bound in BATCH_SIZE_BUCKETS]
+        labels.append(f">{BATCH_SIZE_BUCKETS[-1]}")
+        return {
+            "batches": self.batches,
+            "rows": self.rows,
+            "errors": self.errors,
+            "mean_batch_size": self.rows / self.batches if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "mean_wait_us": self.total_wait_s / self.rows * 1e6 if self.rows else 0.0,
+            "max_wait_us": self.max_wait_s * 1e6,
+            "batch_size_histogram": dict(zip(labels, self.batch_size_counts)),
+        }
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent single-row predictions into one vectorized call.
+
+    When no batch is being scored, queued rows are flushed as soon as the
+    requests already runnable on the event loop have added theirs, so a
+    lone request is scored without waiting. While a batch is in flight on
+    the executor, rows accumulate until it completes, the batch reaches
+    max_batch_size rows, or the oldest row has waited max_wait_us
+    microseconds, whichever comes first. Rows submitted for different
+    models share a window but are scored with one predict call per model.
+    """
+
+    def __init__(self, max_batch_size=64, max_wait_us=500, on_predict=None, executor=None):
+        self.max_batch_size = max_batch_size
+        self.max_wait_us = max_wait_us
+        # Optional callback(seconds, rows) invoked after every predict call
+        self.on_predict = on_predict
+        # Optional ModelExecutor; without one batches are scored on the event loop
+        self.executor = executor
+        self.stats = MicroBatchStats()
+        self._pending = []
+        self._timer = None
+        # Offloaded groups being scored; the loop only keeps weak references to tasks
+        self._tasks = set()
+
+    async def submit(self, row, predictor):
+        """Queue one feature row for predictor and wait for its prediction"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((row, predictor, future, time.perf_counter()))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            if self._tasks:
+                # Collect rows while the previous batch is scored, for at most max_wait_us
+                self._timer = loop.call_later(self.max_wait_us / 1e6, self._flush)
+            else:
+                self._timer = loop.call_soon(self._flush)
+
+        return await future
+
+    def _flush(self):
+        """Score everything queued so far and resolve the waiting futures"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        started = time.perf_counter()
+        waits = [started - enqueued for _, _, _, enqueued in batch]
+
+        groups = {}
+        for row, predictor, future, _ in batch:
+            groups.setdefault(predictor, []).append((row, future))
+
+        for predictor, entries in groups.items():
+            if self.executor is None:
+                self._score_group(predictor, entries)
+            else:
+                task = asyncio.ensure_future(self._score_group_offloaded(predictor, entries))
+                self._tasks.add(task)
+                task.add_done_callback(self._group_done)
+
+        self.stats.record(len(batch), waits)
+
+    def _group_done(self, task):
+        self._tasks.discard(task)
+        # Rows queued behind the finished batches need not wait for the timer
+        if not self._tasks and self._pending:
+            self._flush()
+
+    def _score_group(self, predictor, entries):
+        try:
+            features = np.array([row for row, _ in entries], dtype=np.float64)
+            started = time.perf_counter()
+            predictions = predictor.predict(features)
+            if self.on_predict is not None:
+                self.on_predict(time.perf_counter() - started, len(entries))
+        except Exception as e:
+            self._fail(entries, e)
+            return
+
+        self._resolve(entries, predictions)
+
+    async def _score_group_offloaded(self, predictor, entries):
+        try:
+            features = np.array([row for row, _ in entries], dtype=np.float64)
+            predictions, seconds = await self.executor.run(predictor, features)
+            if self.on_predict is not None:
+                self.on_predict(seconds, len(entries))
+        except Exception as e:
+            # Includes ExecutorSaturated, which callers turn into a retryable error
+            self._fail(entries, e)
+            return
+
+        self._resolve(entries, predictions)
+
+    def _fail(self, entries, error):
+        self.stats.errors += 1
+        for _, future in entries:
+            if not future.done():
+                future.set_exception(error)
+
+    def _resolve(self, entries, predictions):
+        for (_, future), prediction in zip(entries, predictions):
+            # A caller may have been cancelled (e.g. client disconnect)
+            if not future.done():
+                future.set_result(float(prediction))
@@ -0,0 +1,100 @@
+"""
+Bounded LRU cache for predictions
+
+Frontend traffic repeats the same engine/cylinder/consumption combinations
+over and over, so predictions are cached under a canonical feature key plus
+the fingerprint of the model that produced them. Entries for models that
+are no longer loaded are dropped, and writes for unknown fingerprints are
+ignored, so a late write from a replaced model is never served.
+"""
+
+import time
+from collections import OrderedDict
+
+
+class PredictionCache:
+    """LRU cache with optional TTL and hit/miss/eviction counters"""
+
+    def __init__(self, max_size=10000, ttl_seconds=0, decimals=6):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.decimals = decimals
+        self.fingerprints = frozenset()
+        self._entries = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def set_models(self, fingerprints):
+        """Bind the cache to the loaded models, dropping entries of any others"""
+        fingerprints = frozenset(fingerprints)
+        if fingerprints == self.fingerprints:
+            return
+
+        stale = [key for key in self._entries if key[0] not in fingerprints]
+        for key in stale:
+            del self._entries[key]
+        self.invalidations += len(stale)
+        self.fingerprints = fingerprints
+
+    def key(self, fingerprint, engine_size, cylinders, fuel_consumption):
+        """Canonical cache key for one feature row scored by a given model"""
+        return (
+            fingerprint,
+            round(float(engine_size), self.decimals),
+            int(cylinders),
+            round(float(fuel_consumption), self.decimals),
+        )
+
+    def get(self, key):
+        """Return the cached prediction for key, or None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        value, expires_at = entry
+        if expires_at is not None and time.monotonic() >= expires_at:
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Store a prediction, evicting the least recently used entry if full"""
+        # Ignore results computed by a model that has since been replaced
+        if key[0] not in self.fingerprints:
+            return
+
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds > 0 else None
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def to_dict(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "model_fingerprints": sorted(self.fingerprints),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
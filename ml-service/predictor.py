@@ -0,0 +1,138 @@
+"""
+Fast scoring kernels for the CO2 prediction service
+
+A StandardScaler + linear regressor pipeline is an affine function of its
+inputs, so its scaler statistics and coefficients can be folded into one
+weight vector and bias at load time. Scoring then becomes a single dot
+product instead of a trip through sklearn's validation and dispatch.
+"""
+
+import hashlib
+import logging
+import pickle
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FEATURE_NAMES = ["ENGINESIZE", "CYLINDERS", "FUELCONSUMPTION_COMB"]
+
+# Probe inputs spanning the accepted request ranges, used for parity checks
+PARITY_PROBE = np.array([
+    [0.1, 3, 0.1],
+    [1.0, 3, 4.5],
+    [2.0, 4, 8.0],
+    [3.5, 6, 10.0],
+    [5.0, 8, 15.0],
+    [8.4, 12, 25.6],
+    [20.0, 16, 50.0],
+])
+
+
+class LinearPredictor:
+    """Closed-form predictor: prediction = features @ weights + bias"""
+
+    kind = "fused-linear"
+
+    def __init__(self, weights, bias):
+        # Read-only, so pre-forked workers keep sharing the parent's copy
+        self.weights = np.array(weights, dtype=np.float64, order="C")
+        self.weights.setflags(write=False)
+        self.bias = float(bias)
+
+    @classmethod
+    def from_pipeline(cls, pipeline):
+        """
+        Fold a scaler + linear regressor pipeline into a LinearPredictor.
+
+        Returns None when the pipeline is not a plain affine model (e.g. a
+        tree ensemble or polynomial features), so callers can fall back to
+        the pipeline itself.
+        """
+        steps = getattr(pipeline, "named_steps", None)
+        if steps is None or set(steps) != {"scaler", "regressor"}:
+            return None
+
+        scaler = steps["scaler"]
+        regressor = steps["regressor"]
+        if type(scaler).__name__ != "StandardScaler":
+            return None
+
+        coef = getattr(regressor, "coef_", None)
+        intercept = getattr(regressor, "intercept_", None)
+        if coef is None or intercept is None:
+            return None
+
+        coef = np.asarray(coef, dtype=np.float64)
+        if coef.shape != (len(FEATURE_NAMES),):
+            return None
+
+        # with_mean=False still records mean_, but never subtracts it;
+        # with_std=False leaves scale_ as None
+        mean = scaler.mean_ if scaler.with_mean and scaler.mean_ is not None else np.zeros_like(coef)
+        scale = scaler.scale_ if scaler.with_std and scaler.scale_ is not None else np.ones_like(coef)
+        return cls.from_stats(mean, scale, coef, np.ravel(intercept)[0])
+
+    @classmethod
+    def from_stats(cls, mean, scale, coef, intercept):
+        """Fold scaler statistics and regression coefficients into weights and bias"""
+        weights = np.asarray(coef, dtype=np.float64) / scale
+        bias = float(intercept) - float(np.dot(weights, mean))
+        return cls(weights, bias)
+
+    def predict(self, features):
+        """Score a 2D array of shape (n_rows, 3)"""
+        return features @ self.weights + self.bias
+
+    def fingerprint(self):
+        """Content hash of the fused parameters"""
+        digest = hashlib.sha256(self.weights.tobytes())
+        digest.update(np.float64(self.bias).tobytes())
+        return digest.hexdigest()[:16]
+
+
+class PipelinePredictor:
+    """Fallback wrapper that scores through the sklearn pipeline"""
+
+    kind = "sklearn-pipeline"
+
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+
+    def predict(self, features):
+        """Score a 2D array of shape (n_rows, 3)"""
+        return self.pipeline.predict(features)
+
+    def fingerprint(self):
+        """Content hash of the pickled pipeline"""
+        return hashlib.sha256(pickle.dumps(self.pipeline)).hexdigest()[:16]
+
+
+def check_parity(predictor, pipeline, rtol=1e-9, atol=1e-6):
+    """Return the max absolute difference if predictor matches pipeline, else None"""
+    expected = pipeline.predict(PARITY_PROBE)
+    actual = predictor.predict(PARITY_PROBE)
+    if not np.allclose(actual, expected, rtol=rtol, atol=atol):
+        return None
+    return float(np.max(np.abs(actual - expected)))
+
+
+def build_predictor(pipeline):
+    """
+    Build the fastest predictor that reproduces the pipeline's output.
+
+    Uses the fused linear kernel when the pipeline is affine and passes the
+    parity self-check, otherwise falls back to pipeline.predict.
+    """
+    fused = LinearPredictor.from_pipeline(pipeline)
+    if fused is None:
+        logger.info("Pipeline is not a plain linear model, using sklearn predict")
+        return PipelinePredictor(pipeline)
+
+    max_diff = check_parity(fused, pipeline)
+    if max_diff is None:
+        logger.warning("Fused predictor failed parity check, using sklearn predict")
+        return PipelinePredictor(pipeline)
+
+    logger.info(f"Using fused linear predictor (parity max abs diff: {max_diff:.2e})")
+    return fused
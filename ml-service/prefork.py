@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+Pre-fork multi-process server for the ML service
+
+The master process imports the app and loads every model version once,
+binds the listening socket, and then forks N workers that each run a
+uvicorn server on that shared socket. Workers inherit the imported code and
+the loaded models as copy-on-write pages; the fused weights are read-only
+and the inherited heap is frozen out of the garbage collector, so those
+pages are never written and per-worker RSS stays flat as N grows.
+
+Model reloads are coordinated by the master: SIGHUP, an /admin call on any
+worker, or a changed artifact (with MODEL_WATCH_INTERVAL) makes the master
+reload once and then replace the workers, new ones first, so all workers
+serve the same model set and no request is dropped. SIGTERM/SIGINT stop
+accepting connections and let in-flight requests drain before exiting.
+SIGUSR1 logs per-worker memory.
+
+Usage (from ml-service/):
+    python prefork.py --workers 4 --port 8001
+    WEB_CONCURRENCY=4 python start.py
+    WEB_CONCURRENCY=auto python start.py     # one worker per CPU available to the container
+"""
+
+import argparse
+import gc
+import json
+import logging
+import os
+import select
+import signal
+import socket
+import sys
+import time
+
+from async_logging import stop_logging
+
+logger = logging.getLogger("prefork")
+
+# Seconds a worker gets to finish in-flight requests after SIGTERM
+GRACEFUL_TIMEOUT = float(os.environ.get("GRACEFUL_TIMEOUT", 30))
+
+# A worker that exits sooner than this after starting is restarted with a delay
+MIN_WORKER_LIFETIME = 1.0
+
+# Set in workers: write end of the pipe carrying commands to the master
+_control_fd = None
+_worker_count = 0
+
+
+def cgroup_cpu_limit():
+    """CPU quota of this process's cgroup (v2 cpu.max or v1 CFS quota), or None if unlimited"""
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()[:2]
+    except (OSError, ValueError):
+        try:
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+                quota = f.read().strip()
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+                period = f.read().strip()
+        except OSError:
+            return None
+    if quota in ("max", "-1"):
+        return None
+    return int(quota) / int(period)
+
+
+def available_cpus():
+    """CPUs this process may run on, capped by the container's CPU quota"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    limit = cgroup_cpu_limit()
+    if limit is not None:
+        cpus = min(cpus, max(1, int(limit)))
+    return cpus
+
+
+def default_worker_count():
+    """
+    WEB_CONCURRENCY workers; "auto" means one per available CPU.
+
+    Defaults to 1: os.cpu_count() reports the host's CPUs, not the
+    container's, and every worker costs its own memory.
+    """
+    value = os.environ.get("WEB_CONCURRENCY", "1")
+    if value.isdigit() and int(value) > 0:
+        return int(value)
+    if value == "auto":
+        return available_cpus()
+    return 1
+
+
+def is_worker():
+    """Whether this process is a worker forked by the pre-fork master"""
+    return _control_fd is not None
+
+
+def worker_count():
+    return _worker_count
+
+
+def send_command(command, **params):
+    """
+    Ask the master to run a coordinated action (from a worker).
+
+    Messages are single writes well under PIPE_BUF, so concurrent workers
+    never interleave.
+    """
+    message = json.dumps({"command": command, **params}).encode("utf-8") + b"\n"
+    os.write(_control_fd, message)
+
+
+def process_memory(pid):
+    """RSS, PSS and shared memory of a process in kB (Linux only, else empty)"""
+    memory = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in ("Rss", "Pss", "Shared_Clean", "Shared_Dirty"):
+                    memory[key] = int(value.split()[0])
+    except OSError:
+        return {}
+    return {
+        "rss_kb": memory.get("Rss", 0),
+        "pss_kb": memory.get("Pss", 0),
+        "shared_kb": memory.get("Shared_Clean", 0) + memory.get("Shared_Dirty", 0),
+    }
+
+
+def bind_socket(host, port, backlog=2048):
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class Master:
+    """Forks, supervises and rolls the worker processes"""
+
+    def __init__(self, app_module, sock, workers, log_level="info", access_log=True):
+        self.app_module = app_module
+        self.sock = sock
+        self.workers = workers
+        self.log_level = log_level
+        self.access_log = access_log
+        # pid -> (generation, started_at)
+        self.children = {}
+        self.generation = 0
+        self.stopping = False
+        self.reload_requested = False
+        self.memory_report_requested = False
+        self.control_read, self.control_write = os.pipe()
+        os.set_blocking(self.control_read, False)
+        self._pending = b""
+
+    def load_models(self):
+        summary = self.app_module.model_registry.refresh()
+        logger.info(f"Models loaded: {summary['loaded']}, default: {summary['default']}")
+        return summary
+
+    def spawn(self):
+        # Objects created so far are shared with the workers; keep the
+        # collector from touching (and so copying) their pages
+        gc.freeze()
+
+        pid = os.fork()
+        if pid:
+            self.children[pid] = (self.generation, time.monotonic())
+            return pid
+
+        exit_code = 0
+        try:
+            self._run_worker()
+        except BaseException:
+            logger.exception("Worker crashed")
+            exit_code = 1
+        # os._exit skips atexit, so flush queued log records first
+        stop_logging()
+        os._exit(exit_code)
+
+    def _run_worker(self):
+        global _control_fd, _worker_count
+        import uvicorn
+
+        os.close(self.control_read)
+        _control_fd = self.control_write
+        _worker_count = self.workers
+
+        # Reloads are the master's job; uvicorn installs SIGINT/SIGTERM handlers
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        signal.signal(signal.SIGUSR1, signal.SIG_IGN)
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+
+        config = uvicorn.Config(
+            self.app_module.app,
+            log_level=self.log_level,
+            access_log=self.access_log,
+            timeout_graceful_shutdown=GRACEFUL_TIMEOUT,
+        )
+        uvicorn.Server(config).run(sockets=[self.sock])
+
+    def replace_workers(self):
+        """Start a new generation of workers, then drain the old one"""
+        old = [pid for pid, (generation, _) in self.children.items() if generation == self.generation]
+        self.generation += 1
+        for _ in range(self.workers):
+            self.spawn()
+        for pid in old:
+            self._signal(pid, signal.SIGTERM)
+        logger.info(f"Started worker generation {self.generation}, draining {len(old)} old workers")
+
+    def reload(self):
+        previous_default = self.app_module.model_registry.default_version
+        try:
+            summary = self.load_models()
+        except Exception as e:
+            logger.error(f"Model reload error: {str(e)}")
+            return
+        if summary["loaded"] or summary["removed"] or summary["default"] != previous_default:
+            self.replace_workers()
+        else:
+            logger.info("Models unchanged, keeping current workers")
+
+    def set_default(self, version):
+        try:
+            self.app_module.model_registry.set_default(version)
+        except KeyError:
+            logger.error(f"Cannot set default model, unknown version: {version}")
+            return
+        logger.info(f"Default model version set to {version}")
+        self.replace_workers()
+
+    def log_memory(self):
+        for pid, (generation, _) in sorted(self.children.items()):
+            memory = process_memory(pid)
+            if memory:
+                logger.info(
+                    f"Worker {pid} (generation {generation}): RSS {memory['rss_kb'] / 1024:.1f} MB, "
+                    f"PSS {memory['pss_kb'] / 1024:.1f} MB, shared {memory['shared_kb'] / 1024:.1f} MB"
+                )
+
+    def run(self):
+        self.load_models()
+        self._install_signal_handlers()
+
+        for _ in range(self.workers):
+            self.spawn()
+        logger.info(
+            f"Master {os.getpid()} serving on {self.sock.getsockname()[:2]} with {self.workers} workers"
+        )
+
+        watch_interval = self.app_module.MODEL_WATCH_INTERVAL
+        next_watch = time.monotonic() + watch_interval
+        while not self.stopping:
+            readable, _, _ = select.select([self.control_read], [], [], 0.5)
+            if readable:
+                self._read_commands()
+            if self.reload_requested:
+                self.reload_requested = False
+                self.reload()
+            if self.memory_report_requested:
+                self.memory_report_requested = False
+                self.log_memory()
+            if watch_interval > 0 and time.monotonic() >= next_watch:
+                next_watch = time.monotonic() + watch_interval
+                try:
+                    if self.app_module.model_registry.has_changes():
+                        logger.info("Model artifacts changed, reloading...")
+                        self.reload()
+                except Exception as e:
+                    logger.error(f"Model reload error: {str(e)}")
+            self._reap(restart=True)
+
+        self._shutdown()
+
+    def _read_commands(self):
+        try:
+            self._pending += os.read(self.control_read, 65536)
+        except BlockingIOError:
+            return
+        *lines, self._pending = self._pending.split(b"\n")
+        for line in lines:
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+            if message.get("command") == "reload":
+                self.reload_requested = True
+            elif message.get("command") == "set-default":
+                self.set_default(message.get("version"))
+
+    def _reap(self, restart):
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            generation, started_at = self.children.pop(pid, (None, None))
+            if not restart or generation != self.generation:
+                continue
+            logger.warning(f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}, restarting")
+            if time.monotonic() - started_at < MIN_WORKER_LIFETIME:
+                time.sleep(MIN_WORKER_LIFETIME)
+            self.spawn()
+
+    def _shutdown(self):
+        logger.info(f"Shutting down, draining {len(self.children)} workers")
+        for pid in list(self.children):
+            self._signal(pid, signal.SIGTERM)
+
+        deadline = time.monotonic() + GRACEFUL_TIMEOUT + 5
+        while self.children and time.monotonic() < deadline:
+            self._reap(restart=False)
+            time.sleep(0.1)
+
+        for pid in list(self.children):
+            logger.warning(f"Worker {pid} did not stop in time, killing")
+            self._signal(pid, signal.SIGKILL)
+        while self.children:
+            self._reap(restart=False)
+            time.sleep(0.05)
+        self.sock.close()
+
+    def _signal(self, pid, signum):
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def _install_signal_handlers(self):
+        def stop(signum, frame):
+            self.stopping = True
+
+        def reload(signum, frame):
+            self.reload_requested = True
+
+        def report(signum, frame):
+            self.memory_report_requested = True
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGHUP, reload)
+        signal.signal(signal.SIGUSR1, report)
+
+
+def serve(host="0.0.0.0", port=8001, workers=None, log_level="info", access_log=True):
+    """Load the models once and serve them from `workers` forked processes"""
+    workers = workers or default_worker_count()
+
+    # Imported here so the models load in the master, before any fork
+    import app as app_module
+
+    sock = bind_socket(host, port)
+    # Shared by the workers like the HTTP socket, when the binary protocol is enabled
+    app_module.bind_binary_listener()
+    Master(app_module, sock, workers, log_level=log_level, access_log=access_log).run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the ML service from pre-forked workers")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", default=8001, type=int)
+    parser.add_argument("--workers", type=int, help="Worker processes (default: WEB_CONCURRENCY or 1)")
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--no-access-log", action="store_true")
+    args = parser.parse_args()
+
+    serve(args.host, args.port, args.workers, args.log_level, not args.no_access_log)
+
+
+if __name__ == "__main__":
+    # Run through the importable module so that app.py, which checks
+    # prefork.is_worker(), sees the same module state as the workers
+    import prefork
+    sys.exit(prefork.main())
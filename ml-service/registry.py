@@ -0,0 +1,311 @@
+"""
+Versioned model registry with hot-swap reload
+
+Every fuel_co2_pipeline_<version> artifact in the model directory is
+loaded, self-tested and kept in memory under its version name. A compact
+.json artifact is preferred over the .pkl of the same version, since it
+loads with numpy alone; joblib and scikit-learn are only imported when a
+pickle actually has to be read. Reloads run
+off the request path and publish the new set of versions with a single
+reference assignment, so requests never block on a load and always see a
+consistent (versions, default) pair.
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+
+import numpy as np
+
+from artifact import load_compact_artifact
+from predictor import FEATURE_NAMES, build_predictor
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_PATTERN = re.compile(r"^fuel_co2_pipeline_(?P<version>[A-Za-z0-9_.-]+)\.(?P<ext>json|pkl)$")
+
+# Preferred artifact extension first
+ARTIFACT_PREFERENCE = ("json", "pkl")
+
+# Directories probed for model artifacts, in order
+DEFAULT_MODEL_DIRS = [
+    os.path.join("..", "model_artifacts"),
+    "model_artifacts",
+    ".",
+    os.path.join("/app", "model_artifacts"),
+]
+
+FALLBACK_VERSION = "fallback"
+
+# Sample input used to self-test every model before it is published
+SELF_TEST_INPUT = np.array([[3.5, 6, 10.0]])
+
+
+def version_sort_key(version):
+    """Order versions numerically where possible (v2 < v10)"""
+    match = re.fullmatch(r"v(\d+)", version)
+    return (1, int(match.group(1)), version) if match else (0, 0, version)
+
+
+class ModelVersion:
+    """A loaded, self-tested model artifact"""
+
+    def __init__(self, version, predictor, info, pipeline=None, path=None, stamp=None,
+                 load_seconds=None, interval=None):
+        self.version = version
+        self.predictor = predictor
+        self.info = info
+        # PredictionInterval when the artifact carries the OLS statistics, else None
+        self.interval = interval
+        # None for compact artifacts, which never touch sklearn
+        self.pipeline = pipeline
+        self.fingerprint = predictor.fingerprint()
+        self.path = path
+        self.stamp = stamp
+        self.load_seconds = load_seconds
+        self.loaded_at = time.time()
+
+    def to_dict(self):
+        return {
+            "version": self.version,
+            "path": self.path,
+            "predictor": self.predictor.kind,
+            "fingerprint": self.fingerprint,
+            "intervals": self.interval is not None,
+            "load_seconds": self.load_seconds,
+            "loaded_at": self.loaded_at,
+        }
+
+
+def pipeline_info(pipeline):
+    """Describe a pickled pipeline the same way compact artifacts describe themselves"""
+    steps = getattr(pipeline, "named_steps", {})
+    # Scaler stats and coefficients only describe the inputs when nothing
+    # (e.g. PolynomialFeatures) transforms them between the two steps
+    if list(steps) != ["scaler", "regressor"] or \
+            len(getattr(steps["scaler"], "mean_", ())) != len(FEATURE_NAMES):
+        return {"model_type": type(pipeline).__name__, "features": FEATURE_NAMES}
+
+    scaler = steps["scaler"]
+    regressor = steps["regressor"]
+    info = {
+        "model_type": f"{type(regressor).__name__} with StandardScaler",
+        "features": FEATURE_NAMES,
+        "target": "CO2EMISSIONS",
+        "scaler_mean": scaler.mean_.tolist(),
+        "scaler_scale": scaler.scale_.tolist(),
+    }
+    if hasattr(regressor, "coef_"):
+        # Linear models; tree ensembles picked by the model search have no coefficients
+        info["model_coefficients"] = np.ravel(regressor.coef_).tolist()
+        info["model_intercept"] = float(np.ravel(regressor.intercept_)[0])
+    if type(regressor).__name__ == "LinearRegression":
+        info["model_type"] = "Linear Regression with StandardScaler"
+    return info
+
+
+def self_test(predictor, pipeline=None):
+    """Check that a model produces a finite prediction matching its pipeline"""
+    actual = predictor.predict(SELF_TEST_INPUT)
+    if not np.all(np.isfinite(actual)):
+        raise ValueError("Model produced a non-finite sample prediction")
+    if pipeline is not None and not np.allclose(actual, pipeline.predict(SELF_TEST_INPUT)):
+        raise ValueError("Predictor disagrees with its pipeline on the sample input")
+    return float(actual[0])
+
+
+def load_version(version, path, stamp=None):
+    """Load and self-test a compact (.json) or pickled (.pkl) artifact"""
+    started = time.perf_counter()
+
+    if path.endswith(".json"):
+        pipeline = None
+        predictor, info, interval = load_compact_artifact(path)
+    else:
+        # Deferred so that compact-only deployments never import sklearn
+        import joblib
+        pipeline = joblib.load(path)
+        predictor = build_predictor(pipeline)
+        info = pipeline_info(pipeline)
+        interval = None
+
+    sample = self_test(predictor, pipeline)
+    load_seconds = time.perf_counter() - started
+    logger.info(
+        f"Loaded model {version} from {path} in {load_seconds * 1000:.1f} ms. "
+        f"Sample prediction: {sample:.2f}"
+    )
+    return ModelVersion(version, predictor, info, pipeline=pipeline, path=path, stamp=stamp,
+                        load_seconds=load_seconds, interval=interval)
+
+
+def build_fallback():
+    """Create a simple fallback model for demonstration"""
+    from sklearn.linear_model import LinearRegression
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.pipeline import Pipeline
+
+    logger.warning("Creating fallback model...")
+    pipeline = Pipeline([
+        ('scaler', StandardScaler()),
+        ('regressor', LinearRegression())
+    ])
+
+    # Fit with sample data (this is just for demo - replace with actual training)
+    X_sample = np.array([[2.0, 4, 8.0], [3.5, 6, 10.0], [5.0, 8, 15.0]])
+    y_sample = np.array([180.0, 244.0, 350.0])
+    pipeline.fit(X_sample, y_sample)
+    logger.warning("Fallback model created and fitted with sample data")
+
+    predictor = build_predictor(pipeline)
+    self_test(predictor, pipeline)
+    return ModelVersion(FALLBACK_VERSION, predictor, pipeline_info(pipeline), pipeline=pipeline)
+
+
+class ModelRegistry:
+    """
+    In-memory set of model versions backed by an artifact directory.
+
+    Readers call get(); refresh() rescans the directory, loads new or
+    changed artifacts and swaps the published state atomically. Artifacts
+    that fail to load or self-test are skipped and the previously loaded
+    copy, if any, stays in service.
+    """
+
+    def __init__(self, model_dir=None, pinned_default=None):
+        self.model_dir = model_dir
+        self.pinned_default = pinned_default
+        # (versions by name, default version name), replaced as a whole
+        self._state = ({}, None)
+        self._reload_lock = threading.Lock()
+        # Stamps of artifacts that failed to load, so they are not retried until changed
+        self._failed_stamps = {}
+        self.last_reload = None
+
+    @property
+    def ready(self):
+        return self._state[1] is not None
+
+    @property
+    def default_version(self):
+        return self._state[1]
+
+    def get(self, version=None):
+        """Return the requested model version, or the default one"""
+        versions, default = self._state
+        if default is None:
+            raise LookupError("No model loaded")
+        return versions[version or default]
+
+    def versions(self):
+        return self._state[0]
+
+    def find_model_dir(self):
+        """Return the configured model directory or the first that holds artifacts"""
+        if self.model_dir:
+            return self.model_dir
+        for directory in DEFAULT_MODEL_DIRS:
+            if os.path.isdir(directory) and any(
+                ARTIFACT_PATTERN.match(name) for name in os.listdir(directory)
+            ):
+                return directory
+        return None
+
+    def scan(self):
+        """Map version name to (path, stamp) for artifacts in the model directory"""
+        directory = self.find_model_dir()
+        found = {}
+        if directory is None or not os.path.isdir(directory):
+            return found
+
+        candidates = {}
+        for name in os.listdir(directory):
+            match = ARTIFACT_PATTERN.match(name)
+            if match:
+                candidates.setdefault(match.group("version"), {})[match.group("ext")] = name
+
+        for version, names in candidates.items():
+            name = next(names[ext] for ext in ARTIFACT_PREFERENCE if ext in names)
+            path = os.path.join(directory, name)
+            stat = os.stat(path)
+            found[version] = (path, (stat.st_mtime_ns, stat.st_size))
+        return found
+
+    def has_changes(self):
+        """Whether the artifact directory differs from the loaded versions"""
+        loaded = {
+            version: (model.path, model.stamp)
+            for version, model in self._state[0].items()
+            if model.path is not None
+        }
+        loaded.update(self._failed_stamps)
+        return self.scan() != loaded
+
+    def refresh(self):
+        """
+        Reload new or changed artifacts and publish the result.
+
+        Blocking; run it in a worker thread from async code. Returns a
+        summary of loaded, removed and failed versions.
+        """
+        with self._reload_lock:
+            current, current_default = self._state
+            versions = {}
+            loaded, failed = [], {}
+            self._failed_stamps = {}
+
+            for version, (path, stamp) in self.scan().items():
+                existing = current.get(version)
+                if existing is not None and existing.path == path and existing.stamp == stamp:
+                    versions[version] = existing
+                    continue
+                try:
+                    versions[version] = load_version(version, path, stamp)
+                    loaded.append(version)
+                except Exception as e:
+                    logger.error(f"Failed to load model {version} from {path}: {str(e)}")
+                    failed[version] = str(e)
+                    self._failed_stamps[version] = (path, stamp)
+                    if existing is not None:
+                        versions[version] = existing
+
+            if not versions:
+                if current_default is None:
+                    logger.error("Could not find model file in any of the expected locations")
+                    versions[FALLBACK_VERSION] = build_fallback()
+                    loaded.append(FALLBACK_VERSION)
+                else:
+                    # Never drop every model; keep serving what we have
+                    logger.error("No loadable model artifacts found, keeping current models")
+                    versions = current
+
+            removed = sorted(set(current) - set(versions))
+            self._publish(versions)
+
+            self.last_reload = {
+                "time": time.time(),
+                "loaded": loaded,
+                "removed": removed,
+                "failed": failed,
+                "default": self.default_version,
+            }
+            return self.last_reload
+
+    def set_default(self, version):
+        """Pin the default version used when a request does not select one"""
+        with self._reload_lock:
+            versions = self._state[0]
+            if version not in versions:
+                raise KeyError(version)
+            self.pinned_default = version
+            self._publish(dict(versions))
+
+    def _publish(self, versions):
+        if self.pinned_default in versions:
+            default = self.pinned_default
+        else:
+            default = max(versions, key=version_sort_key)
+
+        self._state = (versions, default)
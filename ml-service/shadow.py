@@ -0,0 +1,189 @@
+"""
+Shadow scoring of a candidate model on live traffic
+
+A sample of /predict and /batch-predict requests is scored a second time
+by a candidate model version, after the response has been sent, and the
+candidate's predictions are compared with the ones actually served. The
+request path only samples and hands the rows to a bounded queue; when the
+queue is full, or when the candidate would have to wait for a busy
+executor worker, the shadow work is dropped and counted instead.
+
+A single consumer task drains the queue, concatenating queued requests
+into one predict call per (served version, candidate) pair.
+"""
+
+import asyncio
+import random
+import time
+
+import numpy as np
+
+from executor import ExecutorSaturated
+
+# Absolute disagreement histogram bucket upper bounds, in g/km
+DELTA_BUCKETS = (0.01, 0.1, 0.5, 1.0, 2.0, 5.0, 10.0, 25.0, 50.0, 100.0)
+
+
+class ShadowStats:
+    """Disagreement between the served and the candidate predictions of one version pair"""
+
+    def __init__(self):
+        self.batches = 0
+        self.rows = 0
+        self.total_abs_delta = 0.0
+        self.total_delta = 0.0
+        self.total_squared_delta = 0.0
+        self.max_abs_delta = 0.0
+        self.candidate_seconds = 0.0
+        self.delta_counts = np.zeros(len(DELTA_BUCKETS) + 1, dtype=np.int64)
+
+    def record(self, served, candidate, seconds):
+        delta = candidate - served
+        abs_delta = np.abs(delta)
+        self.batches += 1
+        self.rows += len(delta)
+        self.total_abs_delta += float(abs_delta.sum())
+        self.total_delta += float(delta.sum())
+        self.total_squared_delta += float(delta @ delta)
+        self.max_abs_delta = max(self.max_abs_delta, float(abs_delta.max()))
+        self.candidate_seconds += seconds
+        # side="left" puts a delta equal to a bound in that bound's bucket
+        self.delta_counts += np.bincount(
+            np.searchsorted(DELTA_BUCKETS, abs_delta, side="left"), minlength=len(DELTA_BUCKETS) + 1
+        )
+
+    def to_dict(self):
+        labels = [f"<={bound:g}" for bound in DELTA_BUCKETS]
+        labels.append(f">{DELTA_BUCKETS[-1]:g}")
+        rows = self.rows or 1
+        return {
+            "batches": self.batches,
+            "rows": self.rows,
+            "mean_abs_delta": self.total_abs_delta / rows,
+            "max_abs_delta": self.max_abs_delta,
+            "mean_delta": self.total_delta / rows,
+            "rmse_delta": float(np.sqrt(self.total_squared_delta / rows)),
+            "candidate_predict_us_per_row": self.candidate_seconds / rows * 1e6,
+            "abs_delta_histogram": dict(zip(labels, self.delta_counts.tolist())),
+        }
+
+
+class ShadowScorer:
+    """
+    Score sampled requests with a candidate model off the request path.
+
+    get_candidate() returns the candidate ModelVersion, or None when no
+    candidate is configured or loaded. sample_rate is the fraction of
+    requests shadowed; at most max_queue requests wait to be scored.
+    """
+
+    def __init__(self, get_candidate, sample_rate=0.1, max_queue=1000, max_batch_rows=10000,
+                 executor=None):
+        self.get_candidate = get_candidate
+        self.sample_rate = sample_rate
+        self.max_queue = max_queue
+        self.max_batch_rows = max_batch_rows
+        # Optional ModelExecutor; candidate calls only use idle workers
+        self.executor = executor
+        self.sampled = 0
+        self.errors = 0
+        self.dropped = {"queue_full": 0, "busy": 0, "no_candidate": 0}
+        self.comparisons = {}
+        self._queue = None
+        self._task = None
+
+    def sample(self):
+        """Whether to shadow the current request"""
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def start(self):
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._task = asyncio.create_task(self._consume())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    @property
+    def queue_depth(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def submit(self, features, served, served_version):
+        """
+        Queue a served request for shadow scoring, or drop it if the queue is full.
+
+        features is the (n, 3) float64 input and served the predictions
+        returned for it, floored at zero.
+
+        A coroutine although it never waits, so that Starlette runs it as a
+        background task on the event loop rather than in a worker thread.
+        """
+        if self._queue is None:
+            return
+        self.sampled += 1
+        try:
+            self._queue.put_nowait((features, served, served_version))
+        except asyncio.QueueFull:
+            self.dropped["queue_full"] += len(served)
+
+    async def _consume(self):
+        while True:
+            batch = [await self._queue.get()]
+            rows = len(batch[0][1])
+            while rows < self.max_batch_rows and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                rows += len(batch[-1][1])
+
+            groups = {}
+            for features, served, served_version in batch:
+                groups.setdefault(served_version, []).append((features, served))
+            for served_version, entries in groups.items():
+                await self._score(served_version, entries)
+
+    async def _score(self, served_version, entries):
+        rows = sum(len(served) for _, served in entries)
+        candidate = self.get_candidate()
+        if candidate is None or candidate.version == served_version:
+            self.dropped["no_candidate"] += rows
+            return
+
+        features = np.concatenate([features for features, _ in entries])
+        served = np.concatenate([served for _, served in entries])
+        try:
+            if self.executor is None:
+                started = time.perf_counter()
+                predictions = candidate.predictor.predict(features)
+                seconds = time.perf_counter() - started
+            else:
+                predictions, seconds = await self.executor.run(candidate.predictor, features,
+                                                               background=True)
+        except ExecutorSaturated:
+            self.dropped["busy"] += rows
+            return
+        except Exception:
+            self.errors += 1
+            return
+
+        # Compare with what the service would have served: floored at zero
+        key = (served_version, candidate.version)
+        stats = self.comparisons.get(key)
+        if stats is None:
+            stats = self.comparisons[key] = ShadowStats()
+        stats.record(served, np.maximum(predictions, 0.0), seconds)
+
+    def to_dict(self):
+        candidate = self.get_candidate()
+        return {
+            "candidate_version": candidate.version if candidate is not None else None,
+            "sample_rate": self.sample_rate,
+            "max_queue": self.max_queue,
+            "queue_depth": self.queue_depth,
+            "sampled_requests": self.sampled,
+            "errors": self.errors,
+            "dropped_rows": dict(self.dropped),
+            "comparisons": [
+                {"served_version": served, "candidate_version": cand, **stats.to_dict()}
+                for (served, cand), stats in self.comparisons.items()
+            ],
+        }
@@ -2,10 +2,18 @@
 """
 Startup script for the ML Service on Render
 Handles port configuration automatically
+
+Runs a single uvicorn process by default. With WEB_CONCURRENCY set (a
+number, or "auto" for one per available CPU), serves from that many
+pre-forked workers that share a single in-memory copy of the models; see
+prefork.py.
 """
 import os
+
 import uvicorn
 
+import prefork
+
 if __name__ == "__main__":
     # Get port from environment, handle various formats
     port = os.environ.get('PORT', '8001')
@@ -16,12 +24,25 @@ if __name__ == "__main__":
     
     port = int(port)
     
-    print(f"🚀 Starting ML Service on port {port}")
-    
-    uvicorn.run(
-        "app:app",
-        host="0.0.0.0",
-        port=port,
-        log_level="info",
-        access_log=True
-    )
\ No newline at end of file
+    if "WEB_CONCURRENCY" not in os.environ:
+        print(f"🚀 Starting ML Service on port {port}")
+        
+        uvicorn.run(
+            "app:app",
+            host="0.0.0.0",
+            port=port,
+            log_level="info",
+            access_log=True
+        )
+    else:
+        workers = prefork.default_worker_count()
+        
+        print(f"🚀 Starting ML Service on port {port} with {workers} workers")
+        
+        prefork.serve(
+            host="0.0.0.0",
+            port=port,
+            workers=workers,
+            log_level="info",
+            access_log=True
+        )
@@ -0,0 +1,63 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_ARTIFACTS = os.path.join(os.path.dirname(SERVICE_DIR), "model_artifacts")
+
+# The service modules are flat files imported from ml-service/
+sys.path.insert(0, SERVICE_DIR)
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    """A private copy of the shipped model artifacts"""
+    directory = tmp_path / "models"
+    shutil.copytree(MODEL_ARTIFACTS, directory)
+    return directory
+
+
+@pytest.fixture
+def service(model_dir, monkeypatch):
+    """
+    Start the app on fresh models, caches, executor and batcher; returns start(**settings).
+
+    settings override module-level configuration of app.py (e.g.
+    CACHE_ENABLED=False) before startup. start() returns a TestClient whose
+    startup and shutdown handlers have run.
+    """
+    from fastapi.testclient import TestClient
+
+    import app
+    from drift import DriftMonitor
+    from executor import ModelExecutor
+    from microbatch import MicroBatcher
+    from prediction_cache import PredictionCache
+    from registry import ModelRegistry
+    from shadow import ShadowScorer
+
+    clients = []
+
+    def start(**settings):
+        monkeypatch.setattr(app, "model_registry", ModelRegistry(model_dir=str(model_dir)))
+        monkeypatch.setattr(app, "prediction_cache", PredictionCache())
+        monkeypatch.setattr(app, "surface_cache", PredictionCache(max_size=app.WHATIF_CACHE_SIZE))
+        monkeypatch.setattr(app, "drift_monitor", DriftMonitor())
+        monkeypatch.setattr(app, "model_executor", ModelExecutor(retry_after=app.EXECUTOR_RETRY_AFTER))
+        for name, value in settings.items():
+            monkeypatch.setattr(app, name, value)
+        monkeypatch.setattr(app, "micro_batcher", MicroBatcher(executor=app.model_executor))
+        monkeypatch.setattr(app, "shadow_scorer", ShadowScorer(
+            app._shadow_candidate, sample_rate=app.SHADOW_SAMPLE_RATE, executor=app.model_executor
+        ))
+
+        client = TestClient(app.app)
+        client.__enter__()
+        clients.append(client)
+        return client
+
+    yield start
+    for client in clients:
+        client.__exit__(None, None, None)
@@ -0,0 +1,143 @@
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+
+import pytest
+
+import async_logging
+from async_logging import DeferredQueueHandler, JsonFormatter, LogSampler, configure_logging, stop_logging
+
+
+class RecordsThread:
+    """Log argument that notes which thread turned it into text"""
+
+    def __init__(self):
+        self.threads = []
+
+    def __str__(self):
+        self.threads.append(threading.current_thread())
+        return "formatted"
+
+
+def record(level=logging.INFO, msg="scored %s", args=("row",)):
+    return logging.LogRecord("test", level, __file__, 1, msg, args, None)
+
+
+@pytest.fixture
+def log_to_file(tmp_path):
+    """
+    Returns start(**options): configure_logging writing to a file, whose path it returns.
+
+    The app's logging configuration is restored afterwards.
+    """
+    root = logging.getLogger()
+    saved = root.handlers[:], root.level, async_logging._listener, async_logging._queue_handler
+    path = tmp_path / "log.txt"
+    stream = open(path, "w")
+
+    def start(**options):
+        configure_logging(**options)
+        # sys.stderr belongs to pytest's capture, so swap the writer's stream instead
+        async_logging._listener.handlers[0].setStream(stream)
+        return path
+
+    yield start
+
+    stop_logging()
+    stream.close()
+    root.handlers[:], level, async_logging._listener, async_logging._queue_handler = saved
+    root.setLevel(level)
+    if async_logging._listener is not None:
+        # configure_logging stopped it; QueueListener can be started again
+        async_logging._listener.start()
+
+
+def test_emit_enqueues_the_record_without_formatting_it():
+    log_queue = queue.SimpleQueue()
+    handler = DeferredQueueHandler(log_queue)
+    argument = RecordsThread()
+    logged = record(args=(argument,))
+
+    handler.handle(logged)
+
+    assert log_queue.get_nowait() is logged
+    assert logged.args == (argument,) and argument.threads == []
+
+
+def test_info_records_are_dropped_once_max_pending_are_waiting():
+    log_queue = queue.SimpleQueue()
+    handler = DeferredQueueHandler(log_queue, max_pending=2)
+
+    for _ in range(5):
+        handler.handle(record())
+    handler.handle(record(logging.WARNING))
+    handler.handle(record(logging.ERROR))
+
+    assert handler.dropped == 3
+    assert [log_queue.get_nowait().levelno for _ in range(log_queue.qsize())] == [
+        logging.INFO, logging.INFO, logging.WARNING, logging.ERROR,
+    ]
+
+
+def test_records_are_formatted_and_written_by_the_listener_thread(log_to_file):
+    log_file = log_to_file(level="INFO")
+    argument = RecordsThread()
+
+    logging.getLogger("test").info("scored %s", argument)
+    logging.getLogger("test").debug("below the level")
+    stop_logging()
+
+    assert log_file.read_text() == "INFO:test:scored formatted\n"
+    assert argument.threads and threading.current_thread() not in argument.threads
+
+
+def test_json_lines_carry_extra_fields(log_to_file):
+    log_file = log_to_file(level="INFO", json_lines=True)
+
+    logging.getLogger("test").warning("slow batch", extra={"rows": 250, "model_version": "v1"})
+    stop_logging()
+
+    entry = json.loads(log_file.read_text())
+    assert entry["level"] == "WARNING" and entry["logger"] == "test"
+    assert entry["message"] == "slow batch"
+    assert (entry["rows"], entry["model_version"]) == (250, "v1")
+    assert entry["time"].endswith("Z")
+
+
+def test_json_formatter_includes_the_exception():
+    try:
+        raise ValueError("bad row")
+    except ValueError:
+        logged = logging.LogRecord("test", logging.ERROR, __file__, 1, "failed", (), sys.exc_info())
+
+    entry = json.loads(JsonFormatter().format(logged))
+
+    assert "ValueError: bad row" in entry["exception"]
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork()")
+def test_forked_child_gets_a_working_writer_thread(log_to_file):
+    log_file = log_to_file(level="INFO")
+    logging.getLogger("test").info("from parent")
+
+    pid = os.fork()
+    if pid == 0:
+        try:
+            logging.getLogger("test").info("from child")
+            stop_logging()
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
+    stop_logging()
+
+    lines = log_file.read_text().splitlines()
+    assert sorted(lines) == ["INFO:test:from child", "INFO:test:from parent"]
+
+
+def test_sampler_rates():
+    assert all(LogSampler(1.0).sample() for _ in range(100))
+    assert not any(LogSampler(0.0).sample() for _ in range(100))
+    assert 200 < sum(LogSampler(0.5).sample() for _ in range(1000)) < 800
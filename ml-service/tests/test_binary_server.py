@@ -0,0 +1,117 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from binary_server import (
+    LENGTH, RESPONSE_HEADER, BinaryPredictionServer, FrameError, _decode_request, _encode_response,
+    bind_listener, decode_response, encode_request,
+)
+
+ROWS = np.array([[2.0, 4, 8.0], [3.5, 6, 10.0]])
+
+
+def test_request_round_trip():
+    frame = encode_request(ROWS, "v2")
+    (length,) = LENGTH.unpack_from(frame)
+    payload = frame[LENGTH.size:]
+
+    assert length == len(payload)
+    features, version = _decode_request(payload)
+    np.testing.assert_array_equal(features, ROWS)
+    assert version == "v2"
+    assert _decode_request(encode_request(ROWS)[LENGTH.size:])[1] is None
+
+
+@pytest.mark.parametrize("payload", [
+    b"\x01",
+    encode_request(ROWS)[LENGTH.size:-1],
+    b"\x05\x00v",
+    b"\x02\x00\xff\xfe",
+])
+def test_malformed_requests(payload):
+    with pytest.raises(FrameError) as error:
+        _decode_request(payload)
+    assert error.value.status == 400
+
+
+def test_response_round_trip():
+    frame = _encode_response(200, b"\x02\x00v1" + np.array([180.25, 244.0]).tobytes())
+    length, status = RESPONSE_HEADER.unpack_from(frame)
+
+    predictions, version = decode_response(status, frame[RESPONSE_HEADER.size:])
+    assert length == len(frame) - RESPONSE_HEADER.size
+    np.testing.assert_array_equal(predictions, [180.25, 244.0])
+    assert version == "v1"
+
+    with pytest.raises(FrameError) as error:
+        decode_response(422, json.dumps({"detail": "invalid"}).encode("utf-8"))
+    assert error.value.status == 422 and error.value.detail == {"detail": "invalid"}
+
+
+async def score(features, version):
+    if version == "missing":
+        raise FrameError(404, "Unknown model version")
+    return features.sum(axis=1), version or "v1"
+
+
+async def exchange(path, frames):
+    reader, writer = await asyncio.open_unix_connection(path)
+    # Pipelined: every frame is sent before any response is read
+    writer.write(b"".join(frames))
+    await writer.drain()
+    responses = []
+    for _ in frames:
+        length, status = RESPONSE_HEADER.unpack(await reader.readexactly(RESPONSE_HEADER.size))
+        responses.append((status, await reader.readexactly(length)))
+    writer.close()
+    return responses
+
+
+def test_server_answers_pipelined_frames_in_order(tmp_path):
+    path = str(tmp_path / "ecometer.sock")
+
+    async def run():
+        server = BinaryPredictionServer(score)
+        await server.start(bind_listener(path))
+        try:
+            return await exchange(path, [
+                encode_request(ROWS),
+                encode_request(ROWS[:1], "missing"),
+                encode_request(ROWS * 2, "v2"),
+            ]), server.to_dict()
+        finally:
+            server.close()
+
+    responses, stats = asyncio.run(run())
+
+    predictions, version = decode_response(*responses[0])
+    np.testing.assert_array_equal(predictions, ROWS.sum(axis=1))
+    assert version == "v1"
+    assert responses[1] == (404, json.dumps("Unknown model version").encode("utf-8"))
+    predictions, version = decode_response(*responses[2])
+    np.testing.assert_array_equal(predictions, 2 * ROWS.sum(axis=1))
+    assert version == "v2"
+    assert (stats["frames"], stats["rows"], stats["errors"]) == (3, 4, 1)
+
+
+def test_oversized_frame_closes_the_connection(tmp_path):
+    path = str(tmp_path / "ecometer.sock")
+
+    async def run():
+        server = BinaryPredictionServer(score, max_frame_bytes=32)
+        await server.start(bind_listener(path))
+        try:
+            reader, writer = await asyncio.open_unix_connection(path)
+            writer.write(encode_request(np.ones((10, 3))))
+            await writer.drain()
+            length, status = RESPONSE_HEADER.unpack(await reader.readexactly(RESPONSE_HEADER.size))
+            await reader.readexactly(length)
+            closed = await reader.read() == b""
+            writer.close()
+            return status, closed
+        finally:
+            server.close()
+
+    assert asyncio.run(run()) == (413, True)
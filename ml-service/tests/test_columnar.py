@@ -0,0 +1,107 @@
+import io
+
+import numpy as np
+import pytest
+
+from columnar import (
+    NPY_MEDIA_TYPE, RAW_MEDIA_TYPE, BatchFormatError, encode_binary, parse_binary, parse_columns,
+    validate_features,
+)
+
+VALID = np.array([[2.0, 4, 8.0], [3.5, 6, 10.0], [20.0, 16, 50.0]])
+
+
+def npy_bytes(array):
+    out = io.BytesIO()
+    np.save(out, array)
+    return out.getvalue()
+
+
+def test_valid_rows_pass():
+    assert validate_features(VALID) == []
+
+
+def test_every_violated_constraint_is_reported_once():
+    features = np.array([
+        [0.0, 4, 8.0],       # ENGINESIZE gt 0
+        [2.0, 2, 8.0],       # CYLINDERS ge 3
+        [2.0, 4.5, 8.0],     # CYLINDERS integer
+        [2.0, 4, 50.5],      # FUELCONSUMPTION_COMB le 50
+        [np.nan, 4, 8.0],    # ENGINESIZE finite, and nothing else
+        [2.0, 4, np.inf],    # FUELCONSUMPTION_COMB finite, and nothing else
+    ])
+
+    errors = {(e["field"], e["constraint"]): e["rows"] for e in validate_features(features)}
+
+    assert errors == {
+        ("ENGINESIZE", "finite"): [4],
+        ("ENGINESIZE", "gt 0"): [0],
+        ("CYLINDERS", "ge 3"): [1],
+        ("CYLINDERS", "integer"): [2],
+        ("FUELCONSUMPTION_COMB", "finite"): [5],
+        ("FUELCONSUMPTION_COMB", "le 50"): [3],
+    }
+
+
+def test_reported_rows_are_capped():
+    features = np.repeat(VALID[:1], 25, axis=0)
+    features[:, 0] = -1.0
+
+    (error,) = validate_features(features)
+
+    assert error["count"] == 25
+    assert error["rows"] == list(range(10))
+
+
+def test_parse_columns():
+    columns = {
+        "ENGINESIZE": [2.0, 3.5],
+        "CYLINDERS": [4, 6],
+        "FUELCONSUMPTION_COMB": [8.0, 10.0],
+    }
+    np.testing.assert_array_equal(parse_columns(columns), VALID[:2])
+
+    columns["CYLINDERS"] = [4]
+    with pytest.raises(BatchFormatError):
+        parse_columns(columns)
+
+
+def test_parse_raw_rows_without_copying():
+    body = VALID.tobytes()
+    features, media_type = parse_binary(body)
+
+    assert media_type == RAW_MEDIA_TYPE
+    np.testing.assert_array_equal(features, VALID)
+    assert not features.flags.owndata
+
+
+@pytest.mark.parametrize("array", [VALID, np.asfortranarray(VALID)])
+def test_parse_npy(array):
+    features, media_type = parse_binary(npy_bytes(array))
+
+    assert media_type == NPY_MEDIA_TYPE
+    np.testing.assert_array_equal(features, VALID)
+
+
+@pytest.mark.parametrize("body", [
+    VALID.tobytes()[:-1],
+    npy_bytes(VALID.astype(np.float32)),
+    npy_bytes(VALID[:, :2]),
+    npy_bytes(VALID)[:-8],
+    b"\x93NUMPY\x09\x00garbage",
+])
+def test_malformed_bodies_are_rejected(body):
+    with pytest.raises(BatchFormatError):
+        parse_binary(body)
+
+
+@pytest.mark.parametrize("media_type", [RAW_MEDIA_TYPE, NPY_MEDIA_TYPE])
+def test_encode_round_trip(media_type):
+    predictions = np.array([180.25, 244.0, 350.5])
+    body = encode_binary(predictions, media_type)
+
+    if media_type == NPY_MEDIA_TYPE:
+        decoded = np.load(io.BytesIO(body))
+    else:
+        decoded = np.frombuffer(body, dtype="<f8")
+    np.testing.assert_array_equal(decoded, predictions)
@@ -0,0 +1,107 @@
+import joblib
+import numpy as np
+import pytest
+from sklearn.linear_model import Ridge
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import PolynomialFeatures, StandardScaler
+
+import metrics
+from dedup import should_dedup, unique_rows
+from predictor import LinearPredictor
+
+SPECS = np.array([
+    [2.0, 4, 8.5],
+    [3.5, 6, 11.2],
+    [5.7, 8, 15.0],
+    [1.6, 4, 7.1],
+])
+
+
+def fleet(n, seed=0):
+    """n rows drawn from a handful of specs, in shuffled order"""
+    return SPECS[np.random.default_rng(seed).integers(0, len(SPECS), n)]
+
+
+def test_unique_rows_restore_the_original_order():
+    features = fleet(500)
+
+    unique, inverse = unique_rows(features)
+
+    assert len(unique) == len(SPECS)
+    assert inverse.shape == (500,)
+    np.testing.assert_array_equal(unique[inverse], features)
+
+
+def test_signed_zeros_and_nans_are_never_merged_with_other_rows():
+    features = np.array([[0.0, 4, 8.5], [-0.0, 4, 8.5], [np.nan, 4, 8.5], [0.0, 4, 8.5]])
+
+    unique, inverse = unique_rows(features)
+
+    assert len(unique) == 3
+    assert inverse[0] == inverse[3]
+    np.testing.assert_array_equal(unique[inverse].view(np.uint64), features.view(np.uint64))
+
+
+def test_fused_linear_models_and_small_batches_are_not_collapsed():
+    linear = LinearPredictor(np.array([12.0, 6.0, 15.0]), 40.0)
+
+    assert not should_dedup(linear, 10_000, 1000)
+    assert not should_dedup(object(), 999, 1000)
+    assert should_dedup(object(), 1000, 1000)
+
+
+def counted(route):
+    return (metrics.DEDUP_ROWS._values.get((route,), 0),
+            metrics.DEDUP_UNIQUE_ROWS._values.get((route,), 0))
+
+
+@pytest.fixture
+def pipeline(model_dir):
+    """A non-affine v2 model, so batches are eligible for collapsing"""
+    rng = np.random.default_rng(0)
+    features = np.column_stack([rng.uniform(1, 8, 200), rng.integers(3, 13, 200), rng.uniform(4, 25, 200)])
+    fitted = Pipeline([
+        ("poly", PolynomialFeatures(degree=2, include_bias=False)),
+        ("scaler", StandardScaler()),
+        ("regressor", Ridge(alpha=1.0)),
+    ]).fit(features, features @ [12.0, 6.0, 15.0] + 40.0)
+    joblib.dump(fitted, model_dir / "fuel_co2_pipeline_v2.pkl")
+    return fitted
+
+
+def columnar(features):
+    return {
+        "ENGINESIZE": features[:, 0].tolist(),
+        "CYLINDERS": features[:, 1].astype(int).tolist(),
+        "FUELCONSUMPTION_COMB": features[:, 2].tolist(),
+    }
+
+
+def test_collapsed_batches_answer_in_request_order(service, pipeline):
+    features = fleet(300, seed=1)
+    route = "/batch-predict/columnar"
+    request = {"params": {"version": "v2"}, "json": columnar(features)}
+    before = counted(route)
+
+    collapsed = service(DEDUP_MIN_ROWS=10).post(route, **request).json()["predictions"]
+    after = counted(route)
+    scored_every_row = service(DEDUP_ENABLED=False).post(route, **request).json()["predictions"]
+
+    assert collapsed == scored_every_row
+    np.testing.assert_allclose(collapsed, np.round(pipeline.predict(features), 2), atol=0.01)
+    assert (after[0] - before[0], after[1] - before[1]) == (300, len(SPECS))
+    assert counted(route) == after
+
+
+def test_what_if_grids_skip_collapsing(service, pipeline):
+    client = service(DEDUP_MIN_ROWS=1)
+    before = counted("/what-if")
+
+    response = client.post("/what-if", params={"version": "v2"}, json={
+        "base": {"ENGINESIZE": 3.5, "CYLINDERS": 6, "FUELCONSUMPTION_COMB": 10.0},
+        "ENGINESIZE": {"min": 1.0, "max": 6.0, "steps": 11},
+        "FUELCONSUMPTION_COMB": {"min": 5.0, "max": 20.0, "steps": 16},
+    })
+
+    assert response.status_code == 200 and response.json()["points"] == 176
+    assert counted("/what-if") == before
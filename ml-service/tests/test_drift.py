@@ -0,0 +1,134 @@
+import numpy as np
+import pytest
+
+from drift import DriftMonitor, _merge, psi, psi_status, reference_bins
+
+MEAN = [3.3, 5.8, 11.6]
+SCALE = [1.4, 1.8, 3.5]
+EDGES = [[2.0, 3.0, 4.0], [4.0, 6.0, 8.0], [8.0, 11.0, 14.0]]
+PROPORTIONS = [[0.25, 0.25, 0.25, 0.25]] * 3
+
+
+def info(**overrides):
+    base = {"scaler_mean": MEAN, "scaler_scale": SCALE,
+            "feature_bins": {"edges": EDGES, "proportions": PROPORTIONS}}
+    base.update(overrides)
+    return {key: value for key, value in base.items() if value is not None}
+
+
+def rows(n, seed=0, shift=0.0):
+    rng = np.random.default_rng(seed)
+    return rng.normal(np.asarray(MEAN) + shift, SCALE, size=(n, 3))
+
+
+def test_psi_matches_definition():
+    counts = np.array([10, 20, 30, 40])
+    expected = np.array([0.25, 0.25, 0.25, 0.25])
+    actual = counts / counts.sum()
+
+    assert psi(counts, expected) == pytest.approx(np.sum((actual - expected) * np.log(actual / expected)))
+    assert psi(np.array([25, 25, 25, 25]), expected) == 0.0
+    assert np.isfinite(psi(np.array([0, 0, 0, 100]), expected))
+    assert [psi_status(v) for v in (0.05, 0.1, 0.3)] == ["stable", "moderate", "significant"]
+
+
+def test_merge_matches_statistics_of_the_whole():
+    data = rows(500)
+    parts = np.array_split(data, [7, 130, 131, 400])
+
+    count, mean, m2 = 0, np.zeros(3), np.zeros(3)
+    for part in parts:
+        centered = part - part.mean(axis=0)
+        count, mean, m2 = _merge(count, mean, m2, len(part), part.mean(axis=0), (centered ** 2).sum(axis=0))
+
+    assert count == 500
+    np.testing.assert_allclose(mean, data.mean(axis=0), rtol=1e-12)
+    np.testing.assert_allclose(m2 / count, data.var(axis=0), rtol=1e-10)
+
+
+def test_reference_bins_sources():
+    assert reference_bins(info())[2] == "training"
+
+    edges, proportions, source = reference_bins(info(feature_bins=None))
+    assert source == "normal"
+    assert [len(e) for e in edges] == [9, 9, 9]
+    np.testing.assert_allclose([p.sum() for p in proportions], 1.0)
+
+
+@pytest.mark.parametrize("overrides", [
+    {"scaler_mean": None},
+    {"scaler_mean": MEAN * 3, "scaler_scale": SCALE * 3},  # PolynomialFeatures(degree=2) output
+    {"feature_bins": {"edges": EDGES[:2], "proportions": PROPORTIONS[:2]}},
+    {"feature_bins": {"edges": EDGES, "proportions": PROPORTIONS[:2]}},
+])
+def test_reference_bins_reject_statistics_that_are_not_one_per_feature(overrides):
+    assert reference_bins(info(**overrides)) is None
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_window_and_lifetime_statistics():
+    clock = Clock()
+    monitor = DriftMonitor(bucket_seconds=60, windows=3, buffer_rows=4, min_rows=10, clock=clock)
+    monitor.set_reference("v1", info())
+    batches = [rows(50, seed=i) for i in range(4)]
+
+    for i, batch in enumerate(batches):
+        clock.now = i * 60.0 + 1
+        monitor.observe(batch)
+
+    # The first batch has left the three-bucket window
+    count, mean, m2, bins = monitor.window()
+    in_window = np.concatenate(batches[1:])
+    assert count == len(in_window)
+    np.testing.assert_allclose(mean, in_window.mean(axis=0), rtol=1e-12)
+    np.testing.assert_allclose(m2 / count, in_window.var(axis=0), rtol=1e-10)
+    expected_bins = np.concatenate([
+        np.bincount(np.searchsorted(EDGES[i], in_window[:, i], side="right"), minlength=4) for i in range(3)
+    ])
+    np.testing.assert_array_equal(bins, expected_bins)
+
+    report = monitor.report()
+    assert report["lifetime"]["rows"] == 200
+    assert report["window"]["rows"] == 150
+    assert report["reference"]["source"] == "training"
+
+
+def test_single_rows_are_buffered():
+    monitor = DriftMonitor(buffer_rows=4, min_rows=1, clock=Clock())
+    monitor.set_reference("v1", info())
+    for row in rows(6).tolist():
+        monitor.observe_row(row)
+
+    assert monitor.window()[0] == 4
+    assert monitor.report()["window"]["rows"] == 6
+
+
+def test_shifted_inputs_are_reported():
+    monitor = DriftMonitor(min_rows=100, clock=Clock())
+    monitor.set_reference("v1", info(feature_bins=None))
+
+    monitor.observe(rows(5000, shift=0.0))
+    assert monitor.report()["window"]["status"] == "stable"
+
+    monitor.set_reference("v2", info(feature_bins=None, scaler_mean=[m - 2 for m in MEAN]))
+    monitor.observe(rows(5000))
+    report = monitor.report()["window"]
+    assert report["status"] == "significant"
+    assert report["features"]["ENGINESIZE"]["z_shift"] == pytest.approx(2 / 1.4, abs=0.1)
+
+
+def test_same_reference_keeps_statistics():
+    monitor = DriftMonitor(clock=Clock())
+    monitor.set_reference("v1", info())
+    monitor.observe(rows(10))
+    monitor.set_reference("v2", info())
+
+    assert monitor.window()[0] == 10
+    assert monitor.report()["reference"]["version"] == "v2"
@@ -0,0 +1,240 @@
+import asyncio
+import os
+import threading
+
+import numpy as np
+import pytest
+from sklearn.linear_model import Ridge
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import PolynomialFeatures, StandardScaler
+
+import app
+import executor
+from executor import ExecutorSaturated, ModelExecutor
+from predictor import LinearPredictor, PipelinePredictor
+
+CAR = {"ENGINESIZE": 2.0, "CYLINDERS": 4, "FUELCONSUMPTION_COMB": 8.5}
+
+
+def rows(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.column_stack([rng.uniform(1, 8, n), rng.integers(3, 13, n), rng.uniform(4, 25, n)])
+
+
+def poly_predictor():
+    features = rows(200)
+    pipeline = Pipeline([
+        ("poly", PolynomialFeatures(degree=2, include_bias=False)),
+        ("scaler", StandardScaler()),
+        ("regressor", Ridge(alpha=1.0)),
+    ]).fit(features, features @ [12.0, 6.0, 15.0] + 40.0)
+    return PipelinePredictor(pipeline)
+
+
+LINEAR = LinearPredictor(np.array([12.0, 6.0, 15.0]), 40.0)
+
+
+class BlockingPredictor:
+    """Holds every predict call until released"""
+
+    kind = "test"
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.entered = threading.Semaphore(0)
+
+    def predict(self, features):
+        self.entered.release()
+        self.release.wait(5)
+        return features.sum(axis=1)
+
+
+class PidPredictor:
+    kind = "test"
+
+    def predict(self, features):
+        return np.full(len(features), float(os.getpid()))
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+@pytest.fixture
+def pool():
+    """Returns make(**options): a ModelExecutor shut down after the test"""
+    executors = []
+
+    def make(**options):
+        executors.append(ModelExecutor(**options))
+        return executors[-1]
+
+    yield make
+    for model_executor in executors:
+        model_executor.shutdown()
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError, match="Unknown executor mode"):
+        ModelExecutor(mode="greenlet")
+
+
+@pytest.mark.parametrize("mode", ["thread", "inline"])
+def test_predictions_match_predictor_predict(pool, mode):
+    predictor, features = poly_predictor(), rows(50, seed=1)
+    model_executor = pool(mode=mode, workers=2)
+
+    predictions, seconds = run(model_executor.run(predictor, features))
+
+    np.testing.assert_array_equal(predictions, predictor.predict(features))
+    assert seconds >= 0
+    stats = model_executor.stats
+    assert (stats.submitted, stats.inline, stats.completed) == ((1, 0, 1) if mode == "thread" else (1, 1, 0))
+    assert model_executor.in_flight == 0
+
+
+def test_small_fused_linear_batches_run_inline(pool):
+    model_executor = pool(workers=1, inline_rows=100)
+
+    small, _ = run(model_executor.run(LINEAR, rows(100)))
+    large, _ = run(model_executor.run(LINEAR, rows(101)))
+
+    np.testing.assert_array_equal(small, LINEAR.predict(rows(100)))
+    np.testing.assert_array_equal(large, LINEAR.predict(rows(101)))
+    assert (model_executor.stats.inline, model_executor.stats.completed) == (1, 1)
+
+
+def test_process_mode_scores_in_forked_workers(pool):
+    predictor, features = poly_predictor(), rows(50, seed=2)
+    model_executor = pool(mode="process", workers=1)
+    model_executor.set_models([predictor])
+
+    predictions, _ = run(model_executor.run(predictor, features))
+
+    np.testing.assert_array_equal(predictions, predictor.predict(features))
+    assert executor._published[id(predictor)] is predictor
+
+
+def test_process_mode_republishes_models_loaded_after_the_fork(pool):
+    loaded = poly_predictor()
+    model_executor = pool(mode="process", workers=1)
+    model_executor.set_models([loaded])
+    run(model_executor.run(loaded, rows(5)))
+    forked = model_executor._pool
+    late = PidPredictor()
+
+    (pid, *_), _ = run(model_executor.run(late, rows(3)))
+
+    assert pid != os.getpid()
+    assert executor._published[id(late)] is late
+    assert model_executor._pool is not forked
+
+
+def test_calls_beyond_workers_and_queue_are_rejected(pool):
+    predictor = BlockingPredictor()
+    model_executor = pool(workers=1, max_queue=1, retry_after=7)
+
+    async def scenario():
+        running = asyncio.ensure_future(model_executor.run(predictor, rows(1)))
+        queued = asyncio.ensure_future(model_executor.run(predictor, rows(1)))
+        await asyncio.to_thread(predictor.entered.acquire, True, 5)
+        state = (model_executor.in_flight, model_executor.queue_depth, model_executor.saturated)
+        with pytest.raises(ExecutorSaturated) as excinfo:
+            await model_executor.run(predictor, rows(1))
+        predictor.release.set()
+        await asyncio.gather(running, queued)
+        return state, excinfo.value
+
+    (in_flight, queue_depth, saturated), error = run(scenario())
+
+    assert (in_flight, queue_depth, saturated) == (2, 1, True)
+    assert error.retry_after == 7
+    assert (model_executor.stats.rejected, model_executor.stats.completed) == (1, 2)
+    assert model_executor.in_flight == 0
+
+
+def test_background_calls_never_queue(pool):
+    predictor = BlockingPredictor()
+    model_executor = pool(workers=1, max_queue=10)
+
+    async def scenario():
+        running = asyncio.ensure_future(model_executor.run(predictor, rows(1)))
+        await asyncio.to_thread(predictor.entered.acquire, True, 5)
+        with pytest.raises(ExecutorSaturated):
+            await model_executor.run(poly_predictor(), rows(1), background=True)
+        # Inline work does not need a worker
+        inline, _ = await model_executor.run(LINEAR, rows(3), background=True)
+        predictor.release.set()
+        await running
+        idle, _ = await model_executor.run(LINEAR, rows(3), background=True)
+        return inline, idle
+
+    inline, idle = run(scenario())
+
+    np.testing.assert_array_equal(inline, LINEAR.predict(rows(3)))
+    np.testing.assert_array_equal(idle, inline)
+    # Dropped shadow work is not a rejected request
+    assert model_executor.stats.rejected == 0
+
+
+def test_predict_errors_are_counted_and_release_the_slot(pool):
+    class Failing:
+        kind = "test"
+
+        def predict(self, features):
+            raise RuntimeError("model exploded")
+
+    model_executor = pool(workers=1)
+
+    with pytest.raises(RuntimeError):
+        run(model_executor.run(Failing(), rows(1)))
+
+    assert model_executor.stats.errors == 1 and model_executor.in_flight == 0
+
+
+def hold_every_worker(model_executor):
+    """Occupy the only worker from another thread; returns release()"""
+    predictor = BlockingPredictor()
+    thread = threading.Thread(target=lambda: asyncio.run(model_executor.run(predictor, rows(1))))
+    thread.start()
+    assert predictor.entered.acquire(timeout=5)
+
+    def release():
+        predictor.release.set()
+        thread.join(5)
+
+    return release
+
+
+@pytest.mark.parametrize("status", [503, 429])
+@pytest.mark.parametrize("path, body", [
+    ("/predict", CAR),
+    ("/batch-predict", {"predictions": [CAR, CAR]}),
+])
+def test_saturated_executor_answers_with_retry_after(service, status, path, body):
+    # inline_rows=0 sends even the fused linear model through the pool
+    model_executor = ModelExecutor(workers=1, max_queue=0, inline_rows=0, retry_after=7)
+    client = service(model_executor=model_executor, EXECUTOR_REJECT_STATUS=status, CACHE_ENABLED=False)
+    release = hold_every_worker(model_executor)
+    try:
+        response = client.post(path, json=body)
+    finally:
+        release()
+
+    assert response.status_code == status
+    assert response.headers["Retry-After"] == "7"
+    assert response.json()["detail"] == "Model executor is saturated, retry later"
+    assert client.post(path, json=body).status_code == 200
+    metrics = client.get("/metrics").text
+    assert f'ecometer_executor_rejected_total{{route="{path}"}}' in metrics
+
+
+def test_executor_stats_endpoint(service):
+    client = service(EXECUTOR_REJECT_STATUS=429)
+    client.post("/predict", json=CAR)
+
+    stats = client.get("/executor-stats").json()
+
+    assert stats["reject_status"] == 429 and stats["mode"] == "thread"
+    assert stats["submitted"] >= 1 and stats["in_flight"] == 0 and not stats["saturated"]
+    assert app.model_executor.stats.inline == stats["inline"]
@@ -0,0 +1,88 @@
+import json
+
+import numpy as np
+import pytest
+
+import app
+import fast_response
+
+CARS = [
+    {"ENGINESIZE": 2.0, "CYLINDERS": 4, "FUELCONSUMPTION_COMB": 8.5},
+    {"ENGINESIZE": 3.5, "CYLINDERS": 6, "FUELCONSUMPTION_COMB": 11.2},
+    {"ENGINESIZE": 5.7, "CYLINDERS": 8, "FUELCONSUMPTION_COMB": 15.0},
+]
+
+REQUESTS = [
+    ("/predict", {}, CARS[1]),
+    ("/predict", {"confidence": 0.9}, CARS[1]),
+    ("/batch-predict", {}, {"predictions": CARS}),
+    ("/batch-predict", {"confidence": 0.95}, {"predictions": CARS}),
+    ("/batch-predict/columnar", {}, {name: [car[name] for car in CARS] for name in CARS[0]}),
+]
+
+ENCODERS = ["orjson", "json"] if fast_response.orjson is not None else ["json"]
+
+
+def responses(service, path, params, body, encoder, nan_intervals=False):
+    """The same request answered by the Pydantic path and by the fast path"""
+    if encoder == "json":
+        fast_response.orjson = None
+    bodies = []
+    for fast in (False, True):
+        client = service(FAST_RESPONSE_ENABLED=fast, CACHE_ENABLED=False)
+        if nan_intervals:
+            # A degenerate interval, e.g. from an artifact with zero residual degrees of freedom
+            app.model_registry.get().interval.critical_value = lambda confidence: float("nan")
+        response = client.post(path, params=params, json=body)
+        assert response.status_code == 200, response.text
+        bodies.append(response.content)
+    return bodies
+
+
+@pytest.fixture
+def restore_encoder():
+    encoder = fast_response.orjson
+    yield
+    fast_response.orjson = encoder
+
+
+@pytest.mark.parametrize("encoder", ENCODERS)
+@pytest.mark.parametrize("path, params, body", REQUESTS)
+def test_fast_path_matches_the_pydantic_payload(service, restore_encoder, encoder, path, params, body):
+    slow, fast = responses(service, path, params, body, encoder)
+
+    assert json.loads(fast) == json.loads(slow)
+
+
+@pytest.mark.parametrize("encoder", ENCODERS)
+def test_nan_interval_bounds_are_omitted_from_single_predictions(service, restore_encoder, encoder):
+    slow, fast = responses(service, *REQUESTS[1], encoder, nan_intervals=True)
+
+    payload = json.loads(fast)
+    assert payload == json.loads(slow)
+    assert "lower" not in payload and "upper" not in payload
+    assert payload["confidence"] == 0.9
+
+
+@pytest.mark.parametrize("encoder", ENCODERS)
+def test_nan_interval_bounds_are_null_in_batches(service, restore_encoder, encoder):
+    slow, fast = responses(service, *REQUESTS[3], encoder, nan_intervals=True)
+
+    payload = json.loads(fast)
+    assert payload == json.loads(slow)
+    assert payload["lower"] == payload["upper"] == [None, None, None]
+
+
+def test_omitted_interval_fields_are_absent_on_both_paths(service):
+    slow, fast = responses(service, *REQUESTS[0], ENCODERS[0])
+
+    assert set(json.loads(slow)) == set(json.loads(fast)) == {"prediction", "input_features", "model_version"}
+
+
+@pytest.mark.parametrize("encoder", ENCODERS)
+def test_dumps_encodes_numpy_values_like_the_stdlib(restore_encoder, encoder):
+    if encoder == "json":
+        fast_response.orjson = None
+    content = {"a": np.array([1.25, 0.1, 2.0]), "b": np.float64(3.5), "c": [np.int64(4)]}
+
+    assert json.loads(fast_response.dumps(content)) == {"a": [1.25, 0.1, 2.0], "b": 3.5, "c": [4]}
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from scipy import stats
+
+from intervals import PredictionInterval, t_quantile
+
+
+@pytest.mark.parametrize("df", [10, 30, 100, 1000])
+@pytest.mark.parametrize("p, tolerance", [(0.95, 1e-5), (0.975, 1e-5), (0.995, 1e-4)])
+def test_t_quantile(p, tolerance, df):
+    assert t_quantile(p, df) == pytest.approx(stats.t.ppf(p, df), abs=tolerance)
+
+
+def ols_fixture(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    features = np.column_stack([
+        rng.uniform(1.0, 8.0, n),
+        rng.integers(3, 13, n).astype(np.float64),
+        rng.uniform(4.0, 25.0, n),
+    ])
+    target = features @ np.array([12.0, 6.0, 15.0]) + 40.0 + rng.normal(0, 5, n)
+    design = np.column_stack([np.ones(n), features])
+    beta, *_ = np.linalg.lstsq(design, target, rcond=None)
+    residuals = target - design @ beta
+    df = n - features.shape[1] - 1
+    centered = features - features.mean(axis=0)
+    interval = PredictionInterval(
+        residual_variance=residuals @ residuals / df,
+        degrees_of_freedom=df,
+        n_samples=n,
+        feature_mean=features.mean(axis=0),
+        xtx_inv=np.linalg.pinv(centered.T @ centered),
+    )
+    return interval, design, residuals @ residuals / df, df
+
+
+def textbook_half_width(design, residual_variance, df, rows, confidence):
+    """t · s · sqrt(1 + x0ᵀ (XᵀX)⁻¹ x0) with an explicit intercept column"""
+    x0 = np.column_stack([np.ones(len(rows)), rows])
+    leverage = np.einsum("ij,jk,ik->i", x0, np.linalg.inv(design.T @ design), x0)
+    t = stats.t.ppf(1 - (1 - confidence) / 2, df)
+    return t * np.sqrt(residual_variance * (1 + leverage))
+
+
+@pytest.mark.parametrize("confidence", [0.8, 0.95, 0.99])
+def test_half_width_matches_textbook_formula(confidence):
+    interval, design, residual_variance, df = ols_fixture()
+    rows = np.array([[2.0, 4, 8.0], [3.5, 6, 10.0], [8.4, 12, 25.6], [20.0, 16, 50.0]])
+
+    expected = textbook_half_width(design, residual_variance, df, rows, confidence)
+
+    np.testing.assert_allclose(interval.half_width(rows, confidence), expected, rtol=1e-6)
+    for row, value in zip(rows.tolist(), expected):
+        assert interval.half_width_row(row, confidence) == pytest.approx(value, rel=1e-6)
+
+
+def test_half_width_is_narrowest_at_the_training_mean():
+    interval, *_ = ols_fixture()
+    at_mean = interval.half_width(interval.feature_mean[None, :])[0]
+
+    assert at_mean == pytest.approx(
+        interval.critical_value(0.95) * np.sqrt(interval.residual_variance * (1 + 1 / interval.n_samples))
+    )
+    assert interval.half_width(np.array([[8.0, 12, 25.0]]))[0] > at_mean
@@ -0,0 +1,50 @@
+import numpy as np
+
+from journal import HEADER_SIZE, RECORD_DTYPE, PredictionJournal, encode_records, open_segment, segment_paths
+
+
+def test_encode_records():
+    records = encode_records(12.5, [2.0, 4, 8.0], 180.25, "v-with-a-very-long-name")
+
+    assert len(records) == 1
+    np.testing.assert_array_equal(records["features"][0], [2.0, 4.0, 8.0])
+    assert records["prediction"][0] == 180.25
+    assert records["model_version"][0] == b"v-with-a-very-lo"
+
+
+def test_round_trip_with_rotation(tmp_path):
+    journal = PredictionJournal(str(tmp_path), segment_bytes=HEADER_SIZE + 10 * RECORD_DTYPE.itemsize,
+                                flush_bytes=1, flush_seconds=60)
+    journal.start()
+    batch = np.arange(24, dtype=np.float64).reshape(8, 3)
+    journal.record(batch, batch.sum(axis=1), "v2")
+    for i in range(5):
+        journal.record([float(i), 4.0, 8.0], 100.0 + i, "v1")
+    journal.close()
+
+    records = np.concatenate([open_segment(path) for path in segment_paths(str(tmp_path))])
+
+    assert len(segment_paths(str(tmp_path))) == 2
+    assert journal.stats.records == 13
+    np.testing.assert_array_equal(records["features"][:8], batch)
+    np.testing.assert_array_equal(records["prediction"], np.concatenate([batch.sum(axis=1), 100.0 + np.arange(5)]))
+    assert records["model_version"].tolist() == [b"v2"] * 8 + [b"v1"] * 5
+
+
+def test_truncated_record_is_ignored(tmp_path):
+    journal = PredictionJournal(str(tmp_path), flush_seconds=60)
+    journal.start()
+    journal.record(np.ones((3, 3)), np.ones(3), "v1")
+    journal.close()
+    (path,) = segment_paths(str(tmp_path))
+    with open(path, "ab") as f:
+        f.write(b"\0" * (RECORD_DTYPE.itemsize // 2))
+
+    assert len(open_segment(path)) == 3
+
+
+def test_record_without_writer_is_a_no_op(tmp_path):
+    journal = PredictionJournal(str(tmp_path))
+    journal.record([2.0, 4, 8.0], 180.0, "v1")
+
+    assert journal.stats.requests == 0
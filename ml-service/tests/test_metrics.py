@@ -0,0 +1,117 @@
+import re
+
+import pytest
+
+from metrics import Counter, Gauge, Histogram, MetricsRegistry
+
+CAR = {"ENGINESIZE": 2.0, "CYLINDERS": 4, "FUELCONSUMPTION_COMB": 8.5}
+
+SAMPLE_LINE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{[a-z_]+="(?:[^"\\]|\\.)*"(,[a-z_]+="(?:[^"\\]|\\.)*")*\})? \S+$')
+
+
+def samples(text):
+    """Map 'name{labels}' to value for every sample line of an exposition"""
+    values = {}
+    for line in text.splitlines():
+        if line.startswith("#"):
+            continue
+        series, value = line.rsplit(" ", 1)
+        values[series] = float(value)
+    return values
+
+
+def test_counter_renders_labels_and_escapes_values():
+    counter = Counter("requests_total", "Requests", ("route", "status"))
+    counter.inc("/predict", "200")
+    counter.inc("/predict", "200", amount=2)
+    counter.inc('a"b\\c\nd', "500")
+
+    assert list(counter.samples()) == [
+        'requests_total{route="/predict",status="200"} 3',
+        'requests_total{route="a\\"b\\\\c\\nd",status="500"} 1',
+    ]
+
+
+def test_gauge_without_labels_keeps_the_last_value():
+    gauge = Gauge("in_flight", "In flight")
+    gauge.set(3)
+    gauge.set(1.5)
+
+    assert list(gauge.samples()) == ["in_flight 1.5"]
+
+
+def test_histogram_buckets_are_cumulative_and_end_in_inf():
+    histogram = Histogram("latency_seconds", "Latency", (0.1, 1.0), ("route",))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, "/predict")
+
+    assert list(histogram.samples()) == [
+        'latency_seconds_bucket{route="/predict",le="0.1"} 2',
+        'latency_seconds_bucket{route="/predict",le="1"} 3',
+        'latency_seconds_bucket{route="/predict",le="+Inf"} 4',
+        'latency_seconds_sum{route="/predict"} 3.65',
+        'latency_seconds_count{route="/predict"} 4',
+    ]
+
+
+def test_registry_renders_help_and_type_and_runs_collect_callbacks():
+    registry = MetricsRegistry()
+    gauge = registry.register(Gauge("models", "Loaded models"))
+    registry.register(Counter("unused_total", "Never incremented"))
+    registry.on_collect(lambda: gauge.set(2))
+
+    assert registry.render() == (
+        "# HELP models Loaded models\n"
+        "# TYPE models gauge\n"
+        "models 2\n"
+        "# HELP unused_total Never incremented\n"
+        "# TYPE unused_total counter\n"
+    )
+
+
+@pytest.fixture
+def client(service):
+    return service()
+
+
+def test_metrics_endpoint_serves_the_text_exposition_format(client):
+    client.post("/predict", json=CAR)
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "text/plain; version=0.0.4; charset=utf-8"
+    for line in response.text.splitlines():
+        assert line.startswith(("# HELP ", "# TYPE ")) or SAMPLE_LINE.match(line), line
+    assert "# TYPE ecometer_http_request_duration_seconds histogram" in response.text
+    assert "ecometer_executor_in_flight 0" in response.text.splitlines()
+
+
+def test_requests_are_counted_per_route_method_and_status(client):
+    predict_ok = 'ecometer_http_requests_total{route="/predict",method="POST",status="200"}'
+    predict_invalid = 'ecometer_http_requests_total{route="/predict",method="POST",status="422"}'
+    unknown = 'ecometer_http_requests_total{route="other",method="GET",status="404"}'
+    latency = 'ecometer_http_request_duration_seconds_count{route="/predict"}'
+    before = samples(client.get("/metrics").text)
+
+    client.post("/predict", json=CAR)
+    client.post("/predict", json=CAR)
+    client.post("/predict", json={**CAR, "CYLINDERS": 2})
+    client.get("/no-such-route/123")
+    after = samples(client.get("/metrics").text)
+
+    assert after[predict_ok] - before.get(predict_ok, 0) == 2
+    assert after[predict_invalid] - before.get(predict_invalid, 0) == 1
+    assert after[unknown] - before.get(unknown, 0) == 1
+    assert after[latency] - before.get(latency, 0) == 3
+    assert not any('route="/no-such-route' in series for series in after)
+
+
+def test_batch_sizes_and_load_times_are_exported(client):
+    batch = 'ecometer_batch_size_rows_count{route="/batch-predict"}'
+    before = samples(client.get("/metrics").text)
+
+    client.post("/batch-predict", json={"predictions": [CAR, CAR, CAR]})
+    after = samples(client.get("/metrics").text)
+
+    assert after[batch] - before.get(batch, 0) == 1
+    assert after['ecometer_model_load_duration_seconds{version="v1"}'] > 0
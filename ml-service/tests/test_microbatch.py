@@ -0,0 +1,181 @@
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+from executor import ExecutorSaturated, ModelExecutor
+from microbatch import MicroBatcher
+
+
+class RecordingPredictor:
+    """Sums each row and records the batches it was called with"""
+
+    kind = "test"
+
+    def __init__(self, offset=0.0, error=None):
+        self.offset = offset
+        self.error = error
+        self.batches = []
+
+    def predict(self, features):
+        self.batches.append(features.copy())
+        if self.error is not None:
+            raise self.error
+        return features.sum(axis=1) + self.offset
+
+
+class BlockingPredictor(RecordingPredictor):
+    """Holds every predict call on the executor until released"""
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+        self.entered = threading.Event()
+
+    def predict(self, features):
+        self.entered.set()
+        self.release.wait(5)
+        return super().predict(features)
+
+
+def rows(n):
+    return [[float(i), 4.0, 8.0] for i in range(n)]
+
+
+def test_concurrent_calls_are_coalesced_into_one_predict():
+    predictor = RecordingPredictor()
+    batcher = MicroBatcher(max_batch_size=64)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(row, predictor) for row in rows(10)))
+
+    results = asyncio.run(run())
+
+    assert results == [sum(row) for row in rows(10)]
+    assert len(predictor.batches) == 1
+    np.testing.assert_array_equal(predictor.batches[0], rows(10))
+    assert batcher.stats.batches == 1 and batcher.stats.rows == 10
+
+
+def test_full_batches_are_flushed_at_max_batch_size():
+    predictor = RecordingPredictor()
+    batcher = MicroBatcher(max_batch_size=4)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(row, predictor) for row in rows(10)))
+
+    asyncio.run(run())
+
+    assert [len(batch) for batch in predictor.batches] == [4, 4, 2]
+
+
+@pytest.mark.parametrize("offloaded", [False, True])
+def test_lone_request_is_scored_without_waiting(offloaded):
+    predictor = RecordingPredictor()
+    executor = ModelExecutor(workers=1) if offloaded else None
+    # A max_wait the test would time out on, if the lone request waited for it
+    batcher = MicroBatcher(max_wait_us=60_000_000, executor=executor)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        call_later = loop.call_later
+        delays = []
+        loop.call_later = lambda delay, *args, **kwargs: delays.append(delay) or call_later(delay, *args, **kwargs)
+        return await batcher.submit([2.0, 4.0, 8.0], predictor), delays
+
+    try:
+        result, delays = asyncio.run(run())
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    assert result == 14.0
+    assert delays == []
+    assert batcher.stats.max_wait_s < 1.0
+
+
+def test_rows_wait_behind_a_batch_in_flight_and_are_scored_together():
+    predictor = BlockingPredictor()
+    executor = ModelExecutor(workers=1)
+    batcher = MicroBatcher(max_wait_us=60_000_000, executor=executor)
+
+    async def run():
+        first = asyncio.ensure_future(batcher.submit([1.0, 4.0, 8.0], predictor))
+        await asyncio.to_thread(predictor.entered.wait, 5)
+        # Queued while the first batch holds the only worker
+        rest = [asyncio.ensure_future(batcher.submit(row, predictor)) for row in rows(5)]
+        await asyncio.sleep(0.05)
+        predictor.release.set()
+        return await asyncio.wait_for(asyncio.gather(first, *rest), timeout=5)
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        executor.shutdown()
+
+    assert results == [13.0] + [sum(row) for row in rows(5)]
+    # The finished batch flushed the waiting rows instead of the 60 s timer
+    assert [len(batch) for batch in predictor.batches] == [1, 5]
+    assert not batcher._tasks
+
+
+def test_rows_are_scored_once_per_predictor():
+    first, second = RecordingPredictor(), RecordingPredictor(offset=1000.0)
+    batcher = MicroBatcher()
+
+    async def run():
+        calls = [batcher.submit(row, first if i % 2 else second) for i, row in enumerate(rows(6))]
+        return await asyncio.gather(*calls)
+
+    results = asyncio.run(run())
+
+    assert results == [sum(row) + (0.0 if i % 2 else 1000.0) for i, row in enumerate(rows(6))]
+    np.testing.assert_array_equal(first.batches[0], rows(6)[1::2])
+    np.testing.assert_array_equal(second.batches[0], rows(6)[0::2])
+    assert (len(first.batches), len(second.batches)) == (1, 1)
+
+
+@pytest.mark.parametrize("offloaded", [False, True])
+def test_predict_error_reaches_every_waiter(offloaded):
+    predictor = RecordingPredictor(error=ValueError("model exploded"))
+    executor = ModelExecutor(workers=1) if offloaded else None
+    batcher = MicroBatcher(executor=executor)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(row, predictor) for row in rows(3)),
+                                    return_exceptions=True)
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    assert len(predictor.batches) == 1
+    assert all(isinstance(result, ValueError) for result in results)
+    assert batcher.stats.errors == 1
+
+
+def test_executor_saturation_reaches_every_waiter():
+    predictor = BlockingPredictor()
+    executor = ModelExecutor(workers=1, max_queue=0)
+    batcher = MicroBatcher(executor=executor)
+
+    async def run():
+        # Hold the only worker; no queue slot is left for the batch
+        busy = asyncio.ensure_future(executor.run(predictor, np.ones((1, 3))))
+        await asyncio.to_thread(predictor.entered.wait, 5)
+        results = await asyncio.gather(*(batcher.submit(row, predictor) for row in rows(3)),
+                                       return_exceptions=True)
+        predictor.release.set()
+        await busy
+        return results
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        executor.shutdown()
+
+    assert all(isinstance(result, ExecutorSaturated) for result in results)
+    assert executor.stats.rejected == 1
@@ -0,0 +1,65 @@
+from prediction_cache import PredictionCache
+
+
+def test_key_is_canonical():
+    cache = PredictionCache(decimals=6)
+
+    assert cache.key("abc", 2, 4.0, 8) == cache.key("abc", 2.0000000001, 4, 8.0)
+    assert cache.key("abc", 2.0, 4, 8.0) != cache.key("abc", 2.0, 4, 8.1)
+    assert cache.key("abc", 2.0, 4, 8.0) != cache.key("def", 2.0, 4, 8.0)
+
+
+def test_lru_eviction():
+    cache = PredictionCache(max_size=2)
+    cache.set_models(["m"])
+    a, b, c = (cache.key("m", size, 4, 8.0) for size in (1.0, 2.0, 3.0))
+
+    cache.put(a, 1.0)
+    cache.put(b, 2.0)
+    assert cache.get(a) == 1.0
+    cache.put(c, 3.0)
+
+    assert cache.get(b) is None
+    assert cache.get(a) == 1.0
+    assert cache.get(c) == 3.0
+    assert cache.evictions == 1
+
+
+def test_set_models_drops_entries_of_unloaded_models():
+    cache = PredictionCache()
+    cache.set_models(["old", "kept"])
+    old, kept = cache.key("old", 2.0, 4, 8.0), cache.key("kept", 2.0, 4, 8.0)
+    cache.put(old, 1.0)
+    cache.put(kept, 2.0)
+
+    cache.set_models(["kept", "new"])
+
+    assert cache.get(old) is None
+    assert cache.get(kept) == 2.0
+    assert cache.invalidations == 1
+
+
+def test_put_ignores_models_that_are_not_loaded():
+    cache = PredictionCache()
+    cache.set_models(["current"])
+    late = cache.key("replaced", 2.0, 4, 8.0)
+
+    cache.put(late, 1.0)
+
+    assert cache.get(late) is None
+    assert cache.to_dict()["size"] == 0
+
+
+def test_ttl_expiry(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("prediction_cache.time.monotonic", lambda: now[0])
+    cache = PredictionCache(ttl_seconds=10)
+    cache.set_models(["m"])
+    key = cache.key("m", 2.0, 4, 8.0)
+    cache.put(key, 1.0)
+
+    now[0] = 109.0
+    assert cache.get(key) == 1.0
+    now[0] = 110.0
+    assert cache.get(key) is None
+    assert cache.expirations == 1
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+from sklearn.linear_model import LinearRegression, Ridge
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import PolynomialFeatures, StandardScaler
+
+from predictor import PARITY_PROBE, LinearPredictor, PipelinePredictor, build_predictor
+
+
+def training_rows(n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    features = np.column_stack([
+        rng.uniform(1.0, 8.0, n),
+        rng.integers(3, 13, n).astype(np.float64),
+        rng.uniform(4.0, 25.0, n),
+    ])
+    target = features @ np.array([12.0, 6.0, 15.0]) + 40.0 + rng.normal(0, 5, n)
+    return features, target
+
+
+def fit(*steps):
+    features, target = training_rows()
+    return Pipeline(list(steps)).fit(features, target)
+
+
+@pytest.mark.parametrize("regressor", [LinearRegression(), Ridge(alpha=10.0)])
+def test_fused_predictor_matches_pipeline(regressor):
+    pipeline = fit(("scaler", StandardScaler()), ("regressor", regressor))
+    predictor = build_predictor(pipeline)
+
+    assert isinstance(predictor, LinearPredictor)
+    features, _ = training_rows(n=1000, seed=1)
+    np.testing.assert_allclose(predictor.predict(features), pipeline.predict(features), rtol=1e-12)
+    np.testing.assert_allclose(predictor.predict(PARITY_PROBE), pipeline.predict(PARITY_PROBE), rtol=1e-12)
+
+
+@pytest.mark.parametrize("scaler", [StandardScaler(with_mean=False), StandardScaler(with_std=False)])
+def test_fused_predictor_with_partial_scaling(scaler):
+    pipeline = fit(("scaler", scaler), ("regressor", LinearRegression()))
+    predictor = build_predictor(pipeline)
+
+    assert isinstance(predictor, LinearPredictor)
+    np.testing.assert_allclose(predictor.predict(PARITY_PROBE), pipeline.predict(PARITY_PROBE), rtol=1e-12)
+
+
+def poly_pipeline():
+    return fit(
+        ("poly", PolynomialFeatures(degree=2, include_bias=False)),
+        ("scaler", StandardScaler()),
+        ("regressor", Ridge(alpha=1.0)),
+    )
+
+
+def test_polynomial_pipeline_falls_back_to_sklearn():
+    pipeline = poly_pipeline()
+    predictor = build_predictor(pipeline)
+
+    assert isinstance(predictor, PipelinePredictor)
+    np.testing.assert_array_equal(predictor.predict(PARITY_PROBE), pipeline.predict(PARITY_PROBE))
+
+
+def test_fingerprint_follows_parameters():
+    a = LinearPredictor([1.0, 2.0, 3.0], 4.0)
+    assert a.fingerprint() == LinearPredictor([1.0, 2.0, 3.0], 4.0).fingerprint()
+    assert a.fingerprint() != LinearPredictor([1.0, 2.0, 3.0], 4.5).fingerprint()
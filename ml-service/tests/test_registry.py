@@ -0,0 +1,204 @@
+import shutil
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.linear_model import LinearRegression, Ridge
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import PolynomialFeatures, StandardScaler
+
+from drift import DriftMonitor, reference_bins
+from registry import FALLBACK_VERSION, ModelRegistry, load_version, pipeline_info
+
+
+def fit(*steps, n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    features = np.column_stack([
+        rng.uniform(1.0, 8.0, n),
+        rng.integers(3, 13, n).astype(np.float64),
+        rng.uniform(4.0, 25.0, n),
+    ])
+    target = features @ np.array([12.0, 6.0, 15.0]) + 40.0 + rng.normal(0, 5, n)
+    return Pipeline(list(steps)).fit(features, target)
+
+
+def test_pipeline_info_of_linear_pipeline():
+    pipeline = fit(("scaler", StandardScaler()), ("regressor", LinearRegression()))
+    info = pipeline_info(pipeline)
+
+    assert info["model_type"] == "Linear Regression with StandardScaler"
+    np.testing.assert_array_equal(info["scaler_mean"], pipeline.named_steps["scaler"].mean_)
+    np.testing.assert_array_equal(info["model_coefficients"], pipeline.named_steps["regressor"].coef_)
+    assert reference_bins(info)[2] == "normal"
+
+
+def poly_pipeline():
+    return fit(
+        ("poly", PolynomialFeatures(degree=2, include_bias=False)),
+        ("scaler", StandardScaler()),
+        ("regressor", Ridge(alpha=1.0)),
+    )
+
+
+def test_pipeline_info_of_polynomial_pipeline_has_no_input_statistics():
+    info = pipeline_info(poly_pipeline())
+
+    assert "scaler_mean" not in info
+    assert "model_coefficients" not in info
+    assert reference_bins(info) is None
+
+
+def test_polynomial_artifact_loads_and_serves_without_drift_reference(tmp_path):
+    path = str(tmp_path / "fuel_co2_pipeline_v1.pkl")
+    joblib.dump(poly_pipeline(), path)
+    model = load_version("v1", path)
+
+    monitor = DriftMonitor()
+    monitor.set_reference(model.version, model.info)
+    features = np.array([[2.0, 4, 8.0], [3.5, 6, 10.0], [5.0, 8, 15.0]])
+    monitor.observe(features)
+    monitor.observe_row(features[0].tolist())
+
+    assert monitor.reference is None
+    assert monitor.report() == {"reference": None, "window": None, "lifetime": None}
+    assert np.all(np.isfinite(model.predictor.predict(features)))
+
+
+def add_version(model_dir, version, source="v1"):
+    shutil.copy(model_dir / f"fuel_co2_pipeline_{source}.json", model_dir / f"fuel_co2_pipeline_{version}.json")
+
+
+def test_compact_artifact_is_preferred_over_pickle(model_dir):
+    registry = ModelRegistry(model_dir=str(model_dir))
+    summary = registry.refresh()
+
+    assert summary["loaded"] == ["v1"] and summary["default"] == "v1"
+    assert registry.get().path.endswith(".json")
+    assert registry.get().pipeline is None
+
+
+def test_refresh_picks_up_a_new_artifact_and_keeps_unchanged_ones(model_dir):
+    registry = ModelRegistry(model_dir=str(model_dir))
+    registry.refresh()
+    v1 = registry.get("v1")
+    assert not registry.has_changes()
+
+    add_version(model_dir, "v2")
+    assert registry.has_changes()
+    summary = registry.refresh()
+
+    assert summary["loaded"] == ["v2"]
+    assert registry.default_version == "v2"
+    assert registry.get("v1") is v1
+
+
+def test_refresh_swaps_versions_and_default_as_a_whole(model_dir):
+    registry = ModelRegistry(model_dir=str(model_dir))
+    registry.refresh()
+    before = registry._state
+    published = dict(before[0])
+
+    add_version(model_dir, "v2")
+    registry.refresh()
+
+    # Readers holding the old state see it unchanged
+    assert before[0] == published and before[1] == "v1"
+    assert registry._state is not before
+
+
+def test_corrupt_artifact_keeps_the_loaded_model_and_is_not_retried(model_dir):
+    registry = ModelRegistry(model_dir=str(model_dir))
+    registry.refresh()
+    v1 = registry.get("v1")
+
+    (model_dir / "fuel_co2_pipeline_v1.json").write_text("{not an artifact")
+    summary = registry.refresh()
+
+    assert list(summary["failed"]) == ["v1"]
+    assert registry.get("v1") is v1
+    # The failed stamp is remembered, so the watcher does not reload it again
+    assert not registry.has_changes()
+
+
+def test_corrupt_new_artifact_is_not_published(model_dir):
+    registry = ModelRegistry(model_dir=str(model_dir))
+    registry.refresh()
+
+    (model_dir / "fuel_co2_pipeline_v2.json").write_text("{not an artifact")
+    summary = registry.refresh()
+
+    assert list(summary["failed"]) == ["v2"]
+    assert list(registry.versions()) == ["v1"] and registry.default_version == "v1"
+
+
+def test_empty_directory_falls_back_to_a_demo_model(tmp_path):
+    registry = ModelRegistry(model_dir=str(tmp_path))
+    summary = registry.refresh()
+
+    assert summary["loaded"] == [FALLBACK_VERSION]
+    assert registry.default_version == FALLBACK_VERSION
+
+
+def test_removing_every_artifact_keeps_the_current_models(model_dir):
+    registry = ModelRegistry(model_dir=str(model_dir))
+    registry.refresh()
+    v1 = registry.get("v1")
+
+    for path in model_dir.iterdir():
+        path.unlink()
+    summary = registry.refresh()
+
+    assert summary["removed"] == []
+    assert registry.get() is v1
+
+
+def test_pinned_default_survives_newer_versions(model_dir):
+    add_version(model_dir, "v2")
+    registry = ModelRegistry(model_dir=str(model_dir))
+    registry.refresh()
+    assert registry.default_version == "v2"
+
+    registry.set_default("v1")
+    add_version(model_dir, "v10")
+    registry.refresh()
+
+    assert registry.default_version == "v1"
+    with pytest.raises(KeyError):
+        registry.set_default("v3")
+
+
+def test_reload_endpoint_hot_swaps_a_new_version(service, model_dir):
+    client = service()
+    add_version(model_dir, "v2")
+
+    response = client.post("/admin/reload-models")
+
+    assert response.status_code == 200
+    assert response.json()["loaded"] == ["v2"]
+    assert client.get("/models").json()["default_version"] == "v2"
+    assert client.post("/predict", json={"ENGINESIZE": 2.0, "CYLINDERS": 4, "FUELCONSUMPTION_COMB": 8.5}
+                       ).json()["model_version"] == "v2"
+
+
+@pytest.mark.parametrize("headers", [{}, {"X-Admin-Token": "wrong"}])
+def test_admin_endpoints_reject_a_missing_or_wrong_token(service, model_dir, headers):
+    client = service(ADMIN_TOKEN="secret")
+    add_version(model_dir, "v2")
+
+    for path in ("/admin/reload-models", "/admin/default-model/v1"):
+        response = client.post(path, headers=headers)
+        assert response.status_code == 401
+        assert response.json()["detail"] == "Invalid admin token"
+    assert client.get("/models").json()["default_version"] == "v1"
+
+
+def test_admin_endpoints_accept_the_configured_token(service, model_dir):
+    client = service(ADMIN_TOKEN="secret")
+    add_version(model_dir, "v2")
+    headers = {"X-Admin-Token": "secret"}
+
+    assert client.post("/admin/reload-models", headers=headers).status_code == 200
+    response = client.post("/admin/default-model/v1", headers=headers)
+
+    assert response.json() == {"default_version": "v1"}
+    assert client.post("/admin/default-model/v3", headers=headers).status_code == 404
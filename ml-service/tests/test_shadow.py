@@ -0,0 +1,188 @@
+import asyncio
+import random
+import time
+from types import SimpleNamespace
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.linear_model import Ridge
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import PolynomialFeatures, StandardScaler
+
+import app
+from shadow import ShadowScorer, ShadowStats
+
+CARS = [
+    {"ENGINESIZE": 2.0, "CYLINDERS": 4, "FUELCONSUMPTION_COMB": 8.5},
+    {"ENGINESIZE": 3.5, "CYLINDERS": 6, "FUELCONSUMPTION_COMB": 11.2},
+    {"ENGINESIZE": 5.7, "CYLINDERS": 8, "FUELCONSUMPTION_COMB": 15.0},
+]
+
+# The candidate v2 is the newest version and so the default; requests are served by v1
+V1 = {"version": "v1"}
+
+
+def features_of(cars):
+    return np.array([[car["ENGINESIZE"], car["CYLINDERS"], car["FUELCONSUMPTION_COMB"]] for car in cars])
+
+
+@pytest.mark.parametrize("rate", [0.05, 0.25, 0.9])
+def test_requests_are_sampled_at_the_configured_rate(rate):
+    random.seed(0)
+    scorer = ShadowScorer(lambda: None, sample_rate=rate)
+
+    shadowed = sum(scorer.sample() for _ in range(20_000))
+
+    # Binomial standard deviation is at most ~71 requests
+    assert abs(shadowed - rate * 20_000) < 5 * np.sqrt(20_000 * rate * (1 - rate))
+
+
+def test_zero_and_full_sample_rates():
+    assert not any(ShadowScorer(lambda: None, sample_rate=0.0).sample() for _ in range(1000))
+    assert all(ShadowScorer(lambda: None, sample_rate=1.0).sample() for _ in range(1000))
+
+
+def test_disagreement_statistics():
+    stats = ShadowStats()
+    stats.record(np.array([100.0, 200.0]), np.array([100.5, 197.0]), 0.002)
+    stats.record(np.array([300.0]), np.array([300.0]), 0.001)
+
+    summary = stats.to_dict()
+
+    assert (summary["batches"], summary["rows"]) == (2, 3)
+    assert summary["mean_abs_delta"] == pytest.approx(3.5 / 3)
+    assert summary["mean_delta"] == pytest.approx(-2.5 / 3)
+    assert summary["rmse_delta"] == pytest.approx(np.sqrt(9.25 / 3))
+    assert summary["max_abs_delta"] == 3.0
+    assert summary["candidate_predict_us_per_row"] == pytest.approx(1000.0)
+    # A delta equal to a bucket bound is counted in that bucket
+    histogram = summary["abs_delta_histogram"]
+    assert (histogram["<=0.01"], histogram["<=0.5"], histogram["<=5"]) == (1, 1, 1)
+    assert sum(histogram.values()) == 3
+
+
+def candidate(version, predict):
+    return SimpleNamespace(version=version, predictor=SimpleNamespace(predict=predict))
+
+
+def shadow(scorer, submissions):
+    """Submit (features, served, version) tuples and let the consumer drain them"""
+    async def scenario():
+        scorer.start()
+        for submission in submissions:
+            await scorer.submit(*submission)
+        while scorer.queue_depth:
+            await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        scorer.stop()
+
+    asyncio.run(scenario())
+    return scorer.to_dict()
+
+
+def test_queued_requests_are_compared_per_served_version():
+    scorer = ShadowScorer(lambda: candidate("v3", lambda features: features[:, 0] * 100.0))
+    features = features_of(CARS)
+
+    summary = shadow(scorer, [
+        (features[:2], np.array([200.0, 350.0]), "v1"),
+        (features[2:], np.array([560.0]), "v1"),
+        (features, np.array([0.0, 0.0, 0.0]), "v2"),
+        (features, np.array([1.0, 1.0, 1.0]), "v3"),
+    ])
+
+    comparisons = {(c["served_version"], c["candidate_version"]): c for c in summary["comparisons"]}
+    assert set(comparisons) == {("v1", "v3"), ("v2", "v3")}
+    assert comparisons["v1", "v3"]["rows"] == 3
+    assert comparisons["v1", "v3"]["max_abs_delta"] == pytest.approx(10.0)
+    assert comparisons["v2", "v3"]["mean_delta"] == pytest.approx(features[:, 0].mean() * 100.0)
+    # Requests already served by the candidate are not compared with themselves
+    assert summary["dropped_rows"]["no_candidate"] == 3
+    assert summary["sampled_requests"] == 4
+
+
+def test_submissions_beyond_the_queue_are_dropped():
+    scorer = ShadowScorer(lambda: None, max_queue=1)
+
+    async def scenario():
+        # No consumer task, so nothing drains the queue
+        scorer._queue = asyncio.Queue(maxsize=1)
+        for _ in range(3):
+            await scorer.submit(features_of(CARS[:2]), np.zeros(2), "v1")
+
+    asyncio.run(scenario())
+
+    assert scorer.sampled == 3
+    assert scorer.dropped["queue_full"] == 4 and scorer.queue_depth == 1
+
+
+@pytest.fixture
+def candidate_pipeline(model_dir):
+    """A polynomial v2 to shadow the shipped linear v1"""
+    rng = np.random.default_rng(0)
+    features = np.column_stack([rng.uniform(1, 8, 200), rng.integers(3, 13, 200), rng.uniform(4, 25, 200)])
+    pipeline = Pipeline([
+        ("poly", PolynomialFeatures(degree=2, include_bias=False)),
+        ("scaler", StandardScaler()),
+        ("regressor", Ridge(alpha=1.0)),
+    ]).fit(features, features @ [11.0, 7.0, 16.0] + 30.0)
+    joblib.dump(pipeline, model_dir / "fuel_co2_pipeline_v2.pkl")
+    return pipeline
+
+
+def shadow_stats(client, rows):
+    """/shadow-stats once the consumer task has compared or dropped `rows` rows, or counted an error"""
+    deadline = time.monotonic() + 5
+    while True:
+        stats = client.get("/shadow-stats").json()
+        compared = sum(comparison["rows"] for comparison in stats["comparisons"])
+        dropped = sum(stats["dropped_rows"].values())
+        if compared + dropped >= rows or stats["errors"] or time.monotonic() > deadline:
+            return stats
+        time.sleep(0.01)
+
+
+def test_sampled_requests_are_scored_by_the_candidate(service, candidate_pipeline):
+    client = service(SHADOW_VERSION="v2", SHADOW_SAMPLE_RATE=1.0, CACHE_ENABLED=False)
+
+    single = client.post("/predict", params=V1, json=CARS[0]).json()["prediction"]
+    batch = client.post("/batch-predict", params=V1, json={"predictions": CARS}).json()["predictions"]
+    stats = shadow_stats(client, 4)
+
+    assert stats["enabled"] and stats["candidate_version"] == "v2"
+    assert stats["sampled_requests"] == 2 and stats["errors"] == 0
+    (comparison,) = stats["comparisons"]
+    assert (comparison["served_version"], comparison["candidate_version"]) == ("v1", "v2")
+    assert comparison["rows"] == 4
+    served = np.array([single, *batch])
+    delta = np.maximum(candidate_pipeline.predict(features_of([CARS[0], *CARS])), 0.0) - served
+    # Served predictions are compared before rounding; responses are rounded to 2 decimals
+    assert comparison["mean_delta"] == pytest.approx(delta.mean(), abs=0.01)
+    assert comparison["max_abs_delta"] == pytest.approx(np.abs(delta).max(), abs=0.01)
+
+
+def test_unsampled_requests_are_not_shadowed(service, candidate_pipeline):
+    client = service(SHADOW_VERSION="v2", SHADOW_SAMPLE_RATE=0.0)
+
+    client.post("/predict", params=V1, json=CARS[0])
+    client.post("/batch-predict", params=V1, json={"predictions": CARS})
+
+    stats = client.get("/shadow-stats").json()
+    assert stats["sampled_requests"] == 0 and stats["comparisons"] == []
+
+
+def test_a_failing_candidate_never_affects_the_served_response(service, candidate_pipeline):
+    expected = service(CACHE_ENABLED=False).post("/batch-predict", params=V1, json={"predictions": CARS}).json()
+    client = service(SHADOW_VERSION="v2", SHADOW_SAMPLE_RATE=1.0, CACHE_ENABLED=False)
+
+    def explode(features):
+        raise RuntimeError("candidate exploded")
+
+    app.model_registry.versions()["v2"].predictor.predict = explode
+
+    response = client.post("/batch-predict", params=V1, json={"predictions": CARS})
+    stats = shadow_stats(client, 3)
+
+    assert response.status_code == 200 and response.json() == expected
+    assert stats["errors"] == 1 and stats["comparisons"] == []
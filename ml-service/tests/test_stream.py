@@ -0,0 +1,146 @@
+import asyncio
+import json
+
+import pytest
+
+import app
+
+CARS = [
+    {"ENGINESIZE": 2.0, "CYLINDERS": 4, "FUELCONSUMPTION_COMB": 8.5},
+    {"ENGINESIZE": 3.5, "CYLINDERS": 6, "FUELCONSUMPTION_COMB": 11.2},
+    {"ENGINESIZE": 5.7, "CYLINDERS": 8, "FUELCONSUMPTION_COMB": 15.0},
+]
+
+
+def ndjson(items):
+    return "".join(json.dumps(item) + "\n" for item in items).encode()
+
+
+def records(body):
+    return [json.loads(line) for line in body.decode().splitlines()]
+
+
+class FakeRequest:
+    """Just enough of a Request for _stream_predictions, fed from byte pieces"""
+
+    def __init__(self, pieces):
+        self.pieces = list(pieces)
+        self.consumed = 0
+
+    async def stream(self):
+        for piece in self.pieces:
+            self.consumed += 1
+            yield piece
+
+
+def collect(request, model):
+    async def run():
+        return [chunk async for chunk in app._stream_predictions(request, model)]
+
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def client(service):
+    return service()
+
+
+def test_every_line_gets_a_prediction_or_an_error_in_order(client):
+    body = b"\n".join([
+        json.dumps(CARS[0]).encode(),
+        b"",
+        b"{not json",
+        json.dumps({**CARS[1], "CYLINDERS": 2}).encode(),
+        json.dumps(CARS[2]).encode(),
+    ])
+
+    response = client.post("/batch-predict/stream", content=body)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.headers["X-Model-Version"] == app.model_registry.default_version
+    results = records(response.content)
+    assert [result["line"] for result in results] == [1, 3, 4, 5]
+    assert results[1]["error"].startswith("Invalid JSON")
+    assert results[2]["error"].startswith("CYLINDERS")
+    for result, car in ((results[0], CARS[0]), (results[3], CARS[2])):
+        expected = client.post("/predict", json=car).json()["prediction"]
+        assert result["prediction"] == pytest.approx(expected, abs=0.01)
+
+
+def test_oversized_lines_are_reported_and_skipped(service):
+    client = service(STREAM_MAX_LINE_BYTES=100)
+    padded = json.dumps({**CARS[0], "padding": "x" * 200})
+    # The unterminated last line overflows the buffer before the body ends
+    body = ndjson([CARS[0]]) + padded.encode() + b"\n" + ndjson([CARS[1]]) + padded.encode()
+
+    results = records(client.post("/batch-predict/stream", content=body).content)
+
+    assert [result["line"] for result in results] == [1, 2, 3, 4]
+    assert "prediction" in results[0] and "prediction" in results[2]
+    assert results[1]["error"] == results[3]["error"] == "Line exceeds 100 bytes"
+
+
+def test_generator_body_matches_a_single_body(client):
+    body = ndjson(CARS * 5)
+
+    def pieces():
+        # Split mid-line so rows straddle body chunks
+        for start in range(0, len(body), 7):
+            yield body[start:start + 7]
+
+    streamed = client.post("/batch-predict/stream", content=pieces())
+    whole = client.post("/batch-predict/stream", content=body)
+
+    assert streamed.status_code == 200
+    assert records(streamed.content) == records(whole.content)
+    assert len(records(whole.content)) == 15
+
+
+def test_chunks_are_flushed_every_stream_chunk_size_lines(client, monkeypatch):
+    monkeypatch.setattr(app, "STREAM_CHUNK_SIZE", 2)
+    body = ndjson(CARS + CARS[:2])
+    model = app._resolve_model(None)
+
+    chunks = collect(FakeRequest(body[i:i + 5] for i in range(0, len(body), 5)), model)
+    whole = collect(FakeRequest([body]), model)
+
+    assert [len(records(chunk)) for chunk in chunks] == [2, 2, 1]
+    assert [r for chunk in chunks for r in records(chunk)] == [r for chunk in whole for r in records(chunk)]
+
+
+def test_first_chunk_is_yielded_before_the_body_is_read(client, monkeypatch):
+    monkeypatch.setattr(app, "STREAM_CHUNK_SIZE", 2)
+    request = FakeRequest([ndjson(CARS[:2]), ndjson(CARS[2:]), ndjson(CARS)])
+
+    async def first_chunk():
+        chunks = app._stream_predictions(request, app._resolve_model(None))
+        chunk = await chunks.__anext__()
+        await chunks.aclose()
+        return chunk
+
+    chunk = asyncio.run(first_chunk())
+
+    assert [result["line"] for result in records(chunk)] == [1, 2]
+    assert request.consumed == 1
+
+
+def test_streaming_response_never_calls_receive():
+    async def body():
+        yield b"first\n"
+        yield b"second\n"
+
+    async def receive():
+        raise AssertionError("receive() would consume request body chunks")
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    response = app.RequestStreamingResponse(body(), media_type="application/x-ndjson")
+    asyncio.run(response({"type": "http"}, receive, send))
+
+    assert sent[0]["type"] == "http.response.start" and sent[0]["status"] == 200
+    assert b"".join(message.get("body", b"") for message in sent[1:]) == b"first\nsecond\n"
+    assert sent[-1] == {"type": "http.response.body", "body": b"", "more_body": False}
@@ -0,0 +1,157 @@
+import joblib
+import numpy as np
+import pytest
+from sklearn.linear_model import Ridge
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import PolynomialFeatures, StandardScaler
+
+import app
+from predictor import LinearPredictor
+from whatif import GridError, _downsample, budget_shape, evaluate_surface, grid_axes, grid_rows
+
+BASE = {"ENGINESIZE": 3.5, "CYLINDERS": 6, "FUELCONSUMPTION_COMB": 10.0}
+
+
+def test_budget_keeps_short_axes_whole_and_thins_long_ones():
+    assert budget_shape([100, 5, 100], 1000) == [14, 5, 14]
+    # Short axes are only kept whole while they fit an equal share of the budget
+    assert budget_shape([100, 13, 100], 1000) == [10, 10, 10]
+    assert budget_shape([20, 1, 30], 1000) == [20, 1, 30]
+
+
+def test_downsampling_keeps_both_ends():
+    axis = np.linspace(1.0, 6.0, 101)
+
+    thinned = _downsample(axis, 7)
+
+    assert len(thinned) == 7
+    assert (thinned[0], thinned[-1]) == (1.0, 6.0)
+    assert np.all(np.diff(thinned) > 0)
+
+
+def test_grid_axes_rejects_reversed_and_out_of_range_ranges():
+    with pytest.raises(GridError, match="min 6.0 is greater than max 1.0"):
+        grid_axes([3.5, 6, 10.0], {"ENGINESIZE": (6.0, 1.0, 5)})
+
+    with pytest.raises(GridError) as excinfo:
+        grid_axes([3.5, 6, 10.0], {"FUELCONSUMPTION_COMB": (5.0, 80.0, 5)})
+    (error,) = excinfo.value.args[0]
+    assert error["field"] == "FUELCONSUMPTION_COMB" and error["bounds"] == ["max"]
+
+
+def test_broadcast_surface_matches_scoring_every_row():
+    predictor = LinearPredictor(np.array([12.0, 6.0, 15.0]), 40.0)
+    axes = grid_axes([3.5, 6, 10.0], {"ENGINESIZE": (1.0, 6.0, 11), "CYLINDERS": (4, 8, 5)})
+
+    surface = evaluate_surface(predictor, axes)
+
+    assert surface.shape == (11, 5, 1)
+    np.testing.assert_allclose(surface.ravel(), predictor.predict(grid_rows(axes)))
+
+
+@pytest.fixture
+def client(service):
+    return service()
+
+
+def predict(client, car):
+    return client.post("/predict", json=car).json()["prediction"]
+
+
+def test_surface_shape_axes_and_values(client):
+    response = client.post("/what-if", json={
+        "base": BASE,
+        "ENGINESIZE": {"min": 1.0, "max": 6.0, "steps": 26},
+        "FUELCONSUMPTION_COMB": {"min": 5.0, "max": 20.0, "steps": 16},
+    })
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["shape"] == [26, 1, 16] and body["points"] == body["requested_points"] == 416
+    assert not body["downsampled"]
+    assert body["axes"]["CYLINDERS"] == [6.0]
+    assert np.shape(body["predictions"]) == (26, 1, 16)
+    assert body["model_version"] == app.model_registry.default_version
+    for i, j in [(0, 0), (10, 5), (25, 15)]:
+        car = {**BASE, "ENGINESIZE": body["axes"]["ENGINESIZE"][i],
+               "FUELCONSUMPTION_COMB": body["axes"]["FUELCONSUMPTION_COMB"][j]}
+        assert body["predictions"][i][0][j] == pytest.approx(predict(client, car), abs=0.01)
+
+
+def test_large_grids_are_downsampled_to_the_point_budget(client):
+    response = client.post("/what-if", json={
+        "base": BASE,
+        "ENGINESIZE": {"min": 1.0, "max": 8.0, "steps": 100},
+        "CYLINDERS": {"min": 4, "max": 8, "steps": 5},
+        "FUELCONSUMPTION_COMB": {"min": 4.0, "max": 30.0, "steps": 100},
+        "max_points": 1000,
+    })
+
+    body = response.json()
+    assert body["downsampled"]
+    assert body["requested_points"] == 50000
+    assert body["shape"] == [14, 5, 14] and body["points"] == 980
+    assert body["axes"]["ENGINESIZE"][0] == 1.0 and body["axes"]["ENGINESIZE"][-1] == 8.0
+
+
+def test_point_budget_is_capped_by_the_server(service):
+    client = service(WHATIF_MAX_POINTS=50)
+
+    body = client.post("/what-if", json={
+        "base": BASE, "ENGINESIZE": {"min": 1.0, "max": 8.0, "steps": 100}, "max_points": 5000,
+    }).json()
+
+    assert body["points"] == 50 and body["downsampled"]
+
+
+def test_reversed_range_is_rejected(client):
+    response = client.post("/what-if", json={"base": BASE, "ENGINESIZE": {"min": 6.0, "max": 1.0}})
+
+    assert response.status_code == 422
+    assert response.json()["detail"] == "ENGINESIZE: min 6.0 is greater than max 1.0"
+
+
+def test_out_of_range_axis_is_rejected(client):
+    response = client.post("/what-if", json={"base": BASE, "CYLINDERS": {"min": 2, "max": 20, "steps": 19}})
+
+    assert response.status_code == 422
+    detail = response.json()["detail"]
+    assert {(error["field"], tuple(error["bounds"])) for error in detail} == {
+        ("CYLINDERS", ("min",)), ("CYLINDERS", ("max",)),
+    }
+
+
+def test_surfaces_are_cached_per_request_and_model(client):
+    request = {"base": BASE, "ENGINESIZE": {"min": 1.0, "max": 6.0, "steps": 26}}
+
+    first = client.post("/what-if", json=request)
+    second = client.post("/what-if", json=request)
+    client.post("/what-if", json={**request, "max_points": 10})
+
+    assert second.json() == first.json()
+    stats = client.get("/cache-stats").json()["what_if"]
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 2, 2)
+
+
+def test_pipeline_models_score_the_grid_on_the_executor(service, model_dir):
+    # Not affine, so the surface goes through _predict instead of the broadcast sum
+    rng = np.random.default_rng(0)
+    features = np.column_stack([rng.uniform(1, 8, 200), rng.integers(3, 13, 200), rng.uniform(4, 25, 200)])
+    pipeline = Pipeline([
+        ("poly", PolynomialFeatures(degree=2, include_bias=False)),
+        ("scaler", StandardScaler()),
+        ("regressor", Ridge(alpha=1.0)),
+    ]).fit(features, features @ [12.0, 6.0, 15.0] + 40.0)
+    joblib.dump(pipeline, model_dir / "fuel_co2_pipeline_v2.pkl")
+    client = service()
+    executor_calls = app.model_executor.stats.submitted
+
+    body = client.post("/what-if", params={"version": "v2"}, json={
+        "base": BASE, "ENGINESIZE": {"min": 1.0, "max": 6.0, "steps": 6}, "CYLINDERS": {"min": 4, "max": 8, "steps": 3},
+    }).json()
+
+    assert body["model_version"] == "v2" and body["shape"] == [6, 3, 1]
+    assert app.model_executor.stats.submitted == executor_calls + 1
+    axes = [np.array(body["axes"][name]) for name in ("ENGINESIZE", "CYLINDERS", "FUELCONSUMPTION_COMB")]
+    expected = np.round(pipeline.predict(grid_rows(axes)), 2).reshape(6, 3, 1)
+    np.testing.assert_allclose(body["predictions"], expected, atol=0.01)
@@ -0,0 +1,150 @@
+"""
+What-if prediction surfaces
+
+The frontend explores how emissions change as one car's specs are varied.
+Instead of one /predict call per tweak, a base car plus ranges for any of
+the three features is expanded into a grid and the whole prediction
+surface is returned at once.
+
+For the fused linear predictor the surface is a single broadcast sum of
+three per-axis terms, so the (n, 3) grid of feature rows is never built;
+other predictors score the flattened meshgrid in one predict call. Grids
+larger than the point budget are downsampled per axis, always keeping
+both ends of every range.
+"""
+
+import numpy as np
+
+from columnar import validate_features
+from predictor import FEATURE_NAMES, LinearPredictor
+
+
+class GridError(ValueError):
+    """Raised when a what-if grid is malformed"""
+
+
+def _downsample(axis, size):
+    """Evenly spaced subset of an axis, including both ends"""
+    if size >= len(axis):
+        return axis
+    picks = np.unique(np.round(np.linspace(0, len(axis) - 1, size)).astype(np.intp))
+    return axis[picks]
+
+
+def budget_shape(shape, max_points):
+    """
+    Largest per-axis sizes within max_points.
+
+    Axes are visited from smallest to largest and each gets an equal share
+    of the remaining budget, so short axes (such as CYLINDERS) keep all
+    their values and the long ones are thinned.
+    """
+    shape = list(shape)
+    if int(np.prod(shape)) <= max_points:
+        return shape
+
+    budget = max_points
+    varied = sorted((i for i, size in enumerate(shape) if size > 1), key=lambda i: shape[i])
+    for remaining, i in zip(range(len(varied), 0, -1), varied):
+        share = int(budget ** (1.0 / remaining) + 1e-9)
+        shape[i] = max(1, min(shape[i], share))
+        budget //= shape[i]
+    return shape
+
+
+def grid_axes(base, ranges):
+    """
+    Build the axis values of a grid.
+
+    base is a [ENGINESIZE, CYLINDERS, FUELCONSUMPTION_COMB] row; ranges maps
+    feature names to (min, max, steps). Features without a range stay at
+    their base value. CYLINDERS values are rounded to whole cylinders.
+    """
+    axes = []
+    for i, name in enumerate(FEATURE_NAMES):
+        if name not in ranges:
+            axes.append(np.array([float(base[i])]))
+            continue
+
+        low, high, steps = ranges[name]
+        if low > high:
+            raise GridError(f"{name}: min {low} is greater than max {high}")
+        axis = np.linspace(low, high, steps)
+        if name == "CYLINDERS":
+            axis = np.unique(np.round(axis))
+        axes.append(axis)
+
+    # Each axis is sorted, so its ends are the extreme grid values
+    corners = np.array([[axis[0] for axis in axes], [axis[-1] for axis in axes]])
+    errors = validate_features(corners)
+    if errors:
+        for error in errors:
+            error["bounds"] = [("min", "max")[row] for row in error.pop("rows")]
+        raise GridError(errors)
+    return axes
+
+
+def grid_rows(axes):
+    """The (n, 3) feature rows of every grid point, in surface order"""
+    mesh = np.stack(np.meshgrid(*axes, indexing="ij"), axis=-1)
+    return mesh.reshape(-1, len(axes))
+
+
+def evaluate_surface(predictor, axes):
+    """Predictions for every grid point, shaped (len(axis) for axis in axes)"""
+    if isinstance(predictor, LinearPredictor):
+        w0, w1, w2 = predictor.weights
+        a0, a1, a2 = axes
+        return (
+            (a0 * w0)[:, None, None]
+            + (a1 * w1)[None, :, None]
+            + (a2 * w2 + predictor.bias)[None, None, :]
+        )
+
+    return predictor.predict(grid_rows(axes)).reshape([len(axis) for axis in axes])
+
+
+def surface_key(fingerprint, base, ranges, max_points):
+    """Cache key of a surface; fingerprint first, as PredictionCache expects"""
+    return (
+        fingerprint,
+        tuple(float(value) for value in base),
+        tuple((name, *map(float, ranges[name])) for name in FEATURE_NAMES if name in ranges),
+        int(max_points),
+    )
+
+
+def surface_axes(base, ranges, max_points):
+    """(axes, requested shape) of a what-if grid, downsampled to the point budget"""
+    axes = grid_axes(base, ranges)
+    requested = [len(axis) for axis in axes]
+    shape = budget_shape(requested, max_points)
+    return [_downsample(axis, size) for axis, size in zip(axes, shape)], requested
+
+
+def surface_body(surface, axes, requested):
+    """
+    The response body of an evaluated surface.
+
+    Predictions are floored at zero and rounded to 2 decimals like /predict.
+    The arrays in the body are read-only, so cached bodies can be shared.
+    """
+    surface = np.round(np.maximum(surface, 0.0), 2)
+    surface.setflags(write=False)
+    for axis in axes:
+        axis.setflags(write=False)
+
+    return {
+        "axes": dict(zip(FEATURE_NAMES, axes)),
+        "shape": list(surface.shape),
+        "points": int(surface.size),
+        "requested_points": int(np.prod(requested)),
+        "downsampled": list(surface.shape) != requested,
+        "predictions": surface,
+    }
+
+
+def build_surface(predictor, base, ranges, max_points):
+    """Evaluate a what-if grid in the calling thread and return the response body"""
+    axes, requested = surface_axes(base, ranges, max_points)
+    return surface_body(evaluate_surface(predictor, axes), axes, requested)
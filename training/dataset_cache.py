@@ -0,0 +1,267 @@
+"""
+Columnar dataset cache shared by train.py and evaluate.py
+
+Parsing FuelConsumptionCo2.csv with pandas dominates a training or
+evaluation run once the file grows. The preparation stage here converts
+the model columns (the features and the target, incomplete rows dropped)
+once into one .npy file per column, and precomputes the indices of both
+train/test splits:
+
+- "random": train.py's default train_test_split, indices in the order
+  train_test_split returns the rows
+- "hash": the deterministic row hash split of train.py --split hash and
+  --streaming, indices in file order
+
+Entries live in cache_dir/<content hash>/ and are keyed by the SHA-256 of
+the CSV bytes, so an edited CSV gets a new entry and an unchanged one is
+never parsed again. The hash of a source is memoized against its size and
+mtime, so unchanged files are not even re-read. Columns and indices are
+loaded with np.load(mmap_mode="r"): nothing is read until it is used.
+With pandas >= 2.0, DataFrames are built over the mapped arrays without
+copying them (see Dataset.frame).
+
+Usage (from training/):
+    python dataset_cache.py                 # prepare the cache for ../FuelConsumptionCo2.csv
+    python dataset_cache.py --csv big.csv --chunk-size 500000
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+import streaming
+
+# Bumped whenever the layout of an entry changes, so old entries are rebuilt
+CACHE_FORMAT = "ecometer-columnar-v2"
+DEFAULT_CACHE_DIR = 'dataset_cache'
+
+COLUMNS = streaming.FEATURE_COLUMNS + [streaming.TARGET_COLUMN]
+SPLITS = ("random", "hash")
+TEST_SIZE = 0.2
+SEED = 42
+
+MANIFEST = "manifest.json"
+SOURCES = "sources.json"
+
+
+def content_hash(path, block_size=1024 * 1024):
+    """SHA-256 hex digest of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def source_hash(csv_path, cache_dir):
+    """Content hash of csv_path, reused from cache_dir/sources.json while its size and mtime are unchanged"""
+    source = os.path.abspath(csv_path)
+    stat = os.stat(source)
+    sources_path = os.path.join(cache_dir, SOURCES)
+    try:
+        with open(sources_path, encoding="utf-8") as f:
+            sources = json.load(f)
+    except (FileNotFoundError, ValueError):
+        sources = {}
+
+    known = sources.get(source)
+    if known and known["size"] == stat.st_size and known["mtime_ns"] == stat.st_mtime_ns:
+        return known["sha256"]
+
+    digest = content_hash(source)
+    sources[source] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest}
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{sources_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(sources, f, indent=2)
+    os.replace(tmp_path, sources_path)
+    return digest
+
+
+class Dataset:
+    """Memory-mapped columns and split indices of one cache entry"""
+
+    def __init__(self, directory, manifest):
+        self.directory = directory
+        self.manifest = manifest
+        self.columns = {
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r") for name in COLUMNS
+        }
+
+    @property
+    def rows(self):
+        return self.manifest["rows"]
+
+    def split(self, split="random"):
+        """(train indices, test indices) of a split, memory-mapped"""
+        if split not in SPLITS:
+            raise ValueError(f"Unknown split: {split}")
+        return tuple(
+            np.load(os.path.join(self.directory, f"split_{split}_{part}.npy"), mmap_mode="r")
+            for part in ("train", "test")
+        )
+
+    def frame(self, columns=COLUMNS):
+        """
+        DataFrame over the mapped columns.
+
+        With pandas >= 2.0, copy=False keeps every column as its own block
+        backed by the mapping: np.shares_memory(frame[name].to_numpy(),
+        self.columns[name]) holds for each column. pandas 1.x consolidates
+        columns of the same dtype into one block, which copies them.
+        """
+        return pd.DataFrame({name: self.columns[name] for name in columns}, copy=False)
+
+    def _column(self, name, rows):
+        column = self.columns[name]
+        return column if rows is None else column[rows]
+
+    def features(self, rows=None):
+        """(n, 3) float64 feature matrix of every row, or of the rows at the given indices or slice"""
+        columns = [self._column(name, rows) for name in streaming.FEATURE_COLUMNS]
+        # Column-major like DataFrame.to_numpy(): the same BLAS path, and the same
+        # rounding, as predicting from the frames of train.py
+        matrix = np.empty((len(columns[0]), len(columns)), dtype=np.float64, order="F")
+        for i, column in enumerate(columns):
+            matrix[:, i] = column
+        return matrix
+
+    def target(self, rows=None):
+        """float64 target of every row, or of the rows at the given indices or slice"""
+        return np.asarray(self._column(streaming.TARGET_COLUMN, rows), dtype=np.float64)
+
+
+def build(csv_path, directory, digest, chunk_size=streaming.DEFAULT_CHUNK_SIZE):
+    """Parse the CSV once and write its columns, split indices and manifest to directory"""
+    started = time.perf_counter()
+    blocks = {name: [] for name in COLUMNS}
+    hash_test = []
+    source_rows = 0
+    missing = dict.fromkeys(COLUMNS, 0)
+
+    for chunk in pd.read_csv(csv_path, usecols=COLUMNS, chunksize=chunk_size):
+        source_rows += len(chunk)
+        for name, count in chunk[COLUMNS].isnull().sum().items():
+            missing[name] += int(count)
+        chunk = chunk[COLUMNS].dropna()
+        for name in COLUMNS:
+            blocks[name].append(chunk[name].to_numpy())
+        hash_test.append(streaming.hash_test_mask(chunk.to_numpy(dtype=np.float64), TEST_SIZE, SEED))
+
+    os.makedirs(directory)
+    dtypes = {}
+    for name in COLUMNS:
+        column = np.concatenate(blocks[name]) if blocks[name] else np.empty(0)
+        dtypes[name] = column.dtype.str
+        np.save(os.path.join(directory, f"{name}.npy"), column)
+    rows = len(column)
+
+    # train_test_split over row positions picks the same rows, in the same order, as over the frame
+    positions = np.arange(rows, dtype=np.int64)
+    random_train, random_test = train_test_split(positions, test_size=TEST_SIZE, random_state=SEED)
+    in_test = np.concatenate(hash_test) if hash_test else np.zeros(0, dtype=bool)
+    splits = {
+        "random": (random_train, random_test),
+        "hash": (np.flatnonzero(~in_test), np.flatnonzero(in_test)),
+    }
+    for split, parts in splits.items():
+        for part, indices in zip(("train", "test"), parts):
+            np.save(os.path.join(directory, f"split_{split}_{part}.npy"), indices.astype(np.int64))
+
+    manifest = {
+        "format": CACHE_FORMAT,
+        "source": os.path.abspath(csv_path),
+        "sha256": digest,
+        "source_rows": source_rows,
+        "rows": rows,
+        "missing": missing,
+        "dtypes": dtypes,
+        "test_size": TEST_SIZE,
+        "seed": SEED,
+        "split_sizes": {split: {"train": len(parts[0]), "test": len(parts[1])} for split, parts in splits.items()},
+        "build_seconds": time.perf_counter() - started,
+    }
+    with open(os.path.join(directory, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def prune(cache_dir, source, keep):
+    """Remove older entries built from the same source path"""
+    for name in os.listdir(cache_dir):
+        directory = os.path.join(cache_dir, name)
+        if name == keep or not os.path.isfile(os.path.join(directory, MANIFEST)):
+            continue
+        with open(os.path.join(directory, MANIFEST), encoding="utf-8") as f:
+            if json.load(f).get("source") == source:
+                shutil.rmtree(directory, ignore_errors=True)
+
+
+def load(csv_path, cache_dir=DEFAULT_CACHE_DIR, chunk_size=streaming.DEFAULT_CHUNK_SIZE, verbose=True):
+    """
+    The cached Dataset of csv_path, building its entry first if the CSV changed.
+
+    An entry is built in a temporary directory and renamed into place, so
+    a concurrent or interrupted build never leaves a partial entry behind.
+    """
+    digest = source_hash(csv_path, cache_dir)
+    key = digest[:16]
+    directory = os.path.join(cache_dir, key)
+    manifest_path = os.path.join(directory, MANIFEST)
+
+    manifest = None
+    if os.path.isfile(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("format") != CACHE_FORMAT or manifest.get("sha256") != digest:
+            shutil.rmtree(directory, ignore_errors=True)
+            manifest = None
+
+    if manifest is None:
+        if verbose:
+            print(f"Building columnar cache for {csv_path} (content hash {key})...")
+        tmp_directory = os.path.join(cache_dir, f".{key}.{os.getpid()}.tmp")
+        shutil.rmtree(tmp_directory, ignore_errors=True)
+        manifest = build(csv_path, tmp_directory, digest, chunk_size)
+        try:
+            os.replace(tmp_directory, directory)
+        except OSError:
+            # Another process finished the same entry first
+            shutil.rmtree(tmp_directory, ignore_errors=True)
+        prune(cache_dir, manifest["source"], keep=key)
+        if verbose:
+            print(f"Cached {manifest['rows']} rows in {directory} ({manifest['build_seconds']:.2f} s)")
+    elif verbose:
+        print(f"Using columnar cache {directory} (content hash {key})")
+
+    return Dataset(directory, manifest)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Prepare the columnar dataset cache")
+    parser.add_argument("--csv", default=os.path.join('..', 'FuelConsumptionCo2.csv'),
+                        help="Dataset CSV")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Cache directory")
+    parser.add_argument("--chunk-size", type=int, default=streaming.DEFAULT_CHUNK_SIZE,
+                        help="Rows per CSV chunk while building")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    dataset = load(args.csv, args.cache_dir, args.chunk_size)
+    manifest = dataset.manifest
+    print(f"Rows: {manifest['rows']} of {manifest['source_rows']} (incomplete rows dropped)")
+    for split, sizes in manifest["split_sizes"].items():
+        print(f"Split {split}: {sizes['train']} train / {sizes['test']} test")
+
+
+if __name__ == "__main__":
+    main()
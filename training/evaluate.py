@@ -1,16 +1,39 @@
 """
-Model Evaluation Script for CO₂ Emissions Prediction
-Computes comprehensive metrics and generates visualizations for trained Linear Regression model
+Model Evaluation for CO₂ Emissions Prediction
+Computes comprehensive metrics and generates visualizations for a trained pipeline
+
+The holdout set is scored chunk by chunk and every metric is updated
+incrementally, so memory stays constant however many rows are evaluated:
+
+- R², MAE, MSE/RMSE and residual mean/std from running sums, merged per
+  chunk with the pairwise (Chan et al.) update
+- approximate residual quantiles from a KLL-style quantile sketch
+- plots drawn from a fixed-size reservoir sample of (actual, predicted) pairs
+
+Importable API:
+    chunks = holdout_chunks(DATASET_PATH, split="hash", cache_dir=dataset_cache.DEFAULT_CACHE_DIR)
+    evaluation = evaluate_stream(pipeline_predict(pipeline), chunks)
+    evaluation.metrics()
+    plot_evaluation(evaluation, "evaluation_results/evaluation_plots.png")
+
+Usage:
+    python evaluate.py                            # same random 80/20 split as train.py, from the columnar cache
+    python evaluate.py --split hash               # matches train.py --split hash / --streaming
+    python evaluate.py --holdout holdout_2024.csv # every row of a separate holdout file
+    python evaluate.py --split hash --no-cache    # stream the CSV itself, e.g. one larger than RAM
 """
 
+import argparse
+import json
+import os
+import time
+
 import joblib
 import numpy as np
 import pandas as pd
-import time
-import matplotlib.pyplot as plt
-from sklearn.metrics import r2_score, mean_absolute_error, mean_squared_error
-from sklearn.model_selection import train_test_split
-import os
+
+import dataset_cache
+import streaming
 
 # ================================
 # Configuration
@@ -20,234 +43,497 @@ DATASET_PATH = os.path.join('..', 'FuelConsumptionCo2.csv')
 
 # Feature names (based on actual model training features)
 # Model uses: ENGINESIZE, CYLINDERS, FUELCONSUMPTION_COMB
-FEATURE_NAMES = [
-    'ENGINESIZE',
-    'CYLINDERS',
-    'FUELCONSUMPTION_COMB'
-]
-
-TARGET_COLUMN = 'CO2EMISSIONS'
-
-# ================================
-# Load Model and Data
-# ================================
-print("=" * 60)
-print("CO₂ EMISSIONS PREDICTION MODEL EVALUATION")
-print("=" * 60)
-print("\n[1/6] Loading dataset...")
-
-# Load dataset
-df = pd.read_csv(DATASET_PATH)
-print(f"✓ Dataset loaded: {df.shape[0]} samples")
-
-# Prepare features (same as training script)
-df_clean = df[FEATURE_NAMES + [TARGET_COLUMN]].dropna()
-X = df_clean[FEATURE_NAMES]
-y = df_clean[TARGET_COLUMN]
-
-# Split data (same way as training - test_size=0.2, random_state=42)
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=0.2, random_state=42
-)
-print(f"✓ Test set prepared: {len(X_test)} samples")
-
-print("\n[2/6] Loading trained pipeline...")
-# Load trained pipeline (contains scaler + regressor)
-pipeline = joblib.load(PIPELINE_PATH)
-print(f"✓ Pipeline loaded: {type(pipeline).__name__}")
-
-# Extract model and scaler from pipeline
-model = pipeline.named_steps['regressor']
-scaler = pipeline.named_steps['scaler']
-print(f"✓ Model: {type(model).__name__}")
-print(f"✓ Scaler: {type(scaler).__name__}")
-
-# ================================
-# Make Predictions
-# ================================
-print("\n[3/6] Generating predictions...")
-y_pred = pipeline.predict(X_test)
-print(f"✓ Predictions generated: {len(y_pred)} samples")
-
-# ================================
-# Calculate Metrics
-# ================================
-print("\n[4/6] Computing evaluation metrics...")
-
-# R² Score
-r2 = r2_score(y_test, y_pred)
+FEATURE_NAMES = streaming.FEATURE_COLUMNS
 
-# MAE (Mean Absolute Error)
-mae = mean_absolute_error(y_test, y_pred)
+TARGET_COLUMN = streaming.TARGET_COLUMN
 
-# MSE (Mean Squared Error)
-mse = mean_squared_error(y_test, y_pred)
+DEFAULT_CHUNK_SIZE = streaming.DEFAULT_CHUNK_SIZE
+DEFAULT_SAMPLE_SIZE = 5000
+DEFAULT_SKETCH_SIZE = 1024
 
-# RMSE (Root Mean Squared Error)
-rmse = np.sqrt(mse)
+# Residual quantiles reported by default
+QUANTILES = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
 
-# Regression Coefficients (β)
-coefficients = model.coef_
-intercept = model.intercept_
 
 # ================================
-# Measure Inference Time
+# Running statistics
 # ================================
-print("\n[5/6] Measuring inference time...")
-
-# Perform multiple predictions to get accurate average
-num_iterations = 1000
-single_sample = X_test.iloc[0:1]  # Take first sample
+class RunningStats:
+    """Count, mean, variance, min and max of a stream of values"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values):
+        n_block = len(values)
+        if n_block == 0:
+            return
+        block_mean = float(values.mean())
+        block_m2 = float(((values - block_mean) ** 2).sum())
+
+        total = self.count + n_block
+        delta = block_mean - self.mean
+        self.m2 += block_m2 + delta * delta * self.count * n_block / total
+        self.mean += delta * n_block / total
+        self.count = total
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+    @property
+    def variance(self):
+        """Population variance (ddof=0, like ndarray.std())"""
+        return self.m2 / self.count if self.count else float("nan")
+
+    @property
+    def std(self):
+        return float(np.sqrt(self.variance))
+
+    def to_dict(self):
+        return {"mean": self.mean, "std": self.std, "min": self.min, "max": self.max}
+
+
+class QuantileSketch:
+    """
+    Approximate quantiles in bounded memory (KLL-style compactors).
+
+    Values enter level 0. Whenever a level holds more than k values it is
+    sorted and every other value, from a random offset, moves up one level,
+    where each value stands for twice as many originals. Memory is
+    O(k log(n / k)); rank error is roughly proportional to 1/k.
+    """
+
+    def __init__(self, k=DEFAULT_SKETCH_SIZE, seed=0):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self.count = 0
+        self.rng = np.random.default_rng(seed)
+
+    def update(self, values):
+        self.count += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], np.asarray(values, dtype=np.float64)])
+        level = 0
+        while level < len(self.levels):
+            if len(self.levels[level]) > self.k:
+                self._compact(level)
+            level += 1
+
+    def _compact(self, level):
+        values = np.sort(self.levels[level])
+        # An odd value out stays behind so no weight is lost
+        keep = values[-1:] if len(values) % 2 else values[:0]
+        paired = values[:len(values) - len(keep)]
+        promoted = paired[self.rng.integers(2)::2]
+        if level + 1 == len(self.levels):
+            self.levels.append(np.empty(0))
+        self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+        self.levels[level] = keep
+
+    def quantiles(self, qs):
+        if self.count == 0:
+            return np.full(len(qs), np.nan)
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(v), 2.0 ** i) for i, v in enumerate(self.levels)])
+        order = np.argsort(values)
+        cumulative = np.cumsum(weights[order])
+        positions = np.searchsorted(cumulative, np.asarray(qs) * cumulative[-1])
+        return values[order][np.minimum(positions, len(values) - 1)]
+
+    @property
+    def size(self):
+        return sum(len(v) for v in self.levels)
+
+
+class ReservoirSample:
+    """Uniform sample of at most `capacity` (actual, predicted) pairs from a stream"""
+
+    def __init__(self, capacity=DEFAULT_SAMPLE_SIZE, seed=0):
+        self.capacity = capacity
+        self.rows = np.empty((capacity, 2))
+        self.seen = 0
+        self.rng = np.random.default_rng(seed)
+
+    def update(self, actual, predicted):
+        pairs = np.column_stack([actual, predicted])
+
+        # Fill the reservoir first
+        free = max(0, min(self.capacity - self.seen, len(pairs)))
+        self.rows[self.seen:self.seen + free] = pairs[:free]
+        rest = pairs[free:]
+        start = self.seen + free
+        self.seen += len(pairs)
+        if len(rest) == 0:
+            return
+
+        # Algorithm R, vectorized: item i replaces a random slot with
+        # probability capacity / (i + 1); later items win ties, as in the loop
+        slots = (self.rng.random(len(rest)) * (np.arange(len(rest)) + start + 1)).astype(np.int64)
+        replace = slots < self.capacity
+        self.rows[slots[replace]] = rest[replace]
+
+    @property
+    def sample(self):
+        return self.rows[:min(self.seen, self.capacity)]
+
+
+class StreamingEvaluation:
+    """Running regression metrics over a stream of (actual, predicted) chunks"""
+
+    def __init__(self, sample_size=DEFAULT_SAMPLE_SIZE, sketch_size=DEFAULT_SKETCH_SIZE, seed=0):
+        self.actual = RunningStats()
+        self.predicted = RunningStats()
+        self.residuals = RunningStats()
+        self.squared_error = 0.0
+        self.absolute_error = 0.0
+        self.residual_sketch = QuantileSketch(sketch_size, seed)
+        self.reservoir = ReservoirSample(sample_size, seed)
+        self.chunks = 0
+
+    def update(self, actual, predicted):
+        actual = np.asarray(actual, dtype=np.float64)
+        predicted = np.asarray(predicted, dtype=np.float64)
+        residuals = actual - predicted
+
+        self.actual.update(actual)
+        self.predicted.update(predicted)
+        self.residuals.update(residuals)
+        self.squared_error += float(residuals @ residuals)
+        self.absolute_error += float(np.abs(residuals).sum())
+        self.residual_sketch.update(residuals)
+        self.reservoir.update(actual, predicted)
+        self.chunks += 1
+
+    @property
+    def count(self):
+        return self.actual.count
+
+    def metrics(self, quantiles=QUANTILES):
+        """R², MAE, MSE, RMSE, residual statistics and approximate residual quantiles"""
+        if self.count == 0:
+            raise ValueError("No holdout rows were evaluated")
+        mse = self.squared_error / self.count
+        return {
+            "count": self.count,
+            "r2": 1.0 - self.squared_error / self.actual.m2,
+            "mae": self.absolute_error / self.count,
+            "mse": mse,
+            "rmse": float(np.sqrt(mse)),
+            "residual_mean": self.residuals.mean,
+            "residual_std": self.residuals.std,
+            "residual_quantiles": {
+                f"p{q * 100:g}": float(value)
+                for q, value in zip(quantiles, self.residual_sketch.quantiles(quantiles))
+            },
+            "actual": self.actual.to_dict(),
+            "predicted": self.predicted.to_dict(),
+            "residuals": self.residuals.to_dict(),
+        }
 
-start_time = time.perf_counter()
-for _ in range(num_iterations):
-    _ = pipeline.predict(single_sample)
-end_time = time.perf_counter()
-
-avg_inference_time = (end_time - start_time) / num_iterations
 
 # ================================
-# Training Time Measurement
+# Holdout sources
 # ================================
-print("\n[Optional] To measure training time, uncomment the training section below.")
-
-# Optional: Measure actual training time
-MEASURE_TRAINING_TIME = False  # Set to True to measure training time
-
-if MEASURE_TRAINING_TIME:
-    print("\n[Bonus] Measuring training time...")
-    from sklearn.linear_model import LinearRegression
-    from sklearn.preprocessing import StandardScaler
-    from sklearn.pipeline import Pipeline
-    
-    temp_pipeline = Pipeline([
-        ('scaler', StandardScaler()),
-        ('regressor', LinearRegression())
-    ])
-    
+def holdout_chunks(csv_path, split="hash", chunk_size=DEFAULT_CHUNK_SIZE, test_size=0.2, seed=42,
+                   cache_dir=None):
+    """
+    Yield (X, y) float64 chunks of the holdout rows.
+
+    split="hash" streams the test rows of the deterministic hash split used
+    by train.py --split hash and --streaming; split="all" streams every row
+    (a separate holdout file); split="random" reproduces train.py's default
+    train_test_split, which needs the whole CSV in memory.
+
+    With cache_dir, the rows are gathered from the memory-mapped columnar
+    cache (see dataset_cache.py) with the split indices stored there,
+    building the cache entry first if the CSV changed.
+    """
+    if cache_dir is not None and (test_size, seed) == (dataset_cache.TEST_SIZE, dataset_cache.SEED):
+        dataset = dataset_cache.load(csv_path, cache_dir, chunk_size, verbose=False)
+        if split == "all":
+            rows = np.arange(dataset.rows)
+        else:
+            _, rows = dataset.split(split)
+        for start in range(0, len(rows), chunk_size):
+            if split == "all":
+                # Contiguous slices are views of the mapping
+                chunk = slice(start, min(start + chunk_size, len(rows)))
+            else:
+                chunk = rows[start:start + chunk_size]
+            yield dataset.features(chunk), dataset.target(chunk)
+        return
+
+    if split == "random":
+        from sklearn.model_selection import train_test_split
+
+        df_clean = pd.read_csv(csv_path)[FEATURE_NAMES + [TARGET_COLUMN]].dropna()
+        _, X_test, _, y_test = train_test_split(
+            df_clean[FEATURE_NAMES], df_clean[TARGET_COLUMN], test_size=test_size, random_state=seed
+        )
+        X_test = X_test.to_numpy(dtype=np.float64)
+        y_test = y_test.to_numpy(dtype=np.float64)
+        for start in range(0, len(X_test), chunk_size):
+            yield X_test[start:start + chunk_size], y_test[start:start + chunk_size]
+        return
+
+    for block in streaming.iter_chunks(csv_path, chunk_size):
+        if split == "hash":
+            block = block[streaming.hash_test_mask(block, test_size, seed)]
+        elif split != "all":
+            raise ValueError(f"Unknown split: {split}")
+        yield block[:, :-1], block[:, -1]
+
+
+def evaluate_stream(predict, chunks, sample_size=DEFAULT_SAMPLE_SIZE, sketch_size=DEFAULT_SKETCH_SIZE):
+    """Score each (X, y) chunk with predict and fold it into a StreamingEvaluation"""
+    evaluation = StreamingEvaluation(sample_size, sketch_size)
+    for X, y in chunks:
+        if len(X):
+            evaluation.update(y, predict(X))
+    return evaluation
+
+
+def pipeline_predict(pipeline):
+    """predict() taking a float array, for pipelines fitted on a DataFrame"""
+    return lambda X: pipeline.predict(pd.DataFrame(X, columns=FEATURE_NAMES))
+
+
+def measure_inference_time(pipeline, sample, iterations=1000):
+    """Average single-row pipeline.predict time in seconds"""
+    single_sample = pd.DataFrame(np.asarray(sample, dtype=np.float64).reshape(1, -1), columns=FEATURE_NAMES)
     start_time = time.perf_counter()
-    temp_pipeline.fit(X_train, y_train)
+    for _ in range(iterations):
+        _ = pipeline.predict(single_sample)
     end_time = time.perf_counter()
-    
-    training_time = end_time - start_time
-    training_time_str = f"{training_time:.6f} seconds"
-else:
-    training_time_str = "Not measured (set MEASURE_TRAINING_TIME=True to measure)"
-
-# ================================
-# Print Results
-# ================================
-print("\n" + "=" * 60)
-print("EVALUATION RESULTS")
-print("=" * 60)
+    return (end_time - start_time) / iterations
 
-print(f"\nR² Score: {r2:.6f}")
-print(f"MAE (Mean Absolute Error): {mae:.4f}")
-print(f"MSE (Mean Squared Error): {mse:.4f}")
-print(f"RMSE (Root Mean Squared Error): {rmse:.4f}")
 
-print(f"\nRegression Coefficients (β):")
-print(f"  Intercept (β₀): {intercept:.6f}")
-for i, (feature, coef) in enumerate(zip(FEATURE_NAMES, coefficients)):
-    print(f"  {feature:30s} (β{i+1}): {coef:12.6f}")
+def measure_training_time(csv_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Seconds to refit the scaler + linear regression out-of-core"""
+    start_time = time.perf_counter()
+    train_stats, _ = streaming.accumulate(csv_path, chunk_size)
+    streaming.fit_pipeline(train_stats)
+    return time.perf_counter() - start_time
 
-print(f"\nTraining Time: {training_time_str}")
-print(f"Inference Time (avg per prediction): {avg_inference_time*1000:.6f} ms ({avg_inference_time:.9f} seconds)")
 
 # ================================
-# Generate Visualizations
+# Visualizations
 # ================================
-print("\n[6/6] Generating visualizations...")
-
-# Create figure with two subplots
-fig, axes = plt.subplots(1, 2, figsize=(14, 5))
-
-# --------------------------------
-# Plot 1: Actual vs Predicted (Scatter Plot)
-# --------------------------------
-ax1 = axes[0]
-
-# Convert to numpy arrays for plotting
-y_test_np = y_test.values if hasattr(y_test, 'values') else y_test
-y_pred_np = y_pred
-
-ax1.scatter(y_test_np, y_pred_np, alpha=0.5, edgecolors='k', linewidth=0.5)
-
-# Add perfect prediction line
-min_val = min(y_test_np.min(), y_pred_np.min())
-max_val = max(y_test_np.max(), y_pred_np.max())
-ax1.plot([min_val, max_val], [min_val, max_val], 'r--', lw=2, label='Perfect Prediction')
-
-ax1.set_xlabel('Actual CO₂ Emissions', fontsize=12, fontweight='bold')
-ax1.set_ylabel('Predicted CO₂ Emissions', fontsize=12, fontweight='bold')
-ax1.set_title('Actual vs Predicted CO₂ Emissions', fontsize=14, fontweight='bold', pad=15)
-ax1.legend()
-ax1.grid(True, alpha=0.3)
-
-# Add R² score to plot
-ax1.text(0.05, 0.95, f'R² = {r2:.4f}', transform=ax1.transAxes,
-         fontsize=11, verticalalignment='top',
-         bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.8))
-
-# --------------------------------
-# Plot 2: Residual Plot
-# --------------------------------
-ax2 = axes[1]
-residuals = y_test_np - y_pred_np
-ax2.scatter(y_pred_np, residuals, alpha=0.5, edgecolors='k', linewidth=0.5)
-
-# Add zero line
-ax2.axhline(y=0, color='r', linestyle='--', lw=2, label='Zero Residual')
-
-ax2.set_xlabel('Predicted CO₂ Emissions', fontsize=12, fontweight='bold')
-ax2.set_ylabel('Residuals (Actual - Predicted)', fontsize=12, fontweight='bold')
-ax2.set_title('Residual Plot', fontsize=14, fontweight='bold', pad=15)
-ax2.legend()
-ax2.grid(True, alpha=0.3)
-
-# Add statistics to residual plot
-residual_mean = residuals.mean()
-residual_std = residuals.std()
-ax2.text(0.05, 0.95, f'Mean: {residual_mean:.4f}\nStd: {residual_std:.4f}',
-         transform=ax2.transAxes, fontsize=11, verticalalignment='top',
-         bbox=dict(boxstyle='round', facecolor='lightblue', alpha=0.8))
-
-plt.tight_layout()
-
-# Save plots
-output_dir = 'evaluation_results'
-os.makedirs(output_dir, exist_ok=True)
-plot_path = os.path.join(output_dir, 'evaluation_plots.png')
-plt.savefig(plot_path, dpi=300, bbox_inches='tight')
-print(f"✓ Plots saved to: {plot_path}")
-
-plt.show()
+def plot_evaluation(evaluation, plot_path, show=False):
+    """Actual-vs-predicted and residual plots from the reservoir sample"""
+    import matplotlib.pyplot as plt
+
+    metrics = evaluation.metrics()
+    sample = evaluation.reservoir.sample
+    y_test_np, y_pred_np = sample[:, 0], sample[:, 1]
+
+    # Create figure with two subplots
+    fig, axes = plt.subplots(1, 2, figsize=(14, 5))
+
+    # --------------------------------
+    # Plot 1: Actual vs Predicted (Scatter Plot)
+    # --------------------------------
+    ax1 = axes[0]
+    ax1.scatter(y_test_np, y_pred_np, alpha=0.5, edgecolors='k', linewidth=0.5)
+
+    # Add perfect prediction line
+    min_val = min(y_test_np.min(), y_pred_np.min())
+    max_val = max(y_test_np.max(), y_pred_np.max())
+    ax1.plot([min_val, max_val], [min_val, max_val], 'r--', lw=2, label='Perfect Prediction')
+
+    ax1.set_xlabel('Actual CO₂ Emissions', fontsize=12, fontweight='bold')
+    ax1.set_ylabel('Predicted CO₂ Emissions', fontsize=12, fontweight='bold')
+    ax1.set_title('Actual vs Predicted CO₂ Emissions', fontsize=14, fontweight='bold', pad=15)
+    ax1.legend()
+    ax1.grid(True, alpha=0.3)
+
+    # Add R² score to plot
+    ax1.text(0.05, 0.95, f'R² = {metrics["r2"]:.4f}', transform=ax1.transAxes,
+             fontsize=11, verticalalignment='top',
+             bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.8))
+
+    # --------------------------------
+    # Plot 2: Residual Plot
+    # --------------------------------
+    ax2 = axes[1]
+    residuals = y_test_np - y_pred_np
+    ax2.scatter(y_pred_np, residuals, alpha=0.5, edgecolors='k', linewidth=0.5)
+
+    # Add zero line
+    ax2.axhline(y=0, color='r', linestyle='--', lw=2, label='Zero Residual')
+
+    ax2.set_xlabel('Predicted CO₂ Emissions', fontsize=12, fontweight='bold')
+    ax2.set_ylabel('Residuals (Actual - Predicted)', fontsize=12, fontweight='bold')
+    ax2.set_title('Residual Plot', fontsize=14, fontweight='bold', pad=15)
+    ax2.legend()
+    ax2.grid(True, alpha=0.3)
+
+    # Statistics over the whole holdout set, not just the plotted sample
+    ax2.text(0.05, 0.95, f'Mean: {metrics["residual_mean"]:.4f}\nStd: {metrics["residual_std"]:.4f}',
+             transform=ax2.transAxes, fontsize=11, verticalalignment='top',
+             bbox=dict(boxstyle='round', facecolor='lightblue', alpha=0.8))
+
+    if evaluation.reservoir.seen > len(sample):
+        fig.suptitle(f'{len(sample)} of {evaluation.reservoir.seen} holdout rows shown', fontsize=10)
+
+    plt.tight_layout()
+
+    os.makedirs(os.path.dirname(plot_path) or '.', exist_ok=True)
+    plt.savefig(plot_path, dpi=300, bbox_inches='tight')
+    if show:
+        plt.show()
+    plt.close(fig)
+    return plot_path
+
 
 # ================================
-# Additional Statistics
+# Command line
 # ================================
-print("\n" + "=" * 60)
-print("ADDITIONAL STATISTICS")
-print("=" * 60)
-
-print(f"\nPrediction Statistics:")
-print(f"  Mean Predicted Value: {y_pred_np.mean():.4f}")
-print(f"  Std Predicted Value: {y_pred_np.std():.4f}")
-print(f"  Min Predicted Value: {y_pred_np.min():.4f}")
-print(f"  Max Predicted Value: {y_pred_np.max():.4f}")
-
-print(f"\nActual Statistics:")
-print(f"  Mean Actual Value: {y_test_np.mean():.4f}")
-print(f"  Std Actual Value: {y_test_np.std():.4f}")
-print(f"  Min Actual Value: {y_test_np.min():.4f}")
-print(f"  Max Actual Value: {y_test_np.max():.4f}")
-
-print(f"\nResidual Statistics:")
-print(f"  Mean Residual: {residuals.mean():.4f}")
-print(f"  Std Residual: {residuals.std():.4f}")
-print(f"  Min Residual: {residuals.min():.4f}")
-print(f"  Max Residual: {residuals.max():.4f}")
-
-print("\n" + "=" * 60)
-print("EVALUATION COMPLETE")
-print("=" * 60)
+def parse_args():
+    parser = argparse.ArgumentParser(description="Evaluate the trained CO2 emissions model")
+    parser.add_argument("--model", default=PIPELINE_PATH, help="Pickled pipeline")
+    parser.add_argument("--csv", default=DATASET_PATH, help="Dataset the holdout split is taken from")
+    parser.add_argument("--split", choices=["random", "hash"], default="random",
+                        help="random: train.py's default split (in memory); hash: streamed hash split")
+    parser.add_argument("--holdout", help="Stream every row of this CSV instead of splitting --csv")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--cache-dir", default=dataset_cache.DEFAULT_CACHE_DIR,
+                        help="Columnar dataset cache the holdout rows are read from")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Read the holdout rows from the CSV instead of the columnar cache")
+    parser.add_argument("--sample-size", type=int, default=DEFAULT_SAMPLE_SIZE,
+                        help="Rows kept in the reservoir sample for plotting")
+    parser.add_argument("--sketch-size", type=int, default=DEFAULT_SKETCH_SIZE,
+                        help="Compactor size of the residual quantile sketch")
+    parser.add_argument("--measure-training-time", action="store_true",
+                        help="Also time an out-of-core refit of the scaler + linear regression")
+    parser.add_argument("--output", help="Write the metrics to this JSON file")
+    parser.add_argument("--no-plots", action="store_true")
+    parser.add_argument("--show", action="store_true", help="Open the plots in a window")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    print("=" * 60)
+    print("CO₂ EMISSIONS PREDICTION MODEL EVALUATION")
+    print("=" * 60)
+
+    print("\n[1/5] Loading trained pipeline...")
+    # Load trained pipeline (contains scaler + regressor)
+    pipeline = joblib.load(args.model)
+    print(f"✓ Pipeline loaded: {type(pipeline).__name__}")
+
+    # Extract model and scaler from pipeline
+    model = pipeline.named_steps['regressor']
+    print(f"✓ Model: {type(model).__name__}")
+    if 'scaler' in pipeline.named_steps:
+        print(f"✓ Scaler: {type(pipeline.named_steps['scaler']).__name__}")
+
+    print("\n[2/5] Streaming holdout set and computing metrics...")
+    cache_dir = None if args.no_cache else args.cache_dir
+    if args.holdout:
+        chunks = holdout_chunks(args.holdout, split="all", chunk_size=args.chunk_size, cache_dir=cache_dir)
+        print(f"✓ Holdout: every row of {args.holdout}")
+    else:
+        chunks = holdout_chunks(args.csv, split=args.split, chunk_size=args.chunk_size, cache_dir=cache_dir)
+        print(f"✓ Holdout: {args.split} 80/20 split of {args.csv}")
+
+    # First holdout row, kept for the single-row inference timing
+    first_rows = []
+
+    def remember_first_row(chunks):
+        for X, y in chunks:
+            if not first_rows and len(X):
+                first_rows.append(X[0])
+            yield X, y
+
+    started = time.perf_counter()
+    evaluation = evaluate_stream(
+        pipeline_predict(pipeline), remember_first_row(chunks),
+        sample_size=args.sample_size, sketch_size=args.sketch_size
+    )
+    elapsed = time.perf_counter() - started
+    metrics = evaluation.metrics()
+    print(f"✓ Evaluated {evaluation.count} samples in {evaluation.chunks} chunks "
+          f"({evaluation.count / elapsed:,.0f} rows/s)")
+
+    print("\n[3/5] Measuring inference time...")
+    avg_inference_time = measure_inference_time(pipeline, first_rows[0])
+
+    if args.measure_training_time:
+        training_time = measure_training_time(args.csv, args.chunk_size)
+        training_time_str = f"{training_time:.6f} seconds (out-of-core refit)"
+    else:
+        training_time_str = "Not measured (pass --measure-training-time to measure)"
+
+    # ================================
+    # Print Results
+    # ================================
+    print("\n" + "=" * 60)
+    print("EVALUATION RESULTS")
+    print("=" * 60)
+
+    print(f"\nR² Score: {metrics['r2']:.6f}")
+    print(f"MAE (Mean Absolute Error): {metrics['mae']:.4f}")
+    print(f"MSE (Mean Squared Error): {metrics['mse']:.4f}")
+    print(f"RMSE (Root Mean Squared Error): {metrics['rmse']:.4f}")
+
+    if hasattr(model, 'coef_') and len(model.coef_) == len(FEATURE_NAMES):
+        print(f"\nRegression Coefficients (β):")
+        print(f"  Intercept (β₀): {model.intercept_:.6f}")
+        for i, (feature, coef) in enumerate(zip(FEATURE_NAMES, model.coef_)):
+            print(f"  {feature:30s} (β{i+1}): {coef:12.6f}")
+
+    print(f"\nTraining Time: {training_time_str}")
+    print(f"Inference Time (avg per prediction): {avg_inference_time*1000:.6f} ms ({avg_inference_time:.9f} seconds)")
+
+    # ================================
+    # Generate Visualizations
+    # ================================
+    print("\n[4/5] Generating visualizations...")
+    if args.no_plots:
+        print("✓ Skipped (--no-plots)")
+    else:
+        plot_path = plot_evaluation(
+            evaluation, os.path.join('evaluation_results', 'evaluation_plots.png'), show=args.show
+        )
+        print(f"✓ Plots saved to: {plot_path} "
+              f"({len(evaluation.reservoir.sample)} sampled points)")
+
+    # ================================
+    # Additional Statistics
+    # ================================
+    print("\n[5/5] Additional statistics")
+    print("\n" + "=" * 60)
+    print("ADDITIONAL STATISTICS")
+    print("=" * 60)
+
+    for label, key in [("Predicted", "predicted"), ("Actual", "actual"), ("Residual", "residuals")]:
+        stats = metrics[key]
+        print(f"\n{label} Statistics:")
+        print(f"  Mean {label} Value: {stats['mean']:.4f}")
+        print(f"  Std {label} Value: {stats['std']:.4f}")
+        print(f"  Min {label} Value: {stats['min']:.4f}")
+        print(f"  Max {label} Value: {stats['max']:.4f}")
+
+    print(f"\nResidual Quantiles (approximate):")
+    for name, value in metrics["residual_quantiles"].items():
+        print(f"  {name:>5s}: {value:.4f}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({**metrics, "inference_seconds": avg_inference_time}, f, indent=2)
+        print(f"\n✓ Metrics saved to: {args.output}")
+
+    print("\n" + "=" * 60)
+    print("EVALUATION COMPLETE")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
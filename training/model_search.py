@@ -0,0 +1,293 @@
+"""
+Parallel model search for the CO2 emissions model
+
+Every candidate pipeline (linear, Ridge, Lasso, polynomial and tree
+ensembles over small hyperparameter grids) is scored with k-fold cross
+validation. Candidate x fold jobs are spread over a process pool; the
+training data is copied once into a shared memory block that each worker
+maps on start-up, so jobs only carry a candidate index and a fold number.
+
+Once every fold is scored, each worker refits a candidate on all training
+rows and times its predictions, returning only the latency figures, so
+fitted ensembles are never pickled back to the parent. Timing jobs run
+after the CV jobs, one per worker, so they only share the machine with
+each other. The leaderboard ranks candidates by CV RMSE and selects the
+most accurate one within the serving latency budget.
+
+By default only affine candidates (StandardScaler + a linear regressor)
+can be selected: they export to the compact artifact with prediction
+intervals and drift bins, while polynomial and tree models can only be
+served from the pickle. The others are still scored for the leaderboard.
+"""
+
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import Lasso, LinearRegression, Ridge
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import PolynomialFeatures, StandardScaler
+
+# Candidate families and their hyperparameter grids
+SEARCH_SPACE = {
+    "linear": {},
+    "ridge": {"alpha": [0.01, 0.1, 1.0, 10.0, 100.0]},
+    "lasso": {"alpha": [0.01, 0.1, 1.0, 10.0]},
+    "poly_ridge": {"degree": [2, 3], "alpha": [0.1, 1.0, 10.0]},
+    "random_forest": {"n_estimators": [100], "max_depth": [None, 8, 12], "min_samples_leaf": [1, 3]},
+    "gradient_boosting": {"n_estimators": [100, 300], "max_depth": [2, 3], "learning_rate": [0.05, 0.1]},
+}
+
+# Families exported as compact artifacts by train.py
+AFFINE_FAMILIES = ("linear", "ridge", "lasso")
+
+DEFAULT_FOLDS = 5
+DEFAULT_LATENCY_BUDGET_MS = 5.0
+
+# Single-row predict calls timed per candidate
+LATENCY_REPEATS = 200
+LATENCY_BATCH_ROWS = 1000
+
+# Worker-side view of the shared training data, set by _attach
+_shared = {}
+
+
+def candidates(search_space=SEARCH_SPACE):
+    """Expand the search space into a list of (family, params) pairs"""
+    expanded = []
+    for family, grid in search_space.items():
+        names = sorted(grid)
+        for values in itertools.product(*(grid[name] for name in names)):
+            expanded.append((family, dict(zip(names, values))))
+    return expanded
+
+
+def build_pipeline(family, params, random_state=42):
+    """Unfitted pipeline for a candidate"""
+    if family == "linear":
+        regressor = LinearRegression()
+    elif family == "ridge":
+        regressor = Ridge(alpha=params["alpha"])
+    elif family == "lasso":
+        regressor = Lasso(alpha=params["alpha"], max_iter=10000)
+    elif family == "poly_ridge":
+        return Pipeline([
+            ('poly', PolynomialFeatures(degree=params["degree"], include_bias=False)),
+            ('scaler', StandardScaler()),
+            ('regressor', Ridge(alpha=params["alpha"]))
+        ])
+    elif family == "random_forest":
+        regressor = RandomForestRegressor(random_state=random_state, n_jobs=1, **params)
+    elif family == "gradient_boosting":
+        regressor = GradientBoostingRegressor(random_state=random_state, **params)
+    else:
+        raise ValueError(f"Unknown model family: {family}")
+
+    return Pipeline([
+        ('scaler', StandardScaler()),
+        ('regressor', regressor)
+    ])
+
+
+def describe(family, params):
+    if not params:
+        return family
+    return family + "(" + ", ".join(f"{key}={value}" for key, value in params.items()) + ")"
+
+
+def fold_assignments(n_rows, folds, seed=42):
+    """Fold number of every row, shuffled deterministically"""
+    order = np.random.default_rng(seed).permutation(n_rows)
+    assignment = np.empty(n_rows, dtype=np.int8)
+    assignment[order] = np.arange(n_rows) % folds
+    return assignment
+
+
+def _attach(name, shape, fold_ids, search):
+    """Pool initializer: map the shared training data once per worker"""
+    # The parent owns and unlinks the block. Before Python 3.13 attaching
+    # always registers it, but workers report to the parent's resource
+    # tracker, so that only repeats the parent's own entry; unregistering it
+    # here would make the parent's unlink fail in the tracker.
+    try:
+        block = shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        block = shared_memory.SharedMemory(name=name)
+    _shared.update(
+        block=block,
+        data=np.ndarray(shape, dtype=np.float64, buffer=block.buf),
+        folds=fold_ids,
+        candidates=search,
+    )
+
+
+def _score_fold(candidate_index, fold):
+    """Fit one candidate on all folds but one and score it on the held-out fold"""
+    data, folds = _shared["data"], _shared["folds"]
+    family, params = _shared["candidates"][candidate_index]
+    train, test = folds != fold, folds == fold
+
+    pipeline = build_pipeline(family, params)
+    started = time.perf_counter()
+    pipeline.fit(data[train, :-1], data[train, -1])
+    fit_seconds = time.perf_counter() - started
+
+    predicted = pipeline.predict(data[test, :-1])
+    actual = data[test, -1]
+    return candidate_index, {
+        "r2": r2_score(actual, predicted),
+        "mae": mean_absolute_error(actual, predicted),
+        "rmse": float(np.sqrt(mean_squared_error(actual, predicted))),
+        "fit_seconds": fit_seconds,
+    }
+
+
+def _time_full_fit(candidate_index):
+    """Refit one candidate on every training row and measure its inference latency"""
+    data = _shared["data"]
+    family, params = _shared["candidates"][candidate_index]
+    pipeline = build_pipeline(family, params)
+    pipeline.fit(data[:, :-1], data[:, -1])
+    return candidate_index, measure_latency(pipeline, data[:, :-1])
+
+
+def measure_latency(pipeline, features, repeats=LATENCY_REPEATS, batch_rows=LATENCY_BATCH_ROWS):
+    """Single-row p50/p99 latency in ms and batch cost in µs per row"""
+    rows = features[np.arange(repeats) % len(features)]
+    pipeline.predict(rows[:1])  # warm-up
+
+    timings = np.empty(repeats)
+    for i in range(repeats):
+        started = time.perf_counter()
+        pipeline.predict(rows[i:i + 1])
+        timings[i] = time.perf_counter() - started
+
+    batch = features[np.arange(batch_rows) % len(features)]
+    started = time.perf_counter()
+    pipeline.predict(batch)
+    batch_seconds = time.perf_counter() - started
+
+    return {
+        "p50_ms": float(np.percentile(timings, 50) * 1000),
+        "p99_ms": float(np.percentile(timings, 99) * 1000),
+        "batch_us_per_row": batch_seconds / batch_rows * 1e6,
+    }
+
+
+def rank_candidates(leaderboard, latency_budget_ms, affine_only=True):
+    """
+    Sort leaderboard entries by CV RMSE in place and flag the eligible ones.
+
+    Returns the selected entry: the most accurate one whose p99 latency is
+    within the budget (and affine, with affine_only), or None.
+    """
+    leaderboard.sort(key=lambda entry: entry["cv_rmse"])
+    for rank, entry in enumerate(leaderboard, start=1):
+        entry["rank"] = rank
+        entry["within_budget"] = entry["latency"]["p99_ms"] <= latency_budget_ms
+        entry["eligible"] = entry["within_budget"] and \
+            (not affine_only or entry["family"] in AFFINE_FAMILIES)
+
+    return next((entry for entry in leaderboard if entry["eligible"]), None)
+
+
+def search(X, y, folds=DEFAULT_FOLDS, workers=None, latency_budget_ms=DEFAULT_LATENCY_BUDGET_MS,
+           search_space=SEARCH_SPACE, affine_only=True):
+    """
+    Cross-validate every candidate in parallel and rank them.
+
+    Returns a dict with the ranked leaderboard (best CV RMSE first) and the
+    selected entry, the best one within the latency budget; with
+    affine_only, the best affine one. The caller fits the selected
+    candidate itself (build_pipeline), on its own feature frame.
+    """
+    data = np.column_stack([np.asarray(X, dtype=np.float64), np.asarray(y, dtype=np.float64)])
+    search_candidates = candidates(search_space)
+    fold_ids = fold_assignments(len(data), folds)
+    workers = workers or os.cpu_count() or 1
+
+    block = shared_memory.SharedMemory(create=True, size=data.nbytes)
+    try:
+        np.ndarray(data.shape, dtype=np.float64, buffer=block.buf)[:] = data
+
+        started = time.perf_counter()
+        fold_scores = {i: [] for i in range(len(search_candidates))}
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_attach,
+            initargs=(block.name, data.shape, fold_ids, search_candidates),
+        ) as pool:
+            jobs = [(i, fold) for i in range(len(search_candidates)) for fold in range(folds)]
+            for index, scores in pool.map(_score_fold, *zip(*jobs)):
+                fold_scores[index].append(scores)
+            latencies = dict(pool.map(_time_full_fit, range(len(search_candidates))))
+        search_seconds = time.perf_counter() - started
+    finally:
+        block.close()
+        block.unlink()
+
+    leaderboard = []
+    for index, (family, params) in enumerate(search_candidates):
+        scores = fold_scores[index]
+        rmse = [s["rmse"] for s in scores]
+        leaderboard.append({
+            "candidate": describe(family, params),
+            "family": family,
+            "params": params,
+            "cv_rmse": float(np.mean(rmse)),
+            "cv_rmse_std": float(np.std(rmse)),
+            "cv_mae": float(np.mean([s["mae"] for s in scores])),
+            "cv_r2": float(np.mean([s["r2"] for s in scores])),
+            "fit_seconds": float(np.mean([s["fit_seconds"] for s in scores])),
+            "latency": latencies[index],
+        })
+
+    selected = rank_candidates(leaderboard, latency_budget_ms, affine_only)
+
+    return {
+        "folds": folds,
+        "workers": workers,
+        "rows": len(data),
+        "search_seconds": search_seconds,
+        "latency_budget_ms": latency_budget_ms,
+        "affine_only": affine_only,
+        "leaderboard": leaderboard,
+        "selected": selected,
+    }
+
+
+def print_leaderboard(results, limit=None):
+    print("\n" + "="*50)
+    print("MODEL SEARCH LEADERBOARD")
+    print("="*50)
+    print(f"{results['rows']} rows, {results['folds']}-fold CV, {results['workers']} workers, "
+          f"{results['search_seconds']:.1f}s; latency budget p99 <= {results['latency_budget_ms']} ms\n")
+    print(f"{'#':>3}  {'Candidate':66s} {'RMSE':>7} {'MAE':>7} {'R²':>7} {'p50 ms':>7} {'p99 ms':>7} {'µs/row':>7}")
+    for entry in results["leaderboard"][:limit]:
+        latency = entry["latency"]
+        marker = " " if entry["eligible"] else ("!" if not entry["within_budget"] else "~")
+        print(f"{entry['rank']:>3}{marker} {entry['candidate']:66s} {entry['cv_rmse']:7.2f} "
+              f"{entry['cv_mae']:7.2f} {entry['cv_r2']:7.4f} {latency['p50_ms']:7.3f} "
+              f"{latency['p99_ms']:7.3f} {latency['batch_us_per_row']:7.2f}")
+    print("\n! = over the latency budget")
+    if results["affine_only"]:
+        print("~ = not affine, skipped (train.py --allow-nonlinear to select it)")
+    if results["selected"] is not None:
+        print(f"Selected: {results['selected']['candidate']}")
+    else:
+        print("No eligible candidate meets the latency budget")
+
+
+def save_leaderboard(results, output_path):
+    """Write the search results as JSON"""
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Leaderboard saved to {output_path}")
+    return output_path
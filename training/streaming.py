@@ -0,0 +1,263 @@
+"""
+Out-of-core training for the CO2 emissions model
+
+A StandardScaler + LinearRegression pipeline is fully determined by a few
+sufficient statistics of the training rows: the row count, the feature and
+target means, and the centered cross-product matrix of [X, y] (whose
+diagonal gives the variances and whose blocks are the centered XᵀX and Xᵀy).
+These are accumulated chunk by chunk while the CSV is read, so memory stays
+constant no matter how large the file is, and the pipeline is solved from
+them at the end. The result matches an in-memory fit on the same rows to
+floating point precision.
+
+Chunks are merged with the pairwise update of Chan, Golub and LeVeque,
+which avoids the cancellation error of accumulating raw sums of squares.
+
+Rows are assigned to the test set by hashing their feature and target
+values, so the split is deterministic, independent of chunk size and row
+order, and the same for both streaming passes and the in-memory mode.
+"""
+
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+FEATURE_COLUMNS = ['ENGINESIZE', 'CYLINDERS', 'FUELCONSUMPTION_COMB']
+TARGET_COLUMN = 'CO2EMISSIONS'
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+# Cumulative probabilities of the interior cut points of the drift reference bins (deciles)
+BIN_QUANTILES = tuple(k / 10 for k in range(1, 10))
+
+
+class MomentAccumulator:
+    """Running count, means and centered cross-products of [X, y] rows"""
+
+    def __init__(self, n_columns=len(FEATURE_COLUMNS) + 1):
+        self.count = 0
+        self.mean = np.zeros(n_columns)
+        self.comoment = np.zeros((n_columns, n_columns))
+
+    def update(self, block):
+        """Fold a 2D array of rows into the statistics"""
+        n_block = len(block)
+        if n_block == 0:
+            return
+        block_mean = block.mean(axis=0)
+        centered = block - block_mean
+        self._merge(n_block, block_mean, centered.T @ centered)
+
+    def merge(self, other):
+        """Fold another accumulator's statistics into this one"""
+        if other.count:
+            self._merge(other.count, other.mean, other.comoment)
+
+    def _merge(self, n_other, mean_other, comoment_other):
+        total = self.count + n_other
+        delta = mean_other - self.mean
+        self.comoment += comoment_other + np.outer(delta, delta) * (self.count * n_other / total)
+        self.mean += delta * (n_other / total)
+        self.count = total
+
+    @property
+    def variance(self):
+        """Population variance of every column (ddof=0, as StandardScaler uses)"""
+        return np.diag(self.comoment) / self.count
+
+    def xtx(self):
+        """Centered XᵀX of the feature columns"""
+        return self.comoment[:-1, :-1]
+
+    def xty(self):
+        """Centered Xᵀy between the features and the target"""
+        return self.comoment[:-1, -1]
+
+
+def hash_test_mask(values, test_size=0.2, seed=42):
+    """
+    Boolean mask of rows that belong to the test set.
+
+    values is a 2D float array of [features..., target] rows; a row is in
+    the test set when its 64-bit hash falls in the lowest test_size fraction
+    of the hash range.
+    """
+    frame = pd.DataFrame(values)
+    # pandas only applies hash_key to object columns, so the seed is mixed
+    # into the row hash of the numeric columns as a constant column instead
+    frame.insert(0, "seed", np.uint64(seed))
+    hashes = pd.util.hash_pandas_object(frame, index=False).to_numpy()
+    threshold = np.uint64(min(int(test_size * 2**64), 2**64 - 1))
+    return hashes < threshold
+
+
+def iter_chunks(csv_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield [features..., target] float64 blocks, with incomplete rows dropped"""
+    columns = FEATURE_COLUMNS + [TARGET_COLUMN]
+    for chunk in pd.read_csv(csv_path, usecols=columns, chunksize=chunk_size):
+        yield chunk[columns].dropna().to_numpy(dtype=np.float64)
+
+
+def accumulate(csv_path, chunk_size=DEFAULT_CHUNK_SIZE, test_size=0.2, seed=42):
+    """One pass over the CSV; returns (train, test) MomentAccumulators"""
+    train, test = MomentAccumulator(), MomentAccumulator()
+    for block in iter_chunks(csv_path, chunk_size):
+        in_test = hash_test_mask(block, test_size, seed)
+        train.update(block[~in_test])
+        test.update(block[in_test])
+    return train, test
+
+
+def fit_pipeline(stats, feature_names=FEATURE_COLUMNS):
+    """
+    Solve a fitted StandardScaler + LinearRegression pipeline from the
+    training statistics, with the same attributes sklearn's fit() sets.
+    """
+    n_features = len(feature_names)
+    feature_mean = stats.mean[:-1]
+    feature_var = stats.variance[:-1]
+
+    scaler = StandardScaler()
+    scaler.mean_ = feature_mean.copy()
+    scaler.var_ = feature_var.copy()
+    # Constant features are left unscaled, as in StandardScaler.fit
+    scaler.scale_ = np.where(feature_var > 0, np.sqrt(feature_var), 1.0)
+    scaler.n_samples_seen_ = stats.count
+    scaler.n_features_in_ = n_features
+    scaler.feature_names_in_ = np.asarray(feature_names, dtype=object)
+
+    # OLS on centered raw features; least squares so collinear data still solves
+    raw_coef, _, rank, singular = np.linalg.lstsq(stats.xtx(), stats.xty(), rcond=None)
+
+    regressor = LinearRegression()
+    # Coefficients on standardized features; their mean is zero, so the
+    # intercept is the target mean
+    regressor.coef_ = raw_coef * scaler.scale_
+    regressor.intercept_ = float(stats.mean[-1])
+    regressor.rank_ = int(rank)
+    regressor.singular_ = singular
+    regressor.n_features_in_ = n_features
+
+    return Pipeline([
+        ('scaler', scaler),
+        ('regressor', regressor)
+    ])
+
+
+def interval_statistics(stats, squared_error):
+    """
+    Statistics for OLS prediction intervals, as stored in the compact artifact.
+
+    squared_error is the residual sum of squares over the training rows in
+    stats. Returns None when there are too few rows to estimate the
+    residual variance. xtx_inv is the pseudo-inverse of the centered XᵀX;
+    together with n_samples it gives the (XᵀX)⁻¹ of the design matrix with
+    an intercept column, in a form that needs no intercept column at
+    prediction time.
+    """
+    n_features = len(stats.mean) - 1
+    degrees_of_freedom = stats.count - n_features - 1
+    if degrees_of_freedom <= 0:
+        return None
+    return {
+        "residual_variance": float(squared_error / degrees_of_freedom),
+        "degrees_of_freedom": int(degrees_of_freedom),
+        "n_samples": int(stats.count),
+        "feature_mean": stats.mean[:-1].tolist(),
+        "xtx_inv": np.linalg.pinv(stats.xtx()).tolist(),
+    }
+
+
+def bin_counts(edges, column):
+    """
+    Rows per bin of one feature column; len(edges) + 1 counts.
+
+    Bin i holds values v with edges[i-1] <= v < edges[i], the outer bins
+    are open-ended. Must stay identical to the binning in ml-service/drift.py.
+    """
+    return np.bincount(np.searchsorted(edges, column, side="right"), minlength=len(edges) + 1)
+
+
+def normal_bin_edges(stats):
+    """
+    Decile cut points of each feature under a normal fit to its moments.
+
+    Used as drift reference bins when the training rows are never held in
+    memory, so exact quantiles are not available.
+    """
+    normal = NormalDist()
+    z = np.array([normal.inv_cdf(q) for q in BIN_QUANTILES])
+    std = np.sqrt(stats.variance[:-1])
+    return [stats.mean[i] + std[i] * z for i in range(len(std))]
+
+
+def feature_bins(edges, counts):
+    """Drift reference bins, as stored in the compact artifact"""
+    return {
+        "edges": [np.asarray(feature_edges, dtype=np.float64).tolist() for feature_edges in edges],
+        "proportions": [(feature_counts / feature_counts.sum()).tolist() for feature_counts in counts],
+    }
+
+
+class ErrorAccumulator:
+    """Running squared and absolute error of predictions against the target"""
+
+    def __init__(self):
+        self.count = 0
+        self.squared_error = 0.0
+        self.absolute_error = 0.0
+
+    def update(self, actual, predicted):
+        residuals = actual - predicted
+        self.count += len(residuals)
+        self.squared_error += float(residuals @ residuals)
+        self.absolute_error += float(np.abs(residuals).sum())
+
+    def metrics(self, stats):
+        """MSE, RMSE, MAE and R², with the target variance taken from stats; None if empty"""
+        if self.count == 0:
+            return None
+        mse = self.squared_error / self.count
+        return {
+            "mse": mse,
+            "rmse": float(np.sqrt(mse)),
+            "mae": self.absolute_error / self.count,
+            "r2": 1.0 - self.squared_error / stats.comoment[-1, -1],
+        }
+
+
+def evaluate(pipeline, csv_path, train_stats, test_stats, chunk_size=DEFAULT_CHUNK_SIZE,
+             test_size=0.2, seed=42, bin_edges=None):
+    """
+    Second streaming pass computing train and test metrics for a fitted pipeline
+
+    With bin_edges (one array of cut points per feature) the training rows
+    are also counted per bin, under "train_bin_counts".
+    """
+    scaler = pipeline.named_steps['scaler']
+    regressor = pipeline.named_steps['regressor']
+    # Folded affine form of the pipeline, so no per-chunk DataFrame is needed
+    weights = regressor.coef_ / scaler.scale_
+    bias = regressor.intercept_ - weights @ scaler.mean_
+
+    train_errors, test_errors = ErrorAccumulator(), ErrorAccumulator()
+    train_bin_counts = [np.zeros(len(edges) + 1, dtype=np.int64) for edges in bin_edges or ()]
+    for block in iter_chunks(csv_path, chunk_size):
+        in_test = hash_test_mask(block, test_size, seed)
+        predicted = block[:, :-1] @ weights + bias
+        train_errors.update(block[~in_test, -1], predicted[~in_test])
+        test_errors.update(block[in_test, -1], predicted[in_test])
+        for i, edges in enumerate(bin_edges or ()):
+            train_bin_counts[i] += bin_counts(edges, block[~in_test, i])
+
+    results = {
+        "train": train_errors.metrics(train_stats),
+        "test": test_errors.metrics(test_stats),
+    }
+    if bin_edges is not None:
+        results["train_bin_counts"] = train_bin_counts
+    return results
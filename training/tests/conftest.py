@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The training modules are flat files imported from training/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,116 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.model_selection import train_test_split
+
+import dataset_cache
+import streaming
+from streaming import FEATURE_COLUMNS, TARGET_COLUMN
+
+COLUMNS = FEATURE_COLUMNS + [TARGET_COLUMN]
+
+
+def write_csv(path, n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({
+        "MAKE": ["ACURA"] * n,
+        "ENGINESIZE": rng.uniform(1.0, 8.0, n).round(1),
+        "CYLINDERS": rng.integers(3, 13, n),
+        "FUELCONSUMPTION_COMB": rng.uniform(4.0, 25.0, n).round(1),
+        "CO2EMISSIONS": rng.integers(100, 450, n),
+    })
+    frame.loc[[5, 17], "ENGINESIZE"] = np.nan
+    frame.to_csv(path, index=False)
+    return frame
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "fuel.csv"
+    write_csv(path)
+    return str(path)
+
+
+def test_build_drops_incomplete_rows(csv_path, tmp_path):
+    dataset = dataset_cache.load(csv_path, str(tmp_path / "cache"), verbose=False)
+    expected = pd.read_csv(csv_path)[COLUMNS].dropna()
+
+    assert dataset.rows == 298
+    assert dataset.manifest["source_rows"] == 300
+    assert dataset.manifest["missing"]["ENGINESIZE"] == 2
+    frame = dataset.frame()
+    assert list(frame.columns) == COLUMNS
+    np.testing.assert_array_equal(frame.to_numpy(dtype=np.float64), expected.to_numpy(dtype=np.float64))
+    np.testing.assert_array_equal(dataset.features(), expected[FEATURE_COLUMNS].to_numpy(dtype=np.float64))
+    np.testing.assert_array_equal(dataset.target(slice(10, 20)), expected[TARGET_COLUMN].to_numpy()[10:20])
+
+
+def test_splits_match_the_in_memory_splits(csv_path, tmp_path):
+    dataset = dataset_cache.load(csv_path, str(tmp_path / "cache"), verbose=False)
+    frame = pd.read_csv(csv_path)[COLUMNS].dropna().reset_index(drop=True)
+
+    train, test = dataset.split("random")
+    expected_train, expected_test = train_test_split(
+        frame, test_size=dataset_cache.TEST_SIZE, random_state=dataset_cache.SEED
+    )
+    np.testing.assert_array_equal(train, expected_train.index)
+    np.testing.assert_array_equal(test, expected_test.index)
+
+    train, test = dataset.split("hash")
+    in_test = streaming.hash_test_mask(frame.to_numpy(dtype=np.float64), dataset_cache.TEST_SIZE, dataset_cache.SEED)
+    np.testing.assert_array_equal(test, np.flatnonzero(in_test))
+    np.testing.assert_array_equal(train, np.flatnonzero(~in_test))
+
+    with pytest.raises(ValueError):
+        dataset.split("stratified")
+
+
+def test_unchanged_csv_is_not_parsed_again(csv_path, tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / "cache")
+    first = dataset_cache.load(csv_path, cache_dir, verbose=False)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("the CSV was read again")
+
+    monkeypatch.setattr(dataset_cache, "build", fail)
+    monkeypatch.setattr(dataset_cache, "content_hash", fail)
+    second = dataset_cache.load(csv_path, cache_dir, verbose=False)
+
+    assert second.directory == first.directory
+    assert second.manifest == first.manifest
+
+
+def test_edited_csv_gets_a_new_entry_and_the_old_one_is_pruned(csv_path, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    first = dataset_cache.load(csv_path, cache_dir, verbose=False)
+    write_csv(csv_path, n=250, seed=1)
+
+    second = dataset_cache.load(csv_path, cache_dir, verbose=False)
+
+    assert second.directory != first.directory
+    assert second.manifest["source_rows"] == 250
+    assert not os.path.exists(first.directory)
+    assert sorted(os.listdir(cache_dir)) == sorted([os.path.basename(second.directory), dataset_cache.SOURCES])
+
+
+def test_entries_of_another_format_are_rebuilt(csv_path, tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / "cache")
+    first = dataset_cache.load(csv_path, cache_dir, verbose=False)
+    monkeypatch.setattr(dataset_cache, "CACHE_FORMAT", "ecometer-columnar-test")
+
+    second = dataset_cache.load(csv_path, cache_dir, verbose=False)
+
+    assert second.directory == first.directory
+    assert second.manifest["format"] == "ecometer-columnar-test"
+
+
+@pytest.mark.skipif(int(pd.__version__.split(".")[0]) < 2, reason="pandas 1.x consolidates the columns into a copy")
+def test_frame_shares_the_mapped_columns(csv_path, tmp_path):
+    dataset = dataset_cache.load(csv_path, str(tmp_path / "cache"), verbose=False)
+    frame = dataset.frame()
+
+    for name in COLUMNS:
+        assert isinstance(dataset.columns[name], np.memmap)
+        assert np.shares_memory(frame[name].to_numpy(), dataset.columns[name])
@@ -0,0 +1,145 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+from evaluate import (
+    QUANTILES, QuantileSketch, ReservoirSample, RunningStats, StreamingEvaluation, evaluate_stream,
+    holdout_chunks,
+)
+from streaming import FEATURE_COLUMNS, TARGET_COLUMN
+
+
+def split_points(n, seed=0):
+    """Uneven chunk boundaries, including single-row chunks"""
+    cuts = np.random.default_rng(seed).choice(np.arange(2, n - 1), size=12, replace=False)
+    return sorted({1, *cuts.tolist()})
+
+
+def test_running_stats_of_chunks_match_the_whole():
+    values = np.random.default_rng(0).normal(1e4, 3.0, 5000)
+    stats = RunningStats()
+    for chunk in np.split(values, split_points(len(values))):
+        stats.update(chunk)
+    stats.update(values[:0])
+
+    assert stats.count == len(values)
+    assert stats.mean == pytest.approx(values.mean(), rel=1e-13)
+    assert stats.std == pytest.approx(values.std(), rel=1e-9)
+    assert (stats.min, stats.max) == (values.min(), values.max())
+
+
+def test_sketch_is_exact_until_the_first_compaction():
+    values = np.random.default_rng(1).normal(size=500)
+    sketch = QuantileSketch(k=1024)
+    sketch.update(values)
+
+    np.testing.assert_array_equal(
+        sketch.quantiles(QUANTILES), np.quantile(values, QUANTILES, method="inverted_cdf")
+    )
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_sketch_rank_error_stays_within_the_kll_bound(seed):
+    k, n = 256, 200_000
+    values = np.random.default_rng(seed).lognormal(0.0, 1.0, n)
+    sketch = QuantileSketch(k=k, seed=seed)
+    for chunk in np.split(values, split_points(n, seed)):
+        sketch.update(chunk)
+
+    ranks = np.searchsorted(np.sort(values), sketch.quantiles(QUANTILES), side="right") / n
+
+    # KLL rank error is O(1/k); with k=256 the worst quantile is off by about 1-1.7/k
+    np.testing.assert_allclose(ranks, QUANTILES, atol=3 / k)
+    assert sketch.count == n
+    assert sketch.size <= k * (np.log2(n / k) + 2)
+
+
+def test_empty_sketch_has_nan_quantiles():
+    assert np.isnan(QuantileSketch().quantiles([0.5])).all()
+
+
+def test_reservoir_keeps_every_row_of_a_short_stream():
+    reservoir = ReservoirSample(capacity=10)
+    reservoir.update(np.arange(4.0), np.arange(4.0) * 2)
+    reservoir.update(np.arange(4.0, 7.0), np.arange(4.0, 7.0) * 2)
+
+    np.testing.assert_array_equal(reservoir.sample, np.column_stack([np.arange(7.0), np.arange(7.0) * 2]))
+
+
+def test_reservoir_sample_is_uniform_over_the_stream():
+    capacity, n, runs = 100, 10_000, 200
+    stream = np.arange(n, dtype=np.float64)
+    inclusions = np.zeros(10)
+    for seed in range(runs):
+        reservoir = ReservoirSample(capacity=capacity, seed=seed)
+        for chunk in np.split(stream, [50, 51, 130, 2000, 7777]):
+            reservoir.update(chunk, -chunk)
+        sample = reservoir.sample
+        assert reservoir.seen == n and len(sample) == capacity
+        assert len(np.unique(sample[:, 0])) == capacity
+        np.testing.assert_array_equal(sample[:, 1], -sample[:, 0])
+        inclusions += np.bincount((sample[:, 0] // (n / 10)).astype(int), minlength=10)
+
+    # Every tenth of the stream is equally likely to be kept: 2000 ± ~42 per decile
+    expected = runs * capacity / 10
+    assert np.all(np.abs(inclusions - expected) < 5 * np.sqrt(expected))
+
+
+def scored_rows(n=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    actual = rng.normal(250.0, 60.0, n)
+    predicted = actual + rng.normal(2.0, 15.0, n)
+    return actual, predicted
+
+
+def test_chunked_metrics_match_a_full_computation():
+    actual, predicted = scored_rows()
+    evaluation = StreamingEvaluation(sketch_size=8192)
+    for a, p in zip(np.split(actual, split_points(len(actual))), np.split(predicted, split_points(len(actual)))):
+        evaluation.update(a, p)
+
+    metrics = evaluation.metrics()
+    residuals = actual - predicted
+    assert metrics["count"] == len(actual)
+    assert metrics["r2"] == pytest.approx(r2_score(actual, predicted), rel=1e-10)
+    assert metrics["mae"] == pytest.approx(mean_absolute_error(actual, predicted), rel=1e-10)
+    assert metrics["mse"] == pytest.approx(mean_squared_error(actual, predicted), rel=1e-10)
+    assert metrics["residual_mean"] == pytest.approx(residuals.mean(), rel=1e-10)
+    assert metrics["residual_std"] == pytest.approx(residuals.std(), rel=1e-10)
+    # The sketch never compacted, so its quantiles are exact
+    np.testing.assert_array_equal(
+        list(metrics["residual_quantiles"].values()),
+        np.quantile(residuals, QUANTILES, method="inverted_cdf"),
+    )
+
+
+def test_metrics_without_rows_are_an_error():
+    with pytest.raises(ValueError):
+        StreamingEvaluation().metrics()
+
+
+def test_evaluate_stream_over_csv_chunks_matches_the_whole_file(tmp_path):
+    rng = np.random.default_rng(3)
+    n = 1234
+    frame = pd.DataFrame({
+        "MAKE": "ACURA",
+        FEATURE_COLUMNS[0]: rng.uniform(1.0, 8.0, n).round(1),
+        FEATURE_COLUMNS[1]: rng.integers(3, 13, n),
+        FEATURE_COLUMNS[2]: rng.uniform(4.0, 25.0, n).round(1),
+    })
+    frame[TARGET_COLUMN] = (frame[FEATURE_COLUMNS].to_numpy() @ [12.0, 6.0, 15.0] + rng.normal(0, 5, n)).round()
+    path = tmp_path / "holdout.csv"
+    frame.to_csv(path, index=False)
+
+    def predict(X):
+        return X @ np.array([12.0, 6.0, 15.0])
+
+    chunked = evaluate_stream(predict, holdout_chunks(str(path), split="all", chunk_size=100)).metrics()
+    whole = evaluate_stream(predict, holdout_chunks(str(path), split="all", chunk_size=10_000)).metrics()
+
+    assert chunked["count"] == n
+    for name in ("r2", "mae", "mse", "residual_mean", "residual_std"):
+        assert chunked[name] == pytest.approx(whole[name], rel=1e-10)
+    actual = frame[TARGET_COLUMN].to_numpy()
+    assert chunked["r2"] == pytest.approx(r2_score(actual, predict(frame[FEATURE_COLUMNS].to_numpy())))
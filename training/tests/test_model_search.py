@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+from sklearn.metrics import mean_squared_error
+
+import model_search
+
+SMALL_SPACE = {
+    "linear": {},
+    "ridge": {"alpha": [1.0, 1000.0]},
+    "poly_ridge": {"degree": [2], "alpha": [0.1]},
+}
+
+
+def quadratic_data(n=240, seed=0):
+    rng = np.random.default_rng(seed)
+    X = np.column_stack([
+        rng.uniform(1.0, 8.0, n),
+        rng.integers(3, 13, n).astype(np.float64),
+        rng.uniform(4.0, 25.0, n),
+    ])
+    y = 20.0 * X[:, 0] + 0.8 * X[:, 2] ** 2 + 5.0 * X[:, 1] + rng.normal(0, 2, n)
+    return X, y
+
+
+@pytest.fixture(scope="module")
+def results():
+    X, y = quadratic_data()
+    return model_search.search(X, y, folds=3, workers=2, latency_budget_ms=1e6, search_space=SMALL_SPACE)
+
+
+def test_candidates_expand_every_grid_point():
+    expanded = model_search.candidates(SMALL_SPACE)
+
+    assert expanded == [
+        ("linear", {}),
+        ("ridge", {"alpha": 1.0}),
+        ("ridge", {"alpha": 1000.0}),
+        ("poly_ridge", {"alpha": 0.1, "degree": 2}),
+    ]
+
+
+def test_fold_assignments_are_balanced_and_deterministic():
+    folds = model_search.fold_assignments(103, 5, seed=7)
+
+    np.testing.assert_array_equal(folds, model_search.fold_assignments(103, 5, seed=7))
+    assert sorted(np.bincount(folds)) == [20, 20, 21, 21, 21]
+    assert not np.array_equal(folds, model_search.fold_assignments(103, 5, seed=8))
+
+
+def test_cv_scores_match_a_sequential_cross_validation(results):
+    X, y = quadratic_data()
+    folds = model_search.fold_assignments(len(X), 3)
+    by_name = {entry["candidate"]: entry for entry in results["leaderboard"]}
+
+    for family, params in model_search.candidates(SMALL_SPACE):
+        rmse = []
+        for fold in range(3):
+            train, test = folds != fold, folds == fold
+            pipeline = model_search.build_pipeline(family, params).fit(X[train], y[train])
+            rmse.append(np.sqrt(mean_squared_error(y[test], pipeline.predict(X[test]))))
+        entry = by_name[model_search.describe(family, params)]
+        assert entry["cv_rmse"] == pytest.approx(np.mean(rmse))
+        assert entry["cv_rmse_std"] == pytest.approx(np.std(rmse))
+
+
+def test_leaderboard_is_ranked_by_cv_rmse(results):
+    leaderboard = results["leaderboard"]
+
+    assert [entry["rank"] for entry in leaderboard] == [1, 2, 3, 4]
+    assert [entry["cv_rmse"] for entry in leaderboard] == sorted(entry["cv_rmse"] for entry in leaderboard)
+    # The target is quadratic, so the polynomial candidate wins
+    assert leaderboard[0]["family"] == "poly_ridge"
+    for entry in leaderboard:
+        assert set(entry["latency"]) == {"p50_ms", "p99_ms", "batch_us_per_row"}
+        assert 0 < entry["latency"]["p50_ms"] <= entry["latency"]["p99_ms"]
+
+
+def test_best_affine_candidate_is_selected_by_default(results):
+    assert results["selected"]["family"] in model_search.AFFINE_FAMILIES
+    assert results["selected"] is next(entry for entry in results["leaderboard"] if entry["eligible"])
+    assert not results["leaderboard"][0]["eligible"]
+
+
+def entry(candidate, family, cv_rmse, p99_ms):
+    return {"candidate": candidate, "family": family, "cv_rmse": cv_rmse, "latency": {"p99_ms": p99_ms}}
+
+
+def test_selection_skips_candidates_over_the_latency_budget():
+    leaderboard = [
+        entry("slow ridge", "ridge", 9.0, 2.0),
+        entry("forest", "random_forest", 5.0, 0.5),
+        entry("fast ridge", "ridge", 10.0, 0.1),
+        entry("slow linear", "linear", 8.0, 7.5),
+    ]
+
+    selected = model_search.rank_candidates(leaderboard, latency_budget_ms=1.0)
+
+    assert [e["candidate"] for e in leaderboard] == ["forest", "slow linear", "slow ridge", "fast ridge"]
+    assert [e["rank"] for e in leaderboard] == [1, 2, 3, 4]
+    assert [e["within_budget"] for e in leaderboard] == [True, False, False, True]
+    assert selected["candidate"] == "fast ridge"
+
+
+def test_non_affine_candidates_are_selectable_when_allowed():
+    leaderboard = [entry("ridge", "ridge", 9.0, 0.1), entry("forest", "random_forest", 5.0, 0.5)]
+
+    assert model_search.rank_candidates(leaderboard, 1.0, affine_only=False)["candidate"] == "forest"
+
+
+def test_nothing_is_selected_when_every_candidate_is_too_slow():
+    leaderboard = [entry("ridge", "ridge", 9.0, 3.0), entry("linear", "linear", 10.0, 2.0)]
+
+    assert model_search.rank_candidates(leaderboard, 1.0) is None
+    assert not any(e["eligible"] for e in leaderboard)
@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+import streaming
+from streaming import FEATURE_COLUMNS, TARGET_COLUMN, MomentAccumulator
+
+
+def make_rows(n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    features = np.column_stack([
+        rng.uniform(1.0, 8.0, n),
+        rng.integers(3, 13, n).astype(np.float64),
+        rng.uniform(4.0, 25.0, n),
+    ])
+    target = features @ np.array([12.0, 6.0, 15.0]) + 40.0 + rng.normal(0, 5, n)
+    # Offset like real CO2 values, so naive sums of squares would lose precision
+    return np.column_stack([features, target + 1e4])
+
+
+def test_chunked_updates_match_the_whole():
+    rows = make_rows()
+    stats = MomentAccumulator()
+    for block in np.array_split(rows, [1, 2, 500, 1500]):
+        stats.update(block)
+    stats.update(rows[:0])
+
+    centered = rows - rows.mean(axis=0)
+    assert stats.count == len(rows)
+    np.testing.assert_allclose(stats.mean, rows.mean(axis=0), rtol=1e-13)
+    np.testing.assert_allclose(stats.comoment, centered.T @ centered, rtol=1e-10)
+    np.testing.assert_allclose(stats.variance, rows.var(axis=0), rtol=1e-10)
+
+
+def test_merge_of_accumulators():
+    rows = make_rows()
+    left, right, whole = MomentAccumulator(), MomentAccumulator(), MomentAccumulator()
+    left.update(rows[:700])
+    right.update(rows[700:])
+    whole.update(rows)
+
+    left.merge(right)
+    left.merge(MomentAccumulator())
+
+    assert left.count == whole.count
+    np.testing.assert_allclose(left.mean, whole.mean, rtol=1e-13)
+    np.testing.assert_allclose(left.comoment, whole.comoment, rtol=1e-10)
+
+
+def test_fit_pipeline_matches_a_full_fit():
+    rows = make_rows()
+    stats = MomentAccumulator()
+    for block in np.array_split(rows, 7):
+        stats.update(block)
+
+    streamed = streaming.fit_pipeline(stats)
+    fitted = Pipeline([("scaler", StandardScaler()), ("regressor", LinearRegression())])
+    fitted.fit(pd.DataFrame(rows[:, :3], columns=FEATURE_COLUMNS), rows[:, 3])
+
+    np.testing.assert_allclose(streamed.named_steps["scaler"].mean_, fitted.named_steps["scaler"].mean_, rtol=1e-12)
+    np.testing.assert_allclose(streamed.named_steps["scaler"].scale_, fitted.named_steps["scaler"].scale_, rtol=1e-10)
+    np.testing.assert_allclose(streamed.named_steps["regressor"].coef_, fitted.named_steps["regressor"].coef_, rtol=1e-8)
+    assert streamed.named_steps["regressor"].intercept_ == pytest.approx(fitted.named_steps["regressor"].intercept_)
+
+    probe = pd.DataFrame(make_rows(100, seed=1)[:, :3], columns=FEATURE_COLUMNS)
+    np.testing.assert_allclose(streamed.predict(probe), fitted.predict(probe), rtol=1e-10)
+
+
+def test_interval_statistics():
+    rows = make_rows(300)
+    stats = MomentAccumulator()
+    stats.update(rows)
+    pipeline = streaming.fit_pipeline(stats)
+    residuals = rows[:, 3] - pipeline.predict(pd.DataFrame(rows[:, :3], columns=FEATURE_COLUMNS))
+
+    params = streaming.interval_statistics(stats, residuals @ residuals)
+
+    assert params["degrees_of_freedom"] == 296
+    assert params["residual_variance"] == pytest.approx(residuals @ residuals / 296)
+    centered = rows[:, :3] - rows[:, :3].mean(axis=0)
+    np.testing.assert_allclose(params["xtx_inv"], np.linalg.inv(centered.T @ centered), rtol=1e-8)
+
+    tiny = MomentAccumulator()
+    tiny.update(rows[:4])
+    assert streaming.interval_statistics(tiny, 1.0) is None
+
+
+def test_hash_split_ignores_row_order_and_chunking():
+    rows = make_rows()
+    mask = streaming.hash_test_mask(rows)
+    order = np.random.default_rng(2).permutation(len(rows))
+
+    np.testing.assert_array_equal(streaming.hash_test_mask(rows[order]), mask[order])
+    np.testing.assert_array_equal(
+        np.concatenate([streaming.hash_test_mask(block) for block in np.array_split(rows, 9)]), mask
+    )
+    assert mask.mean() == pytest.approx(0.2, abs=0.03)
+    assert not np.array_equal(streaming.hash_test_mask(rows, seed=7), mask)
+
+
+def test_accumulate_from_csv(tmp_path):
+    rows = make_rows(500)
+    frame = pd.DataFrame(rows, columns=FEATURE_COLUMNS + [TARGET_COLUMN])
+    frame.loc[3, "CYLINDERS"] = np.nan
+    path = tmp_path / "fuel.csv"
+    frame.to_csv(path, index=False)
+
+    train, test = streaming.accumulate(str(path), chunk_size=64)
+
+    # read_csv may round differently from the values written, so compare with what it reads
+    complete = pd.read_csv(path).dropna().to_numpy()
+    in_test = streaming.hash_test_mask(complete)
+    assert (train.count, test.count) == (int((~in_test).sum()), int(in_test.sum()))
+    np.testing.assert_allclose(train.mean, complete[~in_test].mean(axis=0), rtol=1e-12)
+
+
+def test_bin_counts():
+    counts = streaming.bin_counts(np.array([1.0, 2.0]), np.array([0.5, 1.0, 1.5, 2.0, 3.0]))
+
+    np.testing.assert_array_equal(counts, [1, 2, 2])
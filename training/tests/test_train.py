@@ -0,0 +1,21 @@
+import numpy as np
+import pandas as pd
+
+import model_search
+import train
+from streaming import FEATURE_COLUMNS
+
+
+def fitted(family, params):
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.uniform(1.0, 20.0, (200, 3)), columns=FEATURE_COLUMNS)
+    y = X.to_numpy() @ np.array([12.0, 6.0, 15.0]) + rng.normal(0, 5, 200)
+    return model_search.build_pipeline(family, params).fit(X, y)
+
+
+def test_only_unpenalized_linear_regression_gets_intervals():
+    assert train.has_ols_intervals(fitted("linear", {}))
+    for family, params in [("ridge", {"alpha": 1.0}), ("lasso", {"alpha": 0.1})]:
+        pipeline = fitted(family, params)
+        assert train.is_affine(pipeline) and not train.has_ols_intervals(pipeline)
+    assert not train.has_ols_intervals(fitted("poly_ridge", {"degree": 2, "alpha": 1.0}))
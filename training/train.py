@@ -6,7 +6,15 @@ This script trains a Linear Regression model to predict CO2 emissions based on:
 - Number of Cylinders (CYLINDERS) 
 - Combined Fuel Consumption (FUELCONSUMPTION_COMB)
 
-The trained model is saved as a sklearn Pipeline for easy deployment.
+The trained model is saved as a sklearn Pipeline for easy deployment, plus a
+compact JSON artifact that the ML service can load with numpy alone.
+
+Usage:
+    python train.py                      # in-memory fit, random 80/20 split, from the columnar cache
+    python train.py --split hash         # in-memory fit, deterministic hash split
+    python train.py --streaming          # out-of-core fit for CSVs larger than RAM
+    python train.py --streaming --csv big.csv --chunk-size 500000
+    python train.py --search --folds 5 --workers 8 --latency-budget-ms 2
 """
 
 import pandas as pd
@@ -17,13 +25,29 @@ from sklearn.preprocessing import StandardScaler
 from sklearn.pipeline import Pipeline
 from sklearn.metrics import mean_squared_error, r2_score, mean_absolute_error
 import joblib
+import argparse
+import hashlib
+import json
 import os
 
-def load_data(csv_path):
-    """Load and preprocess the fuel consumption dataset"""
+import dataset_cache
+import model_search
+import streaming
+
+# Format tag of the compact artifact, understood by ml-service/artifact.py
+COMPACT_FORMAT = "ecometer-linear-v1"
+
+def load_data(csv_path, cache_dir=dataset_cache.DEFAULT_CACHE_DIR):
+    """
+    Load the fuel consumption dataset from its columnar cache
+    
+    The CSV is only parsed when the cache has no entry for its content;
+    the returned dataset maps the cached columns without reading them.
+    """
     print("Loading dataset...")
-    df = pd.read_csv(csv_path)
-    print(f"Dataset shape: {df.shape}")
+    dataset = dataset_cache.load(csv_path, cache_dir)
+    df = dataset.frame()
+    print(f"Dataset shape: {df.shape} (model columns of {dataset.manifest['source_rows']} source rows)")
     print(f"Columns: {list(df.columns)}")
     
     # Display basic statistics
@@ -32,9 +56,9 @@ def load_data(csv_path):
     print("\nFirst few rows:")
     print(df.head())
     
-    return df
+    return dataset
 
-def prepare_features(df):
+def prepare_features(dataset):
     """Prepare features and target variables"""
     print("\nPreparing features...")
     
@@ -42,17 +66,14 @@ def prepare_features(df):
     feature_columns = ['ENGINESIZE', 'CYLINDERS', 'FUELCONSUMPTION_COMB']
     target_column = 'CO2EMISSIONS'
     
-    # Check for missing values
+    # Rows with missing values were removed when the cache was built
     print("Missing values per column:")
-    print(df[feature_columns + [target_column]].isnull().sum())
+    print(pd.Series(dataset.manifest["missing"]))
+    print(f"Rows after removing missing values: {dataset.rows}")
     
-    # Remove rows with missing values in our target features
-    df_clean = df[feature_columns + [target_column]].dropna()
-    print(f"Rows after removing missing values: {len(df_clean)}")
-    
-    # Separate features and target
-    X = df_clean[feature_columns]
-    y = df_clean[target_column]
+    # Separate features and target, both over the mapped columns
+    X = dataset.frame(feature_columns)
+    y = pd.Series(dataset.columns[target_column], name=target_column, copy=False)
     
     print(f"\nFeature statistics:")
     print(X.describe())
@@ -61,23 +82,57 @@ def prepare_features(df):
     
     return X, y
 
-def train_model(X, y):
-    """Train the Linear Regression model with preprocessing pipeline"""
+def split_data(X, y, split="random", test_size=0.2, seed=42, indices=None):
+    """
+    Split into train and test sets, randomly or by deterministic row hashing
+    
+    indices are precomputed (train, test) row positions of the split, as
+    stored by the dataset cache.
+    """
+    if indices is not None:
+        train, test = indices
+        return X.iloc[train], X.iloc[test], y.iloc[train], y.iloc[test]
+    
+    if split == "hash":
+        # Same assignment as the streaming mode, whatever the row order
+        values = np.column_stack([X.to_numpy(dtype=np.float64), y.to_numpy(dtype=np.float64)])
+        in_test = streaming.hash_test_mask(values, test_size, seed)
+        return X[~in_test], X[in_test], y[~in_test], y[in_test]
+    
+    return train_test_split(X, y, test_size=test_size, random_state=seed)
+
+def is_affine(pipeline):
+    """Whether the pipeline is a StandardScaler followed by a linear regressor"""
+    steps = pipeline.named_steps
+    return set(steps) == {'scaler', 'regressor'} and \
+        np.shape(getattr(steps['regressor'], 'coef_', None)) == (len(streaming.FEATURE_COLUMNS),)
+
+def has_ols_intervals(pipeline):
+    """Whether the pipeline is an unpenalized LinearRegression, for which OLS prediction intervals hold"""
+    return is_affine(pipeline) and isinstance(pipeline.named_steps['regressor'], LinearRegression)
+
+def train_model(X, y, split="random", pipeline=None, indices=None):
+    """
+    Train the Linear Regression model with preprocessing pipeline
+    
+    Pass an unfitted pipeline (e.g. the model search winner) to train it
+    instead of the default StandardScaler + LinearRegression, and the
+    split's precomputed indices to skip recomputing it.
+    """
     print("\nTraining model...")
     
     # Split the data
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42
-    )
+    X_train, X_test, y_train, y_test = split_data(X, y, split, indices=indices)
     
     print(f"Training set size: {X_train.shape[0]}")
     print(f"Test set size: {X_test.shape[0]}")
     
     # Create preprocessing and model pipeline
-    pipeline = Pipeline([
-        ('scaler', StandardScaler()),  # Standardize features
-        ('regressor', LinearRegression())  # Linear regression model
-    ])
+    if pipeline is None:
+        pipeline = Pipeline([
+            ('scaler', StandardScaler()),  # Standardize features
+            ('regressor', LinearRegression())  # Linear regression model
+        ])
     
     # Train the model
     pipeline.fit(X_train, y_train)
@@ -116,14 +171,15 @@ def train_model(X, y):
     print(f"R²:   {test_r2:.4f}")
     
     # Feature coefficients
-    print(f"\nModel Coefficients:")
-    feature_names = X.columns
-    coefficients = pipeline.named_steps['regressor'].coef_
-    intercept = pipeline.named_steps['regressor'].intercept_
-    
-    for name, coef in zip(feature_names, coefficients):
-        print(f"{name}: {coef:.4f}")
-    print(f"Intercept: {intercept:.4f}")
+    if is_affine(pipeline):
+        print(f"\nModel Coefficients:")
+        feature_names = X.columns
+        coefficients = pipeline.named_steps['regressor'].coef_
+        intercept = pipeline.named_steps['regressor'].intercept_
+        
+        for name, coef in zip(feature_names, coefficients):
+            print(f"{name}: {coef:.4f}")
+        print(f"Intercept: {intercept:.4f}")
     
     # Example predictions
     print(f"\nExample Predictions (first 5 test samples):")
@@ -137,6 +193,82 @@ def train_model(X, y):
     
     return pipeline
 
+def train_model_streaming(csv_path, chunk_size=streaming.DEFAULT_CHUNK_SIZE):
+    """
+    Fit the same pipeline out-of-core, reading the CSV in chunks.
+    
+    Memory use is bounded by chunk_size whatever the size of the file. Uses
+    the hash split, so the model equals `train_model(X, y, split="hash")`.
+    """
+    print(f"\nTraining model from {csv_path} in chunks of {chunk_size} rows...")
+    
+    # Pass 1: sufficient statistics of the train and test rows
+    train_stats, test_stats = streaming.accumulate(csv_path, chunk_size)
+    print(f"Training set size: {train_stats.count}")
+    print(f"Test set size: {test_stats.count}")
+    
+    if train_stats.count == 0:
+        raise ValueError("No complete training rows found")
+    
+    pipeline = streaming.fit_pipeline(train_stats)
+    
+    # Pass 2: prediction errors on both splits, and the drift reference bins
+    bin_edges = streaming.normal_bin_edges(train_stats)
+    results = streaming.evaluate(pipeline, csv_path, train_stats, test_stats, chunk_size,
+                                 bin_edges=bin_edges)
+    
+    print("\n" + "="*50)
+    print("MODEL EVALUATION")
+    print("="*50)
+    
+    for label, key in [("Training", "train"), ("Test", "test")]:
+        split_metrics = results[key]
+        if split_metrics is None:
+            continue
+        print(f"\n{label} Metrics:")
+        print(f"MSE:  {split_metrics['mse']:.2f}")
+        print(f"RMSE: {split_metrics['rmse']:.2f}")
+        print(f"MAE:  {split_metrics['mae']:.2f}")
+        print(f"R²:   {split_metrics['r2']:.4f}")
+    
+    print(f"\nModel Coefficients:")
+    regressor = pipeline.named_steps['regressor']
+    for name, coef in zip(streaming.FEATURE_COLUMNS, regressor.coef_):
+        print(f"{name}: {coef:.4f}")
+    print(f"Intercept: {regressor.intercept_:.4f}")
+    
+    # Residual sum of squares of the training rows, from the second pass
+    train_sse = results["train"]["mse"] * train_stats.count
+    interval = streaming.interval_statistics(train_stats, train_sse)
+    feature_bins = streaming.feature_bins(bin_edges, results["train_bin_counts"])
+    
+    return pipeline, interval, feature_bins
+
+def interval_statistics(pipeline, X_train, y_train):
+    """
+    OLS prediction interval statistics of a fitted LinearRegression pipeline on its training rows
+    
+    Only valid for unpenalized least squares (see has_ols_intervals); the
+    coverage of intervals derived this way for Ridge or Lasso is unknown.
+    """
+    values = np.column_stack([X_train.to_numpy(dtype=np.float64), y_train.to_numpy(dtype=np.float64)])
+    stats = streaming.MomentAccumulator()
+    stats.update(values)
+    residuals = values[:, -1] - pipeline.predict(X_train)
+    return streaming.interval_statistics(stats, float(residuals @ residuals))
+
+def feature_bin_reference(X_train):
+    """
+    Training distribution of every feature over its decile bins
+    
+    The service compares live inputs against it to detect drift. Repeated
+    cut points (common for CYLINDERS, which takes few values) are merged.
+    """
+    values = X_train.to_numpy(dtype=np.float64)
+    edges = [np.unique(np.quantile(values[:, i], streaming.BIN_QUANTILES)) for i in range(values.shape[1])]
+    counts = [streaming.bin_counts(feature_edges, values[:, i]) for i, feature_edges in enumerate(edges)]
+    return streaming.feature_bins(edges, counts)
+
 def save_model(pipeline, output_path):
     """Save the trained pipeline"""
     print(f"\nSaving model to {output_path}...")
@@ -153,33 +285,165 @@ def save_model(pipeline, output_path):
     
     return output_path
 
+def compact_content_hash(params):
+    """
+    SHA-256 over the canonical JSON of every field except content_hash.
+    
+    Must stay identical to content_hash in ml-service/artifact.py.
+    """
+    payload = {key: value for key, value in params.items() if key != "content_hash"}
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def export_compact_artifact(pipeline, feature_names, output_path, interval=None, feature_bins=None):
+    """
+    Export scaler statistics and coefficients as a small sklearn-free JSON artifact
+    
+    interval holds the statistics from interval_statistics(); with them the
+    service can return prediction intervals. feature_bins, from
+    feature_bin_reference(), is the training distribution the service's
+    drift monitor compares live inputs against.
+    """
+    print(f"\nExporting compact artifact to {output_path}...")
+    
+    scaler = pipeline.named_steps['scaler']
+    regressor = pipeline.named_steps['regressor']
+    if isinstance(regressor, LinearRegression):
+        model_type = "Linear Regression with StandardScaler"
+    else:
+        model_type = f"{type(regressor).__name__} with StandardScaler"
+    
+    # Recorded so the service can self-test the artifact without sklearn
+    sample_input = [3.5, 6, 10.0]
+    sample_prediction = pipeline.predict(pd.DataFrame([sample_input], columns=feature_names))[0]
+    
+    params = {
+        "format": COMPACT_FORMAT,
+        "model_type": model_type,
+        "features": list(feature_names),
+        "target": "CO2EMISSIONS",
+        "scaler_mean": scaler.mean_.tolist(),
+        "scaler_scale": scaler.scale_.tolist(),
+        "coefficients": regressor.coef_.tolist(),
+        "intercept": float(regressor.intercept_),
+        "sample_input": sample_input,
+        "sample_prediction": float(sample_prediction)
+    }
+    if interval is not None:
+        params["interval"] = interval
+    if feature_bins is not None:
+        params["feature_bins"] = feature_bins
+    params["content_hash"] = compact_content_hash(params)
+    
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(params, f, indent=2)
+    
+    print(f"Compact artifact saved (content hash {params['content_hash'][:16]})")
+    return output_path
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train the CO2 emissions model")
+    parser.add_argument("--csv", default=os.path.join('..', 'FuelConsumptionCo2.csv'),
+                        help="Training data CSV")
+    parser.add_argument("--cache-dir", default=dataset_cache.DEFAULT_CACHE_DIR,
+                        help="Columnar dataset cache for the in-memory fit")
+    parser.add_argument("--streaming", action="store_true",
+                        help="Fit out-of-core from CSV chunks (implies --split hash)")
+    parser.add_argument("--chunk-size", type=int, default=streaming.DEFAULT_CHUNK_SIZE,
+                        help="Rows per chunk in streaming mode")
+    parser.add_argument("--split", choices=["random", "hash"], default="random",
+                        help="Train/test split for the in-memory fit")
+    parser.add_argument("--search", action="store_true",
+                        help="Cross-validate candidate models in parallel and train the best one")
+    parser.add_argument("--folds", type=int, default=model_search.DEFAULT_FOLDS,
+                        help="Cross-validation folds for --search")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes for --search (default: CPU count)")
+    parser.add_argument("--latency-budget-ms", type=float,
+                        default=model_search.DEFAULT_LATENCY_BUDGET_MS,
+                        help="Maximum single-row p99 predict latency for the selected model")
+    parser.add_argument("--allow-nonlinear", action="store_true",
+                        help="Let --search select polynomial and tree models, which are saved as a "
+                             "pickle only (no compact artifact, prediction intervals or drift bins)")
+    return parser.parse_args()
+
 def main():
     """Main training pipeline"""
+    args = parse_args()
+    
     print("="*60)
     print("CAR CO2 EMISSIONS PREDICTION MODEL TRAINING")
     print("="*60)
     
     # Paths
-    csv_path = os.path.join('..', 'FuelConsumptionCo2.csv')
+    csv_path = args.csv
     model_output_path = os.path.join('..', 'model_artifacts', 'fuel_co2_pipeline_v1.pkl')
+    compact_output_path = os.path.join('..', 'model_artifacts', 'fuel_co2_pipeline_v1.json')
+    leaderboard_path = os.path.join('evaluation_results', 'model_search.json')
+    
+    if args.search and args.streaming:
+        raise SystemExit("--search needs the in-memory mode; drop --streaming")
     
     try:
-        # Load data
-        df = load_data(csv_path)
-        
-        # Prepare features
-        X, y = prepare_features(df)
-        
-        # Train model
-        pipeline = train_model(X, y)
+        if args.streaming:
+            # Train model without loading the whole dataset
+            pipeline, interval, feature_bins = train_model_streaming(csv_path, args.chunk_size)
+            feature_names = streaming.FEATURE_COLUMNS
+        else:
+            # Load data
+            dataset = load_data(csv_path, args.cache_dir)
+            
+            # Prepare features
+            X, y = prepare_features(dataset)
+            feature_names = X.columns
+            split_indices = dataset.split(args.split)
+            
+            # Pick the model: cross-validated on the training split only
+            pipeline = None
+            X_train, _, y_train, _ = split_data(X, y, args.split, indices=split_indices)
+            if args.search:
+                results = model_search.search(
+                    X_train, y_train,
+                    folds=args.folds,
+                    workers=args.workers,
+                    latency_budget_ms=args.latency_budget_ms,
+                    affine_only=not args.allow_nonlinear
+                )
+                model_search.print_leaderboard(results)
+                model_search.save_leaderboard(results, leaderboard_path)
+                if results["selected"] is None:
+                    raise ValueError("No eligible candidate model meets the latency budget")
+                selected = results["selected"]
+                pipeline = model_search.build_pipeline(selected["family"], selected["params"])
+            
+            # Train model
+            pipeline = train_model(X, y, split=args.split, pipeline=pipeline, indices=split_indices)
+            if has_ols_intervals(pipeline):
+                interval = interval_statistics(pipeline, X_train, y_train)
+            else:
+                interval = None
+                if is_affine(pipeline):
+                    print("No prediction intervals: OLS intervals do not hold for a penalized regressor")
+            feature_bins = feature_bin_reference(X_train)
         
         # Save model
         model_path = save_model(pipeline, model_output_path)
+        if is_affine(pipeline):
+            export_compact_artifact(pipeline, feature_names, compact_output_path, interval, feature_bins)
+        elif os.path.exists(compact_output_path):
+            # The service prefers the compact artifact, so a stale one would shadow the pickle
+            os.remove(compact_output_path)
+            print(f"Removed stale compact artifact {compact_output_path} (model is not linear)")
         
         print("\n" + "="*60)
         print("TRAINING COMPLETED SUCCESSFULLY!")
         print("="*60)
         print(f"Model saved to: {model_path}")
+        if os.path.exists(compact_output_path):
+            print(f"Compact artifact saved to: {compact_output_path}")
+        else:
+            print("No compact artifact: the model is not linear, so the service loads the pickle")
         print(f"Model is ready for deployment in the ML service.")
         
         # Test the saved model with a sample prediction